@@ -47,6 +47,9 @@ class ApiClient(object):
         to the API
     :param pool_threads: The number of threads to use for async requests
         to the API. More threads means more concurrent API requests.
+    :param keep_formatted_values: if True, deserialized values are kept as they
+        are in JSON, e.g. dates stay ISO 8601 strings and amounts stay formatted
+        as "$1,234.50", like in the models created by the statement extractors.
     """
 
     PRIMITIVE_TYPES = (float, bool, bytes, six.text_type) + six.integer_types
@@ -61,9 +64,12 @@ class ApiClient(object):
         'object': object,
     }
     _pool = None
+    # Deserialization plans by class literal or type string
+    _deserialization_plans = {}
 
-    def __init__(self):
+    def __init__(self, keep_formatted_values=False):
         self.client_side_validation = Configuration.get_default_copy().client_side_validation
+        self.keep_formatted_values = keep_formatted_values
 
     def __enter__(self):
         return self
@@ -267,7 +273,28 @@ class ApiClient(object):
         return self.__deserialize(data, response_type)
 
     def deserialize_data(self, data, klass):
-        self.__deserialize(data, klass)
+        """Deserializes dict, list, str into an object.
+
+        :param data: dict, list or str, e.g. loaded with json.load.
+        :param klass: class literal, or string of class name.
+
+        :return: object.
+        """
+        return self.__deserialize(data, klass)
+
+    def deserialize_many(self, items, klass):
+        """Deserializes each element of an iterable of dict, list, str
+        into an object of the same class.
+
+        The deserialization plan of the class is looked up once for all the elements.
+
+        :param items: iterable of dict, list or str.
+        :param klass: class literal, or string of class name.
+
+        :return: list of objects.
+        """
+        plan = self.__deserialization_plan(klass)
+        return [plan(self, data) for data in items]
 
     def __deserialize(self, data, klass):
         """Deserializes dict, list, str into an object.
@@ -279,17 +306,48 @@ class ApiClient(object):
         """
         if data is None:
             return None
+        return self.__deserialization_plan(klass)(self, data)
+
+    def __deserialization_plan(self, klass):
+        """Returns the function that deserializes data into an object of klass.
 
+        Plans are compiled once per class literal or type string and cached, so
+        type strings are parsed and model attributes are looked up only once.
+        Plans are shared by all the clients, so they don't hold on to the client
+        that compiled them, and take the client they deserialize for instead.
+
+        :param klass: class literal, or string of class name.
+
+        :return: function of the client and the data returning the object.
+        """
+        plan = ApiClient._deserialization_plans.get(klass)
+        if plan is None:
+            plan = self.__compile_plan(klass)
+        return plan
+
+    def __compile_plan(self, klass):
+        key = klass
         if type(klass) == str:
             if klass.startswith('list['):
-                sub_kls = re.match(r'list\[(.*)\]', klass).group(1)
-                return [self.__deserialize(sub_data, sub_kls)
-                        for sub_data in data]
+                sub_plan = self.__deserialization_plan(
+                    re.match(r'list\[(.*)\]', klass).group(1))
+
+                def plan(client, data):
+                    return [None if sub_data is None
+                            else sub_plan(client, sub_data)
+                            for sub_data in data]
+                ApiClient._deserialization_plans[key] = plan
+                return plan
 
             if klass.startswith('dict('):
-                sub_kls = re.match(r'dict\(([^,]*), (.*)\)', klass).group(2)
-                return {k: self.__deserialize(v, sub_kls)
-                        for k, v in six.iteritems(data)}
+                sub_plan = self.__deserialization_plan(
+                    re.match(r'dict\(([^,]*), (.*)\)', klass).group(2))
+
+                def plan(client, data):
+                    return {k: None if v is None else sub_plan(client, v)
+                            for k, v in six.iteritems(data)}
+                ApiClient._deserialization_plans[key] = plan
+                return plan
 
             # convert str to class
             if klass in self.NATIVE_TYPES_MAPPING:
@@ -298,15 +356,46 @@ class ApiClient(object):
                 klass = getattr(models, klass)
 
         if klass in self.PRIMITIVE_TYPES:
-            return self.__deserialize_primitive(data, klass)
+            def plan(client, data):
+                return client.__deserialize_primitive(data, klass)
         elif klass == object:
-            return self.__deserialize_object(data)
+            plan = ApiClient.__deserialize_object
         elif klass == datetime.date:
-            return self.__deserialize_date(data)
+            plan = ApiClient.__deserialize_date
         elif klass == datetime.datetime:
-            return self.__deserialize_datetime(data)
+            plan = ApiClient.__deserialize_datetime
+        elif (hasattr(klass, 'get_real_child_model')
+                and klass.discriminator_value_class_map):
+            def plan(client, data):
+                return client.__deserialize_model(data, klass)
+        elif not klass.openapi_types:
+            plan = ApiClient.__deserialize_object
         else:
-            return self.__deserialize_model(data, klass)
+            # Models can refer to themselves, so the plan is cached before
+            # the plans of its attributes are compiled
+            attributes = []
+
+            def plan(client, data):
+                if (client.keep_formatted_values
+                        and not isinstance(data, (list, dict))):
+                    return data
+                kwargs = {}
+                if isinstance(data, (list, dict)):
+                    for attr, json_key, attr_plan in attributes:
+                        if json_key in data:
+                            value = data[json_key]
+                            kwargs[attr] = (None if value is None
+                                            else attr_plan(client, value))
+                return klass(**kwargs)
+            ApiClient._deserialization_plans[key] = plan
+            ApiClient._deserialization_plans[klass] = plan
+            for attr, attr_type in six.iteritems(klass.openapi_types):
+                attributes.append((attr, klass.attribute_map[attr],
+                                   self.__deserialization_plan(attr_type)))
+            return plan
+
+        ApiClient._deserialization_plans[key] = plan
+        return plan
 
     def call_api(self, resource_path, method,
                  path_params=None, query_params=None, header_params=None,
@@ -594,6 +683,8 @@ class ApiClient(object):
 
         :return: int, long, float, str, bool.
         """
+        if self.keep_formatted_values:
+            return data
         try:
             return klass(data)
         except UnicodeEncodeError:
@@ -614,6 +705,8 @@ class ApiClient(object):
         :param string: str.
         :return: date.
         """
+        if self.keep_formatted_values:
+            return string
         try:
             return parse(string).date()
         except ImportError:
@@ -632,6 +725,8 @@ class ApiClient(object):
         :param string: str.
         :return: datetime.
         """
+        if self.keep_formatted_values:
+            return string
         try:
             return parse(string)
         except ImportError:
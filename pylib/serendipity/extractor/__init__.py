@@ -1,2 +1,6 @@
+from .csv_section_index import CsvSection, CsvSectionIndex
 from .document import Document
+from .document_cache import DocumentCache
+from .document_probe import DocumentProbe
+from .ofx_document import OfxDocument, OfxEvent, QfxDocument
 from .create_document import createDocument
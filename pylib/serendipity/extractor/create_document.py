@@ -3,6 +3,7 @@ import os
 from .document import  Document
 from .csv_document import CsvDocument
 from .excel_document import ExcelDocument
+from .ofx_document import OfxDocument, QfxDocument
 from .pdf_document import PdfDocument
 
 def createDocument(filepath: str) -> Document:
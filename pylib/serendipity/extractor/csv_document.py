@@ -1,17 +1,46 @@
 import csv
+import io
+import itertools
 import pandas
+from typing import Iterator, List, Tuple
 
+from .csv_section_index import CsvSectionIndex, OffsetLines
 from .document import Document
+from .document_probe import DocumentProbe
 
 class CsvDocument(Document, extension="csv"):
+    _probeRows:int = 20
+
     def __init__(self, filepath):
         super().__init__(filepath)
 
-    def text(self) -> str:
+    def _createProbe(self, headerBytes: bytes) -> DocumentProbe:
+        text = headerBytes.decode("utf-8", errors="replace")
+        lines = text.splitlines(keepends=True)
+        if len(headerBytes) >= self._probeSize and len(lines) > 1:
+            # Drop the last line since it may have been truncated
+            lines = lines[:-1]
+        rows = list(itertools.islice(csv.reader(io.StringIO("".join(lines))), self._probeRows))
+        return DocumentProbe(self._extension, headerBytes, text, rows)
+
+    def sectionIndex(self) -> CsvSectionIndex:
+        """
+        Returns the index of the sections of the document, built in a single pass over the document
+        """
+        return self._cached("sectionIndex", lambda: CsvSectionIndex.build(self._filepath))
+
+    def rows(self) -> Iterator[List[str]]:
+        """
+        Streams the rows of the document in a single pass. The rows are not cached.
+        """
+        with open(self._filepath, "r", newline="") as f:
+            yield from csv.reader(f)
+
+    def _readText(self) -> str:
         with open(self._filepath, "r") as f:
             return f.read()
 
-    def extractTable(
+    def _readTable(
         self, 
         tableName:str = "", 
         firstColumnName:str = "",
@@ -20,23 +49,77 @@ class CsvDocument(Document, extension="csv"):
         lastColumnIndex:int = -1,
         tableEndMarker:str = ""
     ) -> pandas.DataFrame:    
+        rows = self._tableRows(tableName, firstColumnName, firstColumnIndex, lastColumnName, lastColumnIndex, tableEndMarker)
+        columns = next(rows, None)
+        if columns is None:
+            return None
+        return pandas.DataFrame(list(rows), columns=columns)
+
+    def extractTableChunks(
+        self, 
+        tableName:str = "", 
+        firstColumnName:str = "",
+        firstColumnIndex:int = -1,
+        lastColumnName:str = "",
+        lastColumnIndex:int = -1,
+        tableEndMarker:str = "",
+        chunkSize:int = 10000
+    ) -> Iterator[pandas.DataFrame]:
+        rows = self._tableRows(tableName, firstColumnName, firstColumnIndex, lastColumnName, lastColumnIndex, tableEndMarker)
+        columns = next(rows, None)
+        if columns is None:
+            return
+        while True:
+            chunk = list(itertools.islice(rows, chunkSize))
+            if len(chunk) == 0:
+                break
+            yield pandas.DataFrame(chunk, columns=columns)
+
+    def _tableStart(self, tableName: str) -> Tuple[int, bool]:
+        """
+        Returns the index of the row to start reading a table from, and whether the 
+        table name was already found before that row
+        """
+        if len(tableName) == 0:
+            return 0, False
+        index = self.sectionIndex()
+        row = index.firstRow(tableName)
+        if row is None:
+            return index.rowCount, False
+        if row < 0:
+            # The rows are checked for the table name from the start
+            return 0, False
+        return row + 1, True
 
-        tableFound = False
+    def _tableRows(
+        self, 
+        tableName:str, 
+        firstColumnName:str,
+        firstColumnIndex:int,
+        lastColumnName:str,
+        lastColumnIndex:int,
+        tableEndMarker:str
+    ) -> Iterator[List[str]]:
+        """
+        Yields the column names of a table followed by the values of each of its rows. 
+        Yields nothing if the table is not found, and stops reading the document at the end of the table. 
+        """
+        index = self.sectionIndex()
+        rowIndex, tableFound = self._tableStart(tableName)
         headerFound = False
-        df = None
-        data = {}
         columns = []
+        # The row of the end marker, -1 when the index can't tell and the rows are checked for it
+        endRow = None
 
-        with open(self._filepath, "r") as f:
-            csvreader = csv.reader(f)
-            for row in csvreader:
+        with open(self._filepath, "rb") as f:
+            csvreader = csv.reader(OffsetLines(f, index.rowOffset(rowIndex)))
+            for rowIndex, row in enumerate(csvreader, start=rowIndex):
                 if headerFound:
-                    if len(tableEndMarker) > 0 and any(tableEndMarker in val for val in row):
+                    if endRow is not None and (rowIndex >= endRow if endRow >= 0 else any(tableEndMarker in val for val in row)):
                         break
                     values = row[firstColumnIndex:(lastColumnIndex + 1)]
                     if len(values) == len(columns):
-                        for val, col in zip(values, columns):
-                            data[col].append(val.strip())
+                        yield [val.strip() for val in values]
                 elif tableFound:
                     if (len(firstColumnName) > 0 and any(firstColumnName in val for val in row)) or firstColumnIndex >= 0:
                         columnIndex = -1
@@ -48,20 +131,17 @@ class CsvDocument(Document, extension="csv"):
                                 if firstColumnFound:
                                     firstColumnIndex = columnIndex
                             if firstColumnFound:
-                                c = c.strip()
-                                data[c] = []
-                                columns.append(c)
+                                columns.append(c.strip())
                                 if (len(lastColumnName) > 0 and lastColumnName in c) or (columnIndex == lastColumnIndex):
                                     break
                         lastColumnIndex = columnIndex
                         headerFound = firstColumnFound and lastColumnIndex >= 0 
+                        if headerFound:
+                            if len(tableEndMarker) > 0:
+                                endRow = index.firstRow(tableEndMarker, rowIndex + 1)
+                            yield columns
                 elif len(tableName) == 0 or any(tableName in val for val in row):
                     tableFound = True
 
-            if not tableFound or not headerFound:
-                return None
-
-        return pandas.DataFrame(data)
-
-    def extractSingleTable(self) -> pandas.DataFrame:
-        return pandas.read_csv(self._filepath)
\ No newline at end of file
+    def _readSingleTable(self, dtype = None) -> pandas.DataFrame:
+        return pandas.read_csv(self._filepath, dtype=dtype)
\ No newline at end of file
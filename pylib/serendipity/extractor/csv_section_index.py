@@ -0,0 +1,206 @@
+import bisect
+import csv
+from array import array
+from typing import BinaryIO, Dict, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+class CsvSection(NamedTuple):
+    """
+    A run of consecutive rows with the same number of cells in a CSV document
+    """
+    # Byte offset of the first row of the section
+    offset: int
+    # Byte offset of the row following the first row
+    dataOffset: int
+    # Byte offset of the first row of the next section, i.e. the end marker of this section
+    endOffset: int
+    # The first row of the section, e.g. the table name or the column names
+    headerRow: List[str]
+    rowCount: int
+
+class OffsetLines:
+    """
+    Line iterator over a binary file that tracks the byte offset of the next line,
+    so the byte offset of each row can be known while reading it with a csv.reader
+    """
+    offset: int
+
+    def __init__(self, f: BinaryIO, offset: int = 0, encoding: str = "utf-8"):
+        self._f = f
+        self._encoding = encoding
+        self.offset = offset
+        f.seek(offset)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        line = self._f.readline()
+        if not line:
+            raise StopIteration
+        self.offset += len(line)
+        return line.decode(self._encoding)
+
+class CsvSectionIndex:
+    """
+    Index of the sections of a CSV document that holds several tables, e.g. brokerage
+    exports. The index is built in a single pass, after which a table can be read by
+    seeking straight to its section instead of scanning the document from the start.
+
+    A section starts at every row that has a different number of cells than the
+    previous row, which covers table names, column headers, end markers and blank
+    lines between tables.
+
+    The index also records the row in which each distinct cell value first occurs, and the
+    rows in which the values of the first row of each section occur, e.g. table names and
+    end markers, up to maxMarkerRows rows per value. The first row with a cell that contains
+    a table name, or the end marker of a table, is then found without reading the document.
+    """
+    maxMarkerRows: int = 64
+
+    _sections: List[CsvSection]
+    # Byte offset of each row, followed by the size of the document
+    _rowOffsets: array
+    # The distinct cell values in the order they first occur, separated by \0, with the
+    # position in it and the row of the values that first occur in each row
+    _firstValues: str
+    _firstValueStarts: array
+    _firstValueRows: array
+    # The rows in which each value of the first row of a section occurs, from that first row on
+    _markerRows: Dict[str, List[int]]
+    # Markers that occur in more than maxMarkerRows rows
+    _frequentMarkers: Set[str]
+
+    def __init__(
+        self, 
+        sections: List[CsvSection], 
+        rowOffsets: array, 
+        firstValues: str, 
+        firstValueStarts: array, 
+        firstValueRows: array, 
+        markerRows: Dict[str, List[int]], 
+        frequentMarkers: Set[str]
+    ):
+        self._sections = sections
+        self._rowOffsets = rowOffsets
+        self._firstValues = firstValues
+        self._firstValueStarts = firstValueStarts
+        self._firstValueRows = firstValueRows
+        self._markerRows = markerRows
+        self._frequentMarkers = frequentMarkers
+
+    @property
+    def sections(self) -> List[CsvSection]:
+        return self._sections
+
+    @property
+    def rowCount(self) -> int:
+        return len(self._rowOffsets) - 1
+
+    @classmethod
+    def build(cls, filepath: str, encoding: str = "utf-8") -> "CsvSectionIndex":
+        sections = []
+        rowOffsets = array("q")
+        seen = set()
+        firstValues = []
+        firstValueStarts = array("q")
+        firstValueRows = array("q")
+        position = 0
+        markerRows = {}
+        frequentMarkers = set()
+        # Markers with fewer than maxMarkerRows recorded rows
+        recording = set()
+        with open(filepath, "rb") as f:
+            lines = OffsetLines(f, encoding=encoding)
+            csvreader = csv.reader(lines)
+            offset = lines.offset
+            width = -1
+            start: Optional[Tuple[int, int, List[str]]] = None
+            rowCount = 0
+            for rowIndex, row in enumerate(csvreader):
+                rowOffsets.append(offset)
+                # Set operations keep the work per row out of the interpreter, except for markers
+                for val in recording.intersection(row):
+                    rows = markerRows[val]
+                    rows.append(rowIndex)
+                    if len(rows) >= cls.maxMarkerRows:
+                        recording.discard(val)
+                        frequentMarkers.add(val)
+                if not seen.issuperset(row):
+                    new = set(row).difference(seen)
+                    seen.update(new)
+                    new.discard("")
+                    if len(new) > 0:
+                        text = "\0".join(new)
+                        firstValues.append(text)
+                        firstValueStarts.append(position)
+                        firstValueRows.append(rowIndex)
+                        position = position + len(text) + 1
+                if len(row) != width:
+                    for val in set(row).difference(markerRows, [""]):
+                        markerRows[val] = [rowIndex]
+                        recording.add(val)
+                    if start is not None:
+                        sections.append(CsvSection(start[0], start[1], offset, start[2], rowCount))
+                    start = (offset, lines.offset, row)
+                    width = len(row)
+                    rowCount = 0
+                rowCount = rowCount + 1
+                offset = lines.offset
+            if start is not None:
+                sections.append(CsvSection(start[0], start[1], offset, start[2], rowCount))
+            rowOffsets.append(offset)
+        return cls(sections, rowOffsets, "\0".join(firstValues), firstValueStarts, firstValueRows, markerRows, frequentMarkers)
+
+    def find(self, tableName: str) -> Optional[CsvSection]:
+        """
+        Returns the first section whose header row contains tableName, None if there isn't one
+        """
+        for section in self._sections:
+            if any(tableName in val for val in section.headerRow):
+                return section
+        return None
+
+    def firstRow(self, text: str, start: int = 0) -> Optional[int]:
+        """
+        Returns the index of the first row from start that has a cell containing text, 
+        None if there isn't one, or -1 if it can't be told from the index, e.g. when text
+        is in a value that occurs before start and isn't a marker
+        """
+        if "\0" in text:
+            return -1
+        # Values that first occur from start
+        i = bisect.bisect_left(self._firstValueRows, start)
+        end = self._firstValueStarts[i] if i < len(self._firstValueStarts) else len(self._firstValues)
+        first = None
+        pos = self._firstValues.find(text, end)
+        if pos >= 0:
+            first = self._firstValueRows[bisect.bisect_right(self._firstValueStarts, pos) - 1]
+
+        # Values that first occur before start can only be told from the markers
+        pos = self._firstValues.find(text, 0, end)
+        while pos >= 0:
+            valStart = self._firstValues.rfind("\0", 0, pos) + 1
+            valEnd = self._firstValues.find("\0", pos)
+            valEnd = valEnd if valEnd >= 0 else len(self._firstValues)
+            rows = self._markerRows.get(self._firstValues[valStart:valEnd])
+            if rows is None or rows[0] > start:
+                return -1
+            j = bisect.bisect_left(rows, start)
+            if j < len(rows):
+                first = rows[j] if first is None else min(first, rows[j])
+            elif self._firstValues[valStart:valEnd] in self._frequentMarkers:
+                return -1
+            pos = self._firstValues.find(text, valEnd, end)
+        return first
+
+    def rowOffset(self, rowIndex: int) -> int:
+        """
+        Returns the byte offset of a row, or the size of the document for the row past the last one
+        """
+        return self._rowOffsets[rowIndex]
+
+    def __iter__(self) -> Iterator[CsvSection]:
+        return iter(self._sections)
+
+    def __len__(self) -> int:
+        return len(self._sections)
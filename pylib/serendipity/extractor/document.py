@@ -1,11 +1,21 @@
+import hashlib
 import pandas
+from typing import Any, Callable, Iterator
+
+from .document_cache import DocumentCache
+from .document_probe import DocumentProbe
 
 class Document:
     _extensionMap:dict = {}
     _extension:str = ""
+    _probeSize:int = 64 * 1024
+    _hashBlockSize:int = 1024 * 1024
+    _cache:DocumentCache = DocumentCache()
 
     def __init__(self, filepath: str):
         self._filepath = filepath
+        self._probe = None
+        self._contentHash = None
 
     def __init_subclass__(cls, extension: str, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -20,6 +30,17 @@ class Document:
     def extension(self) -> str:
         return self._extension
 
+    @classmethod
+    def cache(cls) -> DocumentCache:
+        return Document._cache
+
+    @classmethod
+    def setCache(cls, cache: DocumentCache):
+        """
+            Set the cache shared by all documents for text and tables extracted from them
+        """
+        Document._cache = cache
+
     @property
     def isPdf(self) -> bool:
         return self._extension == "pdf"
@@ -28,15 +49,59 @@ class Document:
     def isCsv(self) -> bool:
         return self._extension == "csv"
 
+    def probe(self) -> DocumentProbe:
+        """
+            Return the probe used to detect the format of the document. 
+            The probe is created once from a bounded prefix of the document
+        """
+        if self._probe is None:
+            with open(self._filepath, "rb") as f:
+                headerBytes = f.read(self._probeSize)
+            self._probe = self._createProbe(headerBytes)
+        return self._probe
+
+    def _createProbe(self, headerBytes: bytes) -> DocumentProbe:
+        return DocumentProbe(self._extension, headerBytes, headerBytes.decode("utf-8", errors="replace"))
+
+    def contentHash(self) -> str:
+        """
+            Return the hash of the content of the document
+        """
+        if self._contentHash is None:
+            self._contentHash = Document.fileContentHash(self._filepath)
+        return self._contentHash
+
+    @staticmethod
+    def fileContentHash(filepath: str) -> str:
+        """
+            Return the hash of the content of a file
+        """
+        h = hashlib.sha256()
+        with open(filepath, "rb") as f:
+            for block in iter(lambda: f.read(Document._hashBlockSize), b""):
+                h.update(block)
+        return h.hexdigest()
+
+    def _cached(self, name: str, compute: Callable[[], Any], persist: bool = True, **params) -> Any:
+        """
+            Return the result of compute memoized by the document content and the parameters
+        """
+        key = DocumentCache.key(self.contentHash(), name, **params)
+        value = Document._cache.get(key, compute, persist=persist)
+        # Tables are mutable, so don't hand out the cached instance 
+        if isinstance(value, pandas.DataFrame):
+            return value.copy()
+        return value
+
     def text(self) -> str:
         """
             Return the entire document in textual form
         """
-        raise NotImplementedError
+        return self._cached("text", self._readText)
 
     def extractTable(
         self, 
-        tableName: str, 
+        tableName: str = "", 
         firstColumnName:str =  "",
         firstColumnIndex:int = -1,
         lastColumnName:str = "",
@@ -46,11 +111,62 @@ class Document:
         """
             Return a specific table
         """
+        params = dict(
+            tableName=tableName,
+            firstColumnName=firstColumnName,
+            firstColumnIndex=firstColumnIndex,
+            lastColumnName=lastColumnName,
+            lastColumnIndex=lastColumnIndex,
+            tableEndMarker=tableEndMarker
+        )
+        return self._cached("extractTable", lambda: self._readTable(**params), **params)
+
+    def extractTableChunks(
+        self, 
+        tableName: str = "", 
+        firstColumnName:str =  "",
+        firstColumnIndex:int = -1,
+        lastColumnName:str = "",
+        lastColumnIndex:int = -1,
+        tableEndMarker:str = "",
+        chunkSize:int = 10000
+    ) -> Iterator[pandas.DataFrame]:
+        """
+            Stream a specific table as tables of at most chunkSize rows, 
+            without holding the entire table in memory. The chunks are not cached.
+        """
+        raise NotImplementedError
+
+    def extractSingleTable(self, dtype = None) -> pandas.DataFrame:
+        """
+            Extract from a document that consists of a single table. 
+            dtype forces the type of all columns, e.g. str to keep values as they appear in the document
+        """
+        return self._cached("extractSingleTable", lambda: self._readSingleTable(dtype), dtype=dtype)
+
+    def _readText(self) -> str:
+        """
+            Read the entire document in textual form, uncached
+        """
+        raise NotImplementedError
+
+    def _readTable(
+        self, 
+        tableName: str, 
+        firstColumnName:str,
+        firstColumnIndex:int,
+        lastColumnName:str,
+        lastColumnIndex:int,
+        tableEndMarker:str
+    ) -> pandas.DataFrame:
+        """
+            Read a specific table, uncached
+        """
         raise NotImplementedError
 
-    def extractSingleTable(self) -> pandas.DataFrame:
+    def _readSingleTable(self, dtype = None) -> pandas.DataFrame:
         """
-            Extract from a document that consists of a single table 
+            Read a document that consists of a single table, uncached 
         """
         raise NotImplementedError
 
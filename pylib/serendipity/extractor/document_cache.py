@@ -0,0 +1,148 @@
+from collections import OrderedDict
+import hashlib
+import os
+import pathlib
+import pickle
+import tempfile
+from typing import Any, Callable, Optional
+import zlib
+
+class DocumentCache:
+    """
+    Size bounded LRU cache of the results extracted from documents, keyed by the
+    hash of the document content and the extraction parameters.
+
+    If a path is given, results are also persisted on disk, compressed, so that processing 
+    the same documents again skips parsing them. When the entries on disk grow over 
+    maxDiskBytes, the least recently used entries are evicted.
+    """
+    _version: int = 4
+    _maxEntries: int
+    _maxDiskBytes: int
+    _diskBytes: int
+    _path: Optional[pathlib.Path]
+    _entries: OrderedDict
+
+    def __init__(self, maxEntries: int = 128, path: str = None, maxDiskBytes: int = 1024 * 1024 * 1024):
+        self._maxEntries = maxEntries
+        self._maxDiskBytes = maxDiskBytes
+        self._diskBytes = 0
+        self._path = pathlib.Path(path) if path is not None else None
+        self._entries = OrderedDict()
+        if self._path is not None:
+            self._path.mkdir(parents=True, exist_ok=True)
+            self._diskBytes = sum(size for _, size, _ in self._diskEntries())
+
+    @property
+    def maxEntries(self) -> int:
+        return self._maxEntries
+
+    @property
+    def path(self) -> Optional[pathlib.Path]:
+        return self._path
+
+    @property
+    def diskBytes(self) -> int:
+        return self._diskBytes
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def key(contentHash: str, name: str, **params) -> str:
+        """
+        Returns the cache key for the result of the extraction `name` with the given parameters
+        """
+        paramsStr = ",".join(f"{k}={params[k]!r}" for k in sorted(params))
+        return f"{contentHash}:{name}({paramsStr})"
+
+    def get(self, key: str, compute: Callable[[], Any], persist: bool = True) -> Any:
+        """
+        Returns the cached value for key, calling compute to create it if it is not cached
+        """
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        found, value = self._load(key) if persist else (False, None)
+        if not found:
+            value = compute()
+            if persist:
+                self._store(key, value)
+        self._insert(key, value)
+        return value
+
+    def clear(self):
+        """
+        Clears the in memory entries. Entries persisted on disk are kept.
+        """
+        self._entries.clear()
+
+    def _insert(self, key: str, value: Any):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._maxEntries:
+            self._entries.popitem(last=False)
+
+    def _filepath(self, key: str) -> pathlib.Path:
+        name = hashlib.sha256(f"{self._version}:{key}".encode("utf-8")).hexdigest()
+        return self._path / name[:2] / f"{name}.pickle"
+
+    def _load(self, key: str):
+        if self._path is None:
+            return False, None
+        filepath = self._filepath(key)
+        try:
+            with open(filepath, "rb") as f:
+                value = pickle.loads(zlib.decompress(f.read()))
+        except (OSError, EOFError, zlib.error, pickle.UnpicklingError):
+            return False, None
+        # The modification time tracks the last use of an entry for eviction
+        try:
+            os.utime(filepath)
+        except OSError:
+            pass
+        return True, value
+
+    def _store(self, key: str, value: Any):
+        if self._path is None:
+            return
+        filepath = self._filepath(key)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        data = zlib.compress(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), 1)
+        # Write to a temporary file and rename it so readers never see a partial entry
+        fd, tmpPath = tempfile.mkstemp(dir=filepath.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmpPath, filepath)
+        except BaseException:
+            os.remove(tmpPath)
+            raise
+        self._diskBytes = self._diskBytes + len(data)
+        if self._diskBytes > self._maxDiskBytes:
+            self._evict()
+
+    def _diskEntries(self):
+        for filepath in self._path.glob("*/*.pickle"):
+            try:
+                st = filepath.stat()
+            except OSError:
+                continue
+            yield filepath, st.st_size, st.st_mtime_ns
+
+    def _evict(self):
+        """
+        Removes the least recently used entries on disk until they use at most 3/4 of maxDiskBytes
+        """
+        entries = sorted(self._diskEntries(), key=lambda e: e[2])
+        self._diskBytes = sum(size for _, size, _ in entries)
+        target = self._maxDiskBytes * 3 // 4
+        for filepath, size, _ in entries:
+            if self._diskBytes <= target:
+                break
+            try:
+                os.remove(filepath)
+                self._diskBytes = self._diskBytes - size
+            except OSError:
+                pass
@@ -0,0 +1,58 @@
+from typing import List, Optional
+
+class DocumentProbe:
+    """
+    A bounded prefix of a document that is read once and used to detect
+    which extractor can process the document, without parsing the whole document
+    """
+    _extension: str
+    _headerBytes: bytes
+    _text: str
+    _rows: List[List[str]]
+
+    def __init__(self, extension: str, headerBytes: bytes, text: str, rows: Optional[List[List[str]]] = None):
+        self._extension = extension
+        self._headerBytes = headerBytes
+        self._text = text
+        self._rows = rows if rows is not None else []
+
+    @property
+    def extension(self) -> str:
+        return self._extension
+
+    @property
+    def headerBytes(self) -> bytes:
+        """
+        The raw bytes at the start of the document
+        """
+        return self._headerBytes
+
+    @property
+    def text(self) -> str:
+        """
+        The text at the start of the document
+        """
+        return self._text
+
+    @property
+    def rows(self) -> List[List[str]]:
+        """
+        The first rows of a tabular document, empty for other documents
+        """
+        return self._rows
+
+    @property
+    def columns(self) -> List[str]:
+        """
+        The column names of a tabular document, i.e. its first row
+        """
+        if len(self._rows) == 0:
+            return []
+        return [c.strip() for c in self._rows[0]]
+
+    def contains(self, s: str) -> bool:
+        return s in self._text
+
+    def hasColumns(self, *names: str) -> bool:
+        columns = self.columns
+        return all(name in columns for name in names)
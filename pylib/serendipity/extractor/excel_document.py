@@ -4,5 +4,5 @@ class ExcelDocument(Document, extension="xlsx"):
     def __init__(self, filepath):
         super(filepath)
 
-    def text(self) -> str:
+    def _readText(self) -> str:
         return None
@@ -0,0 +1,128 @@
+import html
+from typing import Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from .document import Document
+
+class OfxEvent(NamedTuple):
+    """
+    An event of the streaming OFX parser. Aggregates produce a "start" and an "end" event,
+    and elements that hold a value produce a single "value" event.
+    """
+    kind: str
+    name: str
+    value: Optional[str] = None
+
+class OfxDocument(Document, extension="ofx"):
+    """
+    OFX 1.x (SGML) or 2.x (XML) document, e.g. the QFX files downloaded from banks and brokerages.
+
+    The document is tokenized incrementally in blocks of _readSize characters, so
+    documents spanning several years of transactions are parsed in a single pass
+    without holding the whole document or intermediate copies of it in memory.
+    """
+    _readSize: int = 64 * 1024
+
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+
+    def encoding(self) -> str:
+        """
+        Returns the encoding declared in the header of the document
+        """
+        header = self.probe().text
+        if "<?xml" in header or "ENCODING:UTF-8" in header:
+            return "utf-8"
+        return "cp1252"
+
+    def _readText(self) -> str:
+        with open(self._filepath, "r", encoding=self.encoding(), errors="replace") as f:
+            return f.read()
+
+    def events(self) -> Iterator[OfxEvent]:
+        """
+        Yields the start, value and end events of the elements of the document in document order.
+
+        SGML elements that hold a value have no end tag, while their XML counterparts do,
+        so both forms produce the same events. Aggregates that are not explicitly closed
+        are closed when an enclosing aggregate is.
+        """
+        stack: List[str] = []
+        # The start tag whose content has not been seen yet: it is either an aggregate or holds a value
+        pending: Optional[str] = None
+        # The last element that held a value, whose XML end tag must be skipped
+        lastValue: Optional[str] = None
+        with open(self._filepath, "r", encoding=self.encoding(), errors="replace") as f:
+            for tag, text in _tags(f, self._readSize):
+                if pending is not None:
+                    if len(text) > 0:
+                        yield OfxEvent("value", pending, text)
+                        lastValue = pending
+                        pending = None
+                    elif tag == "/" + pending:
+                        # Empty XML element
+                        yield OfxEvent("value", pending, "")
+                        pending = None
+                        continue
+                    else:
+                        yield OfxEvent("start", pending)
+                        stack.append(pending)
+                        pending = None
+
+                if tag.startswith("/"):
+                    name = tag[1:]
+                    if name == lastValue:
+                        lastValue = None
+                    elif name in stack:
+                        while len(stack) > 0:
+                            top = stack.pop()
+                            yield OfxEvent("end", top)
+                            if top == name:
+                                break
+                else:
+                    pending = tag
+                    lastValue = None
+
+            if pending is not None:
+                yield OfxEvent("start", pending)
+                stack.append(pending)
+            while len(stack) > 0:
+                yield OfxEvent("end", stack.pop())
+
+class QfxDocument(OfxDocument, extension="qfx"):
+    """
+    Quicken variant of OFX, which only adds elements to the OFX format
+    """
+    def __init__(self, filepath: str):
+        super().__init__(filepath)
+
+def _tags(f: TextIO, readSize: int) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the name of each tag of an OFX document with the text that precedes it since the previous tag.
+    The header, processing instructions and declarations are skipped.
+    """
+    buf = ""
+    pos = 0
+    eof = False
+    text = ""
+    while True:
+        start = buf.find("<", pos)
+        end = buf.find(">", start + 1) if start >= 0 else -1
+        if end < 0:
+            if eof:
+                break
+            # Only keep the unconsumed text when reading the next block
+            block = f.read(readSize)
+            eof = len(block) == 0
+            buf = buf[pos:] + block
+            pos = 0
+            continue
+
+        text = text + buf[pos:start]
+        name = buf[start + 1:end].strip()
+        pos = end + 1
+        if len(name) > 0 and name[0] not in "?!":
+            yield name.split(None, 1)[0].upper(), _unescape(text.strip())
+            text = ""
+
+def _unescape(text: str) -> str:
+    return html.unescape(text) if "&" in text else text
@@ -1,28 +1,146 @@
 import camelot
+from camelot.core import TableList
+from concurrent.futures import ProcessPoolExecutor
+import itertools
+import json
+import math
+import os
+import pandas
+import pdfminer
 from pdfminer.high_level import extract_text
+from pdfminer.layout import LAParams
+from pdfminer.pdfpage import PDFPage
+from typing import Iterable, List
 
 from .document import Document
+from .document_probe import DocumentProbe
 
 class PdfDocument(Document, extension="pdf"):
     """
-    Helper class to wrap high level PDF functionality 
+    Helper class to wrap high level PDF functionality
     such as extracting data or obfuscation
     """
+    # Documents with more pages are processed over a pool of worker processes
+    _parallelPageCount: int = 8
+    _workers: int = None
+
+    # Settings of the pdfminer layout analysis and of camelot. Cached results are keyed 
+    # by the settings and the library versions, so changing either invalidates them.
+    _textSettings: dict = {}
+    _tableSettings: dict = { "flavor": "stream" }
+
     def __init__(self, filepath: str):
         super().__init__(filepath)
-        self._allText = None
-        self._tables = None
+
+    def _createProbe(self, headerBytes: bytes) -> DocumentProbe:
+        # The header bytes of a PDF are not text, so probe the text of the first page
+        return DocumentProbe(self._extension, headerBytes, self.pageText([0]))
+
+    def pageCount(self) -> int:
+        return self._cached("pageCount", self._readPageCount)
+
+    def pageText(self, pages: Iterable[int]) -> str:
+        """
+        Return the text of the given pages, numbered from 0. Only the requested pages are parsed.
+        """
+        return "".join(
+            self._cached("pageText", lambda: _extractPageText(self._filepath, page, self._textSettings), 
+                page=page, **self._textCacheParams())
+            for page in pages)
+
+    def _textCacheParams(self) -> dict:
+        return dict(settings=sorted(self._textSettings.items()), version=pdfminer.__version__)
+
+    def _tableCacheParams(self) -> dict:
+        return dict(settings=sorted(self._tableSettings.items()), version=camelot.__version__)
+
+    def _readPageCount(self) -> int:
+        with open(self._filepath, "rb") as f:
+            return sum(1 for _ in PDFPage.get_pages(f))
+
+    def _readText(self) -> str:
+        pageCount = self.pageCount()
+        if pageCount <= self._parallelPageCount:
+            return self.pageText(range(pageCount))
+
+        with ProcessPoolExecutor(max_workers=self._workers) as executor:
+            texts = list(executor.map(_extractPageText, 
+                itertools.repeat(self._filepath), 
+                range(pageCount), 
+                itertools.repeat(self._textSettings)))
+        for page, text in enumerate(texts):
+            self._cached("pageText", lambda: text, page=page, **self._textCacheParams())
+        return "".join(texts)
 
     def text(self) -> str:
-        if (self._allText is None):
-            self._allText = extract_text(self._filepath)
-        return self._allText
-
-    def tables(self):
-        if self._tables is None:
-            self._tables = camelot.read_pdf(filepath=self._filepath, 
-                pages="all", 
-                flavor="stream",
-                suppress_stdout=True)
-        return self._tables
-    
\ No newline at end of file
+        return self._cached("text", self._readText, **self._textCacheParams())
+
+    def tables(self) -> TableList:
+        # camelot tables hold references to the parsed PDF layout, so only cache them in memory
+        return self._cached("tables", self._readTables, persist=False, **self._tableCacheParams())
+
+    def tableFrames(self) -> List[pandas.DataFrame]:
+        """
+        Return the data of the tables as DataFrames, with the page of each table in its 
+        attrs["page"]. Unlike tables(), the frames are persisted by the document cache, 
+        each as a Parquet file. Requires pyarrow.
+        """
+        tables = self._cached("tableFrames", self._readTableFrames, **self._tableCacheParams())
+        return [_frameFromParquet(data) for data in tables]
+
+    def _readTableFrames(self) -> List[bytes]:
+        return [_frameToParquet(table.df, int(table.page)) for table in self.tables()]
+
+    def _readTables(self) -> TableList:
+        pageCount = self.pageCount()
+        if pageCount <= self._parallelPageCount:
+            return _readTables(self._filepath, "all", self._tableSettings)
+
+        # Split the pages in contiguous ranges, one per worker, and merge the tables in page order
+        workers = self._workers or os.cpu_count() or 1
+        rangeSize = math.ceil(pageCount / workers)
+        pageRanges = [f"{start + 1}-{min(start + rangeSize, pageCount)}" for start in range(0, pageCount, rangeSize)]
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            tableLists = list(executor.map(_readTables, 
+                itertools.repeat(self._filepath), 
+                pageRanges, 
+                itertools.repeat(self._tableSettings)))
+        return TableList([table for tableList in tableLists for table in tableList])
+
+def _extractPageText(filepath: str, page: int, settings: dict) -> str:
+    return extract_text(filepath, page_numbers=[page], laparams=LAParams(**settings))
+
+def _readTables(filepath: str, pages: str, settings: dict) -> TableList:
+    return camelot.read_pdf(filepath=filepath,
+        pages=pages,
+        suppress_stdout=True,
+        **settings)
+
+def _parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Caching PDF tables requires pyarrow, install it with: pip install pyarrow")
+    return pyarrow.parquet
+
+def _frameToParquet(frame: pandas.DataFrame, page: int) -> bytes:
+    """
+    Returns a table as a Parquet file, with its column names, e.g. the column numbers of 
+    camelot tables, and its page in the metadata since Parquet column names are strings
+    """
+    pq = _parquet()
+    import pyarrow
+    table = pyarrow.table({ str(i): frame.iloc[:, i].astype(str).to_numpy() for i in range(frame.shape[1]) })
+    table = table.replace_schema_metadata({ "columns": json.dumps(list(frame.columns)), "page": str(page) })
+    sink = pyarrow.BufferOutputStream()
+    pq.write_table(table, sink, compression="zstd")
+    return sink.getvalue().to_pybytes()
+
+def _frameFromParquet(data: bytes) -> pandas.DataFrame:
+    pq = _parquet()
+    import pyarrow
+    table = pq.read_table(pyarrow.BufferReader(data))
+    frame = table.to_pandas()
+    frame.columns = json.loads(table.schema.metadata[b"columns"])
+    frame.attrs["page"] = int(table.schema.metadata[b"page"])
+    return frame
@@ -1,8 +1,10 @@
 from datetime import datetime
 import os
+import tempfile
 import unittest
+from unittest import mock
 
-from .. import createDocument, Document
+from .. import createDocument, CsvSectionIndex, Document
 
 class TestCsvDocument(unittest.TestCase):
     def setUp(self):
@@ -102,5 +104,94 @@ class TestCsvDocument(unittest.TestCase):
         )
         self.assertIsNone(table1)
 
+    def test_chunked_extraction(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data.csv')
+        doc = createDocument(path)
+        chunks = list(doc.extractTableChunks(
+            tableName="Test Table 3", 
+            firstColumnName="col1", 
+            lastColumnName="col5",
+            tableEndMarker="End Table",
+            chunkSize=2
+        ))
+        self.assertEqual([c.shape for c in chunks], [(2, 2), (1, 2)])
+        self.assertEqual(list(chunks[1]["col5"]), ["6"])
+
+        chunks = list(doc.extractTableChunks(tableName="Test Table 2", firstColumnIndex=0))
+        self.assertEqual(len(chunks), 0)
+
+    def test_section_index(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data.csv')
+        doc = createDocument(path)
+        index = doc.sectionIndex()
+        section = index.find("Test Table 3")
+        self.assertEqual(section.headerRow, ["Test Table 3"])
+        self.assertIsNone(index.find("Test Table 2"))
+        with open(path, "rb") as f:
+            f.seek(section.dataOffset)
+            self.assertEqual(f.readline().strip(), b"col1,col5")
+
+    def test_section_index_rows(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data.csv')
+        index = createDocument(path).sectionIndex()
+        self.assertEqual(index.rowCount, 12)
+        # The first row with a cell containing the text, from the given row
+        self.assertEqual(index.firstRow("Table 3"), 6)
+        self.assertEqual(index.firstRow("End Table"), 4)
+        self.assertEqual(index.firstRow("End Table", 5), 11)
+        self.assertIsNone(index.firstRow("End Table", 12))
+        self.assertIsNone(index.firstRow("Test Table 2"))
+        with open(path, "rb") as f:
+            f.seek(index.rowOffset(7))
+            self.assertEqual(f.readline().strip(), b"col1,col5")
+
+    def test_frequent_end_marker(self):
+        # Rows past the recorded ones of a value are checked for the end marker while reading
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "tables.csv")
+            with open(path, "w") as f:
+                f.write("Table A\ncol1\nEnd\n\nTable B\ncol1\n1\nEnd\n")
+            doc = createDocument(path)
+            with mock.patch.object(CsvSectionIndex, "maxMarkerRows", 1):
+                index = doc.sectionIndex()
+            self.assertEqual(index.firstRow("End", 3), -1)
+            table = doc.extractTable(tableName="Table B", firstColumnIndex=0, lastColumnIndex=0, tableEndMarker="End")
+            self.assertEqual(list(table["col1"]), ["1"])
+
+    def test_table_name_outside_section_header(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data.csv')
+        doc = createDocument(path)
+        table = doc.extractTable(
+            tableName="13", 
+            firstColumnIndex=0, 
+            lastColumnIndex=1,
+            tableEndMarker="End Table"
+        )
+        self.assertEqual(list(table["End Table"]), ["Test Table 3", "col1", "1", "3", "5"])
+
+    def test_table_name_before_section_header(self):
+        # The table name appears in a data row before the section that it starts, where the table is found
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "tables.csv")
+            with open(path, "w") as f:
+                f.write("Summary\ncol1,col2\nTotals,1\nTotals,2\nEnd Table\n\nTotals\ncol1,col3\n3,4\nEnd Table\n")
+            doc = createDocument(path)
+            self.assertEqual(doc.sectionIndex().find("Totals").headerRow, ["Totals"])
+            table = doc.extractTable(tableName="Totals", firstColumnIndex=0, lastColumnIndex=1, tableEndMarker="End Table")
+            self.assertEqual(list(table.columns), ["Totals", "2"])
+            self.assertEqual(table.shape, (0, 2))
+
+    def test_probe(self):
+        path = os.path.join(os.path.dirname(__file__), 'test_data.csv')
+        doc = createDocument(path)
+        probe = doc.probe()
+        self.assertIs(probe, doc.probe())
+        self.assertEqual(probe.extension, "csv")
+        self.assertTrue(probe.headerBytes.startswith(b"Test Table 1"))
+        self.assertEqual(probe.columns, ["Test Table 1"])
+        self.assertEqual(probe.rows[1], ["col1", "col2", "col3", "col4", ""])
+        self.assertTrue(probe.contains("Test Table 3"))
+        self.assertFalse(probe.hasColumns("col1"))
+
 if __name__ == '__main__':
     unittest.main()
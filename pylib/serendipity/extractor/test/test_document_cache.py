@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from .. import createDocument, Document, DocumentCache
+
+class TestDocumentCache(unittest.TestCase):
+    def setUp(self):
+        self._defaultCache = Document.cache()
+
+    def tearDown(self):
+        Document.setCache(self._defaultCache)
+
+    def test_lru_eviction(self):
+        cache = DocumentCache(maxEntries=2)
+        calls = []
+        def compute(v):
+            calls.append(v)
+            return v
+        cache.get("a", lambda: compute(1))
+        cache.get("b", lambda: compute(2))
+        self.assertEqual(cache.get("a", lambda: compute(3)), 1)
+        cache.get("c", lambda: compute(4))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("b", lambda: compute(5)), 5)
+        self.assertEqual(calls, [1, 2, 4, 5])
+
+    def test_persisted_entries(self):
+        with tempfile.TemporaryDirectory() as path:
+            DocumentCache(path=path).get("a", lambda: "value")
+            self.assertEqual(DocumentCache(path=path).get("a", lambda: "other"), "value")
+
+    def test_document_tables_are_memoized(self):
+        Document.setCache(DocumentCache())
+        path = os.path.join(os.path.dirname(__file__), 'test_data.csv')
+        table1 = createDocument(path).extractTable(tableName="Test Table 1", firstColumnIndex=0, lastColumnIndex=3)
+        table1["col1"] = "changed"
+        # The section index and the table
+        self.assertEqual(len(Document.cache()), 2)
+
+        table2 = createDocument(path).extractTable(tableName="Test Table 1", firstColumnIndex=0, lastColumnIndex=3)
+        self.assertEqual(len(Document.cache()), 2)
+        self.assertEqual(list(table2["col1"]), ["1", "11"])
+
+        createDocument(path).extractTable(tableName="Test Table 3", firstColumnIndex=0, lastColumnIndex=1)
+        self.assertEqual(len(Document.cache()), 3)
+
+if __name__ == '__main__':
+    unittest.main()
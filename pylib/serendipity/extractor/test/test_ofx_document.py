@@ -0,0 +1,42 @@
+import os
+import unittest
+
+from .. import createDocument, OfxDocument, QfxDocument
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance")
+
+class TestOfxDocument(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_sgml_events(self):
+        doc = createDocument(os.path.join(dataDir, 'chase_business_checking_transactions.qfx'))
+        self.assertIsInstance(doc, QfxDocument)
+        events = list(doc.events())
+        self.assertEqual(events[0], ("start", "OFX", None))
+        self.assertEqual(events[-1], ("end", "OFX", None))
+        self.assertIn(("value", "TRNAMT", "-1000.00"), events)
+        starts = [e.name for e in events if e.kind == "start"]
+        ends = [e.name for e in events if e.kind == "end"]
+        self.assertEqual(sorted(starts), sorted(ends))
+
+    def test_xml_events(self):
+        doc = createDocument(os.path.join(dataDir, 'capital_one_credit_card_transactions.qfx'))
+        events = list(doc.events())
+        self.assertEqual(events[0], ("start", "OFX", None))
+        self.assertIn(("value", "NAME", "TEST TRANSACTION 1"), events)
+        self.assertNotIn(("start", "NAME", None), events)
+
+    def test_entities(self):
+        doc = createDocument(os.path.join(dataDir, 'merrill_edge_activity_export_all_accounts.qfx'))
+        self.assertIn(("value", "ORG", "Merrill Lynch & Co., Inc."), doc.events())
+
+    def test_read_blocks(self):
+        path = os.path.join(dataDir, 'merrill_edge_activity_export_all_accounts.qfx')
+        doc = OfxDocument(path)
+        events = list(doc.events())
+        doc._readSize = 7
+        self.assertEqual(list(doc.events()), events)
+
+if __name__ == '__main__':
+    unittest.main()
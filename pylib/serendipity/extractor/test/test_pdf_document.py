@@ -0,0 +1,68 @@
+import os
+import pandas
+import tempfile
+import unittest
+from unittest import mock
+
+from .. import createDocument, Document, DocumentCache
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../finance/test/data")
+
+class TestPdfDocument(unittest.TestCase):
+    def setUp(self):
+        self._defaultCache = Document.cache()
+        Document.setCache(DocumentCache())
+
+    def tearDown(self):
+        Document.setCache(self._defaultCache)
+
+    def test_page_text(self):
+        doc = createDocument(os.path.join(dataDir, 'fidelity_brokerage_401k.pdf'))
+        self.assertEqual(doc.pageCount(), 12)
+        text = doc.pageText([0])
+        self.assertTrue("INVESTMENT REPORT" in text)
+        self.assertTrue(text.endswith("\x0c"))
+        self.assertEqual(doc.probe().text, text)
+
+    def test_parallel_text(self):
+        doc = createDocument(os.path.join(dataDir, 'fidelity_brokerage_401k.pdf'))
+        doc._parallelPageCount = 4
+        doc._workers = 2
+        text = doc.text()
+        self.assertEqual(text.count("\x0c"), 12)
+        self.assertEqual(len(text), sum(len(doc.pageText([page])) for page in range(12)))
+
+    def test_persisted_page_text(self):
+        path = os.path.join(dataDir, 'fidelity_brokerage_401k.pdf')
+        with tempfile.TemporaryDirectory() as cachePath:
+            Document.setCache(DocumentCache(path=cachePath))
+            text = createDocument(path).pageText([1])
+
+            Document.setCache(DocumentCache(path=cachePath))
+            with mock.patch("serendipity.extractor.pdf_document._extractPageText", side_effect=AssertionError):
+                self.assertEqual(createDocument(path).pageText([1]), text)
+
+                # Changing the extraction settings invalidates the cached text
+                doc = createDocument(path)
+                doc._textSettings = { "char_margin": 1.0 }
+                with self.assertRaises(AssertionError):
+                    doc.pageText([1])
+
+    def test_persisted_table_frames(self):
+        path = os.path.join(dataDir, 'fidelity_brokerage_401k.pdf')
+        with tempfile.TemporaryDirectory() as cachePath:
+            Document.setCache(DocumentCache(path=cachePath))
+            tables = createDocument(path).tables()
+            frames = createDocument(path).tableFrames()
+            self.assertEqual(len(frames), len(tables))
+
+            # The frames are read back from their Parquet files without parsing the document
+            Document.setCache(DocumentCache(path=cachePath))
+            with mock.patch("serendipity.extractor.pdf_document._readTables", side_effect=AssertionError):
+                persisted = createDocument(path).tableFrames()
+            for table, frame in zip(tables, persisted):
+                pandas.testing.assert_frame_equal(frame, table.df)
+                self.assertEqual(frame.attrs["page"], int(table.page))
+
+if __name__ == '__main__':
+    unittest.main()
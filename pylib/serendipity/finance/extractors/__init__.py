@@ -1,2 +1,4 @@
 from .create_statement_extractor import createCsvStatementExtractor
 from .statement_extractor import CsvStatementExtractor
+from .occ_code_memo import OccCodeMemo
+from .statement_frame import StatementFrame
@@ -5,6 +5,8 @@ from .statement_extractor import CsvStatementExtractor
 from .chase_extractor import ChaseExtractor
 from .fidelity_extractor import FidelityExtractor
 from .merrill_edge_extractor import MerrillEdgeCsvHoldingsExtractor, MerrillEdgeCsvTransactionsExtractor
+from .interactive_brokers_extractor import InteractiveBrokersCsvExtractor
+from .ofx_extractor import OfxExtractor
 
 def createCsvStatementExtractor(filepath: str, name: str = "") -> CsvStatementExtractor:
     doc = createDocument(filepath)
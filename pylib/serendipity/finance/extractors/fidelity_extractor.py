@@ -2,7 +2,7 @@ from datetime import datetime
 import re
 from typing import List
 
-from serendipity.extractor import Document
+from serendipity.extractor import Document, DocumentProbe
 from serendipity.gen.finance.models import Statement
 
 from .statement_extractor import CsvStatementExtractor 
@@ -31,6 +31,5 @@ class FidelityExtractor(CsvStatementExtractor, institutionName="Fidelity"):
         return [ s ]
 
     @classmethod
-    def canProcess(cls, document: Document) -> bool:
-        text:str = document.text()
-        return text.find("Fidelity") >= 0 and text.find("Investment Report")
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        return probe.contains("Fidelity") and probe.contains("INVESTMENT REPORT")
@@ -0,0 +1,318 @@
+from datetime import datetime
+from decimal import Decimal
+import functools
+import re
+from typing import Dict, List, Optional
+
+from ...extractor import Document, DocumentProbe
+from ...gen.finance.models import (
+    AssetValue,
+    BankTransaction,
+    BrokerageHolding,
+    BrokerageRealizedLot,
+    BrokerageTransaction,
+    PriorMtmPosition,
+    Statement
+)
+
+from .statement_extractor import CsvStatementExtractor
+
+class InteractiveBrokers:
+    institutionName = "Interactive Brokers"
+
+    _whitespaceRe: re.Pattern = re.compile(r"\s")
+    _dateFmt: str = "%Y%m%d"
+    _dateTimeFmt: str = "%Y%m%d;%H%M%S"
+
+    @classmethod
+    def symbolToOccCode(cls, symbol: str) -> str:
+        return cls._whitespaceRe.sub("", symbol)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=4096)
+    def isoDate(value: str) -> str:
+        """
+        Converts a date, e.g. 20201102, or a date and time, e.g. 20201102;143920, to an ISO 8601 string.
+        The rows of an export repeat the same few dates, so conversions are memoized.
+        """
+        fmt = InteractiveBrokers._dateTimeFmt if ";" in value else InteractiveBrokers._dateFmt
+        return datetime.strptime(value, fmt).isoformat()
+
+    @staticmethod
+    def money(value: Decimal) -> str:
+        """
+        Formats an amount computed from the amounts of a statement, rounded to the precision of the statements
+        """
+        s = format(value.quantize(Decimal("0.000001")), "f")
+        if "." in s:
+            s = s.rstrip("0").rstrip(".")
+        return f"${s}"
+
+class _Section:
+    """
+    The column indices of a section of a flex query export, and accessors for the values of its rows
+    """
+    code: str
+    columns: Dict[str, int]
+
+    def __init__(self, code: str):
+        self.code = code
+        self.columns = {}
+
+    def has(self, name: str) -> bool:
+        return name in self.columns
+
+    def value(self, row: List[str], *names: str) -> str:
+        """
+        Returns the first non empty value of the given columns, or an empty string
+        """
+        for name in names:
+            i = self.columns.get(name)
+            if i is not None and i < len(row) and len(row[i]) > 0:
+                return row[i]
+        return ""
+
+class _ClosingTrade:
+    """
+    A trade that closes a position, with the rows that follow it to describe the lots it closed
+    and the wash sales it caused
+    """
+    def __init__(self, statement: dict, transaction: BrokerageTransaction, accountNumber: str, symbol: str, quantity: Decimal, amount: Decimal):
+        self.statement = statement
+        self.transaction = transaction
+        self.accountNumber = accountNumber
+        self.symbol = symbol
+        self.quantity = quantity
+        self.amount = amount
+        # (date, price, cost basis, quantity) of each closed lot
+        self.lots = []
+        # [quantity, amount] of each wash sale
+        self.washSales = []
+
+class InteractiveBrokersCsvExtractor(CsvStatementExtractor, institutionName=InteractiveBrokers.institutionName):
+    """
+    Extracts the statements of each account of an Interactive Brokers flex query export.
+
+    The export holds sections of rows identified by a record code, e.g. POST for positions
+    or TRNT for trades, for each account. The export is read in a single pass: each row is
+    dispatched on its record code, and is joined to the statement of its account through an
+    index of the statements by account number. The rows that detail the lots closed by a
+    trade directly follow the trade, so realized lots are built as these rows are read.
+    """
+    cashTransactionMap = {
+        "Dividends": "dividend",
+        "Broker Interest Received": "interest",
+        "Other Fees": "fee"
+    }
+
+    def __init__(self, doc: Document):
+        super().__init__(doc)
+
+    def statements(self) -> List[Statement]:
+        statements: Dict[str, dict] = {}
+        startDate = None
+        endDate = None
+        section: Optional[_Section] = None
+        closing: Optional[_ClosingTrade] = None
+        handlers = {
+            "POST": self._position,
+            "CONF": self._trade,
+            "CTRN": self._cashTransaction,
+            "PPPO": self._priorMtmPosition
+        }
+
+        for row in self._doc.rows():
+            if len(row) == 0:
+                continue
+            code = row[0]
+            if code == "DATA" and section is not None and (section.code == "TRNT" or section.code in handlers):
+                values = row[2:]
+                accountNumber = section.value(values, "ClientAccountID")
+                if len(accountNumber) == 0:
+                    continue
+                statement = statements.get(accountNumber)
+                if statement is None:
+                    statement = statements[accountNumber] = dict(
+                        holdings=[], transactions=[], bankTransactions=[], realizedLots=[], priorMtmPositions=[])
+                if section.code == "TRNT":
+                    closing = self._tradeOrLot(section, values, statement, accountNumber, closing)
+                elif section.code in handlers:
+                    handlers[section.code](section, values, statement)
+            elif code == "BOS":
+                section = _Section(row[1])
+            elif code == "HEADER" and section is not None:
+                section.columns = { name: i for i, name in enumerate(row[2:]) }
+            elif code == "EOS":
+                self._closeTrade(closing)
+                closing = None
+                section = None
+            elif code == "BOF":
+                startDate = InteractiveBrokers.isoDate(row[4])
+                endDate = InteractiveBrokers.isoDate(row[5])
+        self._closeTrade(closing)
+
+        return [
+            Statement(account_number=accountNumber,
+                start_date=startDate,
+                end_date=endDate,
+                institution_name=InteractiveBrokers.institutionName,
+                brokerage_holdings=s["holdings"],
+                brokerage_transactions=s["transactions"],
+                bank_transactions=s["bankTransactions"],
+                brokerage_realized_lots=s["realizedLots"],
+                prior_mtm_positions=s["priorMtmPositions"]
+            )
+            for accountNumber, s in statements.items()
+        ]
+
+    def _position(self, section: _Section, row: List[str], statement: dict):
+        value = "$" + section.value(row, "PositionValue") if section.has("PositionValue") else "$0"
+        statement["holdings"].append(BrokerageHolding(
+            cost_basis="$" + section.value(row, "CostBasisMoney"),
+            quantity=float(section.value(row, "Quantity")),
+            symbol=InteractiveBrokers.symbolToOccCode(section.value(row, "Symbol")),
+            value=AssetValue(start=value, end=value)
+        ))
+
+    def _trade(self, section: _Section, row: List[str], statement: dict) -> BrokerageTransaction:
+        t = self.brokerageTransaction(section, row)
+        statement["transactions"].append(t)
+        return t
+
+    def _tradeOrLot(self, section: _Section, row: List[str], statement: dict, accountNumber: str, closing: Optional[_ClosingTrade]) -> Optional[_ClosingTrade]:
+        """
+        Processes a row of the trades section, which is either a trade or a detail of the trade that precedes it.
+        Returns the trade whose closed lots are being read.
+        """
+        symbol = section.value(row, "Symbol")
+        # Exports without the TransactionType column only hold trades
+        if not section.has("TransactionType") or len(section.value(row, "TransactionType")) > 0:
+            self._closeTrade(closing)
+            t = self._trade(section, row, statement)
+            if "C" not in section.value(row, "Open/CloseIndicator"):
+                return None
+            return _ClosingTrade(statement, t, accountNumber, symbol,
+                Decimal(section.value(row, "Quantity")),
+                Decimal(section.value(row, "NetCash", "Proceeds")))
+
+        if closing is None or closing.accountNumber != accountNumber or closing.symbol != symbol:
+            self._closeTrade(closing)
+            return None
+        hasOpenDateTime = len(section.value(row, "OpenDateTime")) > 0
+        quantity = Decimal(section.value(row, "Quantity"))
+        if hasOpenDateTime and "C" in section.value(row, "Open/CloseIndicator"):
+            closing.lots.append((
+                InteractiveBrokers.isoDate(section.value(row, "OpenDateTime")),
+                "$" + section.value(row, "TradePrice"),
+                Decimal(section.value(row, "CostBasis")),
+                quantity
+            ))
+        elif hasOpenDateTime and len(section.value(row, "WhenRealized")) > 0:
+            closing.washSales.append([quantity, Decimal(section.value(row, "FifoPnlRealized") or "0")])
+        else:
+            self._closeTrade(closing)
+            return None
+        return closing
+
+    def _closeTrade(self, closing: Optional[_ClosingTrade]):
+        """
+        Adds the realized lots of a closing trade once all of its detail rows have been read.
+
+        The export doesn't say which lots a wash sale applies to, so wash sales are applied to the
+        lots in the order they are listed. When a trade closes several lots and causes wash sales,
+        the cost basis of each lot may differ from the one reported by the broker, while their total is the same.
+        """
+        if closing is None or len(closing.lots) == 0:
+            return
+        t = closing.transaction
+        costBases = [lot[2] for lot in closing.lots]
+
+        # Adjust the cost basis of the realized lots, in order, by the wash sales
+        lotIndex = -1
+        remaining = Decimal(0)
+        for washQuantity, washAmount in closing.washSales:
+            while washQuantity > 0:
+                if remaining == 0:
+                    lotIndex = lotIndex + 1
+                    if lotIndex >= len(closing.lots):
+                        raise RuntimeError(f"Not all wash sales processed for {closing.symbol}")
+                    remaining = closing.lots[lotIndex][3]
+                quantity = min(remaining, washQuantity)
+                adjustment = washAmount * quantity / washQuantity
+                washQuantity = washQuantity - quantity
+                washAmount = washAmount - adjustment
+                costBases[lotIndex] = costBases[lotIndex] - adjustment
+                remaining = remaining - quantity
+
+        for (date, price, _, quantity), costBasis in zip(closing.lots, costBases):
+            closing.statement["realizedLots"].append(BrokerageRealizedLot(
+                acquisition_amount=InteractiveBrokers.money(costBasis),
+                acquisition_date=date,
+                acquisition_price=price,
+                description=t.description if t.description is not None else "",
+                liquidation_amount=InteractiveBrokers.money(closing.amount * quantity / -closing.quantity),
+                liquidation_date=t.trade_date,
+                liquidation_price=t.price,
+                quantity=float(quantity),
+                symbol=t.symbol
+            ))
+
+    def _cashTransaction(self, section: _Section, row: List[str], statement: dict):
+        amount = section.value(row, "Amount")
+        cashType = section.value(row, "Type")
+        description = section.value(row, "Description")
+        postedDate = InteractiveBrokers.isoDate(section.value(row, "Date/Time", "DateTime"))
+        statement["bankTransactions"].append(BankTransaction(
+            amount="$" + amount,
+            transaction_type="credit" if Decimal(amount) >= 0 else "debit",
+            description=description,
+            category=cashType,
+            posted_date=postedDate
+        ))
+        if cashType in self.cashTransactionMap:
+            statement["transactions"].append(BrokerageTransaction(
+                amount="$" + amount,
+                commission="$0",
+                description=description,
+                quantity=0.0,
+                settlement_date=InteractiveBrokers.isoDate(section.value(row, "SettleDate", "Date/Time", "DateTime")),
+                price="$0",
+                status="settled",
+                transaction_type=self.cashTransactionMap[cashType],
+                trade_date=postedDate,
+                symbol=section.value(row, "Symbol")
+            ))
+
+    def _priorMtmPosition(self, section: _Section, row: List[str], statement: dict):
+        statement["priorMtmPositions"].append(PriorMtmPosition(
+            date=InteractiveBrokers.isoDate(section.value(row, "Date")),
+            description=section.value(row, "Description"),
+            pnl="$" + section.value(row, "PriorMtmPnl"),
+            symbol=section.value(row, "Symbol")
+        ))
+
+    @classmethod
+    def brokerageTransaction(cls, section: _Section, row: List[str]) -> BrokerageTransaction:
+        realizedPnl = section.value(row, "FifoPnlRealized")
+        mtmPnl = section.value(row, "MtmPnl")
+        quantity = section.value(row, "Quantity")
+        return BrokerageTransaction(
+            amount="$" + section.value(row, "NetCash", "Proceeds"),
+            commission="$" + (section.value(row, "IBCommission", "Commission") or "0"),
+            description=section.value(row, "Description"),
+            quantity=float(quantity),
+            trade_date=InteractiveBrokers.isoDate(section.value(row, "Date/Time", "DateTime", "TradeDate")),
+            settlement_date=InteractiveBrokers.isoDate(section.value(row, "SettleDate", "SettleDateTarget", "TradeDate")),
+            price="$" + section.value(row, "Price", "TradePrice"),
+            symbol=InteractiveBrokers.symbolToOccCode(section.value(row, "Symbol")),
+            status="settled",
+            transaction_type="purchase" if Decimal(quantity) > 0 else "sale",
+            realized_pnl="$" + realizedPnl if len(realizedPnl) > 0 else None,
+            mtm_pnl="$" + mtmPnl if len(mtmPnl) > 0 else None
+        )
+
+    @classmethod
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        return (probe.extension == "csv"
+            and len(probe.rows) > 0 and len(probe.rows[0]) > 0 and probe.rows[0][0] == "BOF"
+            and probe.contains("ClientAccountID"))
@@ -1,17 +1,21 @@
-from datetime import datetime
 import math
+import numpy
 import pandas
 import re
-from typing import Dict, List
+from typing import Dict, Iterator, List, Tuple
 
-from ...extractor import Document
+from ...extractor import Document, DocumentProbe
 from ...gen.finance.models import AssetValue, BrokerageHolding, BrokerageTransaction, Statement
 
+from .occ_code_memo import OccCodeMemo
 from .statement_extractor import CsvStatementExtractor 
+from .statement_frame import StatementFrame
 
 class MerrillEdge:
     institutionName="Merrill Edge"
 
+    _dateFmt: str = "%m/%d/%Y"
+    _occCodeMemo: OccCodeMemo
     _nonOccOptionRegex:re.Match = re.compile("([a-zA-Z]+)#([a-zA-Z])([0-9]{2})([0-9]{2})([a-zA-Z])([0-9]+)")
 
     @classmethod
@@ -32,46 +36,120 @@ class MerrillEdge:
             call = 'P'
         return f"{sec}{year}{month:02}{day}{call}{price:08}"
 
+    @classmethod
+    def symbolsToOccCodes(cls, symbols: pandas.Series) -> pandas.Series:
+        """
+        Vectorized symbolToOccCode for a Series of symbols
+        """
+        m = symbols.str.extract(cls._nonOccOptionRegex)
+        options = m[0].notna()
+        if not options.any():
+            return symbols.copy()
+        m = m[options]
+        ndivide = cls._letterOrdinals(m[4]) - ord('A') + 1
+        price = (numpy.round(m[5].astype(numpy.int64) / numpy.power(10.0, ndivide)) * 1000).astype(numpy.int64)
+        month = cls._letterOrdinals(m[1]) - ord('A') + 1
+        put = month > 12
+        month = numpy.where(put, month - 12, month)
+        codes = (m[0] + m[3]
+            + pandas.Series(month, index=m.index).astype(str).str.zfill(2)
+            + m[2]
+            + pandas.Series(numpy.where(put, "P", "C"), index=m.index)
+            + price.astype(str).str.zfill(8))
+        ret = symbols.copy()
+        ret[options] = codes
+        return ret
+
+    @staticmethod
+    def _letterOrdinals(letters: pandas.Series) -> numpy.ndarray:
+        return numpy.array(letters.tolist(), dtype="U1").view(numpy.int32)
+
+    @classmethod
+    def occCodes(cls, symbols: pandas.Series) -> pandas.Series:
+        """
+        Converts a column of symbols to OCC codes, converting each distinct symbol once
+        """
+        return cls._occCodeMemo.occCodes(symbols)
+
+    @classmethod
+    def isoDates(cls, dates: pandas.Series) -> pandas.Series:
+        """
+        Converts a column of dates in the Merrill Edge format to ISO 8601 strings
+        """
+        return pandas.to_datetime(dates.str.strip(), format=cls._dateFmt).dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    @staticmethod
+    def numbers(values: pandas.Series) -> pandas.Series:
+        """
+        Converts a column of numbers as they are formatted in the exports, e.g. 1,000 or (100), to numbers
+        """
+        values = values.str.strip().str.replace(",", "", regex=False).str.replace(r"^\((.*)\)$", r"-\1", regex=True)
+        return pandas.to_numeric(values, errors="raise")
+
+    @classmethod
+    def accounts(cls, table: pandas.DataFrame, dates: pandas.Series) -> Iterator[Tuple[numpy.ndarray, dict]]:
+        """
+        Yields the rows of each account of an export, with the statement level fields of its statement
+        spanning the dates of its rows
+        """
+        for accountNumber, indices in table.groupby("Account #", sort=False).indices.items():
+            accountDates = dates.iloc[indices]
+            yield indices, dict(account_number=accountNumber,
+                start_date=accountDates.min(),
+                end_date=accountDates.max(),
+                institution_name=cls.institutionName)
+
+    @classmethod
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        return probe.extension == "csv" and (probe.contains(cls.institutionName) or probe.contains("Edge"))
+
+
+MerrillEdge._occCodeMemo = OccCodeMemo(MerrillEdge.symbolsToOccCodes)
 
 class MerrillEdgeCsvHoldingsExtractor(CsvStatementExtractor, institutionName=MerrillEdge.institutionName):
     def __init__(self, doc: Document):
         super().__init__(doc)
 
-    def holdingForRow(self, row: pandas.Series):
-        return BrokerageHolding(
-            cost_basis="$" + row["Cost Basis ($)"],
-            purchase_date=datetime.strptime(row["Acquisition Date"], "%m/%d/%Y").isoformat(),
-            quantity=row["Quantity"],
-            symbol=MerrillEdge.symbolToOccCode(row["Symbol"].strip()),
-            value=AssetValue(start="$" + row["Value ($)"], end="$" + row["Value ($)"])
-        )
-
-    def statementForRow(self, row: pandas.Series):
-        return Statement(account_number=row["Account #"], 
-            start_date=datetime.strptime(row["COB Date"].strip(), "%m/%d/%Y").isoformat(),
-            end_date=datetime.strptime(row["COB Date"].strip(), "%m/%d/%Y").isoformat(),
-            institution_name=MerrillEdge.institutionName,
-            brokerage_holdings=[]
-        )
-    
+    def _columns(self) -> Tuple[pandas.DataFrame, pandas.Series, Dict[str, pandas.Series]]:
+        """
+        Returns the table of the export, the date of each row, and the columns of the holdings
+        formatted as in the model objects, shared by statements() and statementFrames()
+        """
+        table = self._doc.extractSingleTable(dtype=str)
+        values = "$" + table["Value ($)"]
+        return table, MerrillEdge.isoDates(table["COB Date"]), {
+            "cost_basis": "$" + table["Cost Basis ($)"],
+            "purchase_date": MerrillEdge.isoDates(table["Acquisition Date"]),
+            "quantity": MerrillEdge.numbers(table["Quantity"]),
+            "symbol": MerrillEdge.occCodes(table["Symbol"]),
+            "value_start": values,
+            "value_end": values
+        }
+
     def statements(self) -> List[Statement]:
-        d:Dict[str,Statement] = {}
-        table = self._doc.extractSingleTable()
-        for index,row in table.iterrows():
-            accoutNumber = row["Account #"] 
-            if not accoutNumber in d:
-                d[accoutNumber] = self.statementForRow(row)
-            d[accoutNumber].brokerage_holdings.append(self.holdingForRow(row))
-        return list(d.values())
+        table, dates, columns = self._columns()
+        holdings = [
+            BrokerageHolding(
+                cost_basis=costBasis,
+                purchase_date=purchaseDate,
+                quantity=quantity,
+                symbol=symbol,
+                value=AssetValue(start=valueStart, end=valueEnd)
+            )
+            for costBasis, purchaseDate, quantity, symbol, valueStart, valueEnd in zip(*columns.values())
+        ]
+        return [Statement(brokerage_holdings=[holdings[i] for i in indices], **metadata)
+            for indices, metadata in MerrillEdge.accounts(table, dates)]
+
+    def statementFrames(self) -> List[StatementFrame]:
+        table, dates, columns = self._columns()
+        holdings = StatementFrame.fromColumns("brokerage_holdings", columns)
+        return [StatementFrame(metadata, { "brokerage_holdings": holdings.iloc[indices].reset_index(drop=True) })
+            for indices, metadata in MerrillEdge.accounts(table, dates)]
 
     @classmethod
-    def canProcess(cls, document: Document) -> bool:
-        if not document.isCsv:
-            return False
-
-        text:str = document.text()
-        table = document.extractSingleTable()
-        return (text.find(MerrillEdge.institutionName) >= 0 or text.find("Edge")) and ("Short/Long" in table.columns)
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        return MerrillEdge.matchesProbe(probe) and probe.hasColumns("Short/Long")
 
 class MerrillEdgeCsvTransactionsExtractor(CsvStatementExtractor, institutionName=MerrillEdge.institutionName):
     transactionMap = {
@@ -94,50 +172,44 @@ class MerrillEdgeCsvTransactionsExtractor(CsvStatementExtractor, institutionName
     def __init__(self, doc: Document):
         super().__init__(doc)
 
+    def transactionTypes(self, descriptions: pandas.Series) -> pandas.Series:
+        descriptions = descriptions.str.strip()
+        types = descriptions.map(self.transactionMap)
+        unknown = descriptions[types.isna()]
+        if len(unknown) > 0:
+            raise RuntimeError(f"Unknown transaction type {unknown.iat[0]}")
+        return types
+
+    def _columns(self) -> Tuple[pandas.DataFrame, pandas.Series, Dict[str, pandas.Series]]:
+        """
+        Returns the table of the export, the trade date of each row, and the columns of the
+        transactions formatted as in the model objects, shared by statements() and statementFrames()
+        """
+        table = self._doc.extractSingleTable(dtype=str)
+        tradeDates = MerrillEdge.isoDates(table["Trade Date"])
+        return table, tradeDates, {
+            "trade_date": tradeDates,
+            "settlement_date": MerrillEdge.isoDates(table["Settlement Date"]),
+            "status": (table["Pending/Settled"] == "Settled").map({True: "settled", False: "pending"}),
+            "transaction_type": self.transactionTypes(table["Description 1 "]),
+            "quantity": MerrillEdge.numbers(table["Quantity"]),
+            "price": "$" + table["Price ($)"],
+            "amount": "$" + table["Amount ($)"],
+            "symbol": MerrillEdge.occCodes(table["Symbol/CUSIP #"])
+        }
 
-    def transactionForRow(self, row: pandas.Series):
-        return BrokerageTransaction(
-            trade_date=datetime.strptime(row["Trade Date"].strip(), "%m/%d/%Y").isoformat(),
-            settlement_date=datetime.strptime(row["Settlement Date"].strip(), "%m/%d/%Y").isoformat(),
-            status=("settled" if row["Pending/Settled"] == "Settled" else "pending"),
-            transaction_type=self.transactionMap[row["Description 1 "].strip()],
-            quantity=row["Quantity"],
-            price="$" + row["Price ($)"],
-            amount="$" + row["Amount ($)"],
-            symbol=MerrillEdge.symbolToOccCode(row["Symbol/CUSIP #"].strip())
-        )
-
-    def statementForRow(self, row: pandas.Series):
-        d = datetime.strptime(row["Trade Date"].strip(), "%m/%d/%Y").isoformat()
-        return Statement(account_number=row["Account #"], 
-            start_date=d,
-            end_date=d,
-            institution_name=MerrillEdge.institutionName,
-            brokerage_transactions=[]
-        )
-
-    def updateDates(self, s:Statement, t:BrokerageTransaction):
-        s.start_date = min(s.start_date, t.trade_date)
-        s.end_date = min(s.end_date, t.trade_date)
-    
     def statements(self) -> List[Statement]:
-        d:Dict[str,Statement] = {}
-        table = self._doc.extractSingleTable()
-        for index,row in table.iterrows():
-            accoutNumber = row["Account #"] 
-            if not accoutNumber in d:
-                d[accoutNumber] = self.statementForRow(row)
-            t = self.transactionForRow(row)
-            s = d[accoutNumber]
-            s.brokerage_transactions.append(t)
-            self.updateDates(s, t)
-        return list(d.values())
+        table, tradeDates, columns = self._columns()
+        transactions = [BrokerageTransaction(**dict(zip(columns, row))) for row in zip(*columns.values())]
+        return [Statement(brokerage_transactions=[transactions[i] for i in indices], **metadata)
+            for indices, metadata in MerrillEdge.accounts(table, tradeDates)]
 
-    @classmethod
-    def canProcess(cls, document: Document) -> bool:
-        if not document.isCsv:
-            return False
-        text:str = document.text()
-        table = document.extractSingleTable()
-        return (text.find(MerrillEdge.institutionName) >= 0 or text.find("Edge")) and ("Settlement Date" in table.columns)
+    def statementFrames(self) -> List[StatementFrame]:
+        table, tradeDates, columns = self._columns()
+        transactions = StatementFrame.fromColumns("brokerage_transactions", columns)
+        return [StatementFrame(metadata, { "brokerage_transactions": transactions.iloc[indices].reset_index(drop=True) })
+            for indices, metadata in MerrillEdge.accounts(table, tradeDates)]
 
+    @classmethod
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        return MerrillEdge.matchesProbe(probe) and probe.hasColumns("Settlement Date")
@@ -0,0 +1,41 @@
+import pandas
+from typing import Callable, Dict
+
+class OccCodeMemo:
+    """
+    Memo table of broker symbols converted to OCC codes. Statements repeat the same few 
+    symbols many times, so each distinct symbol is converted once, and the table is shared
+    by every extractor that uses the same symbol format.
+    """
+    _convert: Callable[[pandas.Series], pandas.Series]
+    _codes: Dict[str, str]
+    _maxSize: int
+
+    def __init__(self, convert: Callable[[pandas.Series], pandas.Series], maxSize: int = 100000):
+        """
+        convert is the batch conversion of a Series of distinct symbols to OCC codes
+        """
+        self._convert = convert
+        self._codes = {}
+        self._maxSize = maxSize
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def occCodes(self, symbols: pandas.Series) -> pandas.Series:
+        """
+        Returns the OCC codes for a Series of symbols
+        """
+        symbols = symbols.str.strip()
+        unique = symbols.dropna().unique()
+        codes = {s: self._codes[s] for s in unique if s in self._codes}
+        missing = [s for s in unique if s not in codes]
+        if len(missing) > 0:
+            converted = dict(zip(missing, self._convert(pandas.Series(missing, dtype=object))))
+            codes.update(converted)
+            if len(self._codes) + len(converted) > self._maxSize:
+                # Keep the symbols of this batch, which are the likeliest to be seen again
+                self._codes = dict(codes)
+            else:
+                self._codes.update(converted)
+        return symbols.map(codes)
@@ -0,0 +1,184 @@
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional
+
+from ...extractor import Document, DocumentProbe
+from ...gen.finance.models import BankTransaction, BrokerageTransaction, Statement
+
+from .merrill_edge_extractor import MerrillEdge
+from .statement_extractor import CsvStatementExtractor
+
+class OfxExtractor(CsvStatementExtractor, institutionName="OFX"):
+    """
+    Extracts bank, credit card and brokerage transactions from OFX and QFX documents.
+
+    The statements are built from the events of the streaming OFX parser in a single pass
+    over the document. The security list of a brokerage document may follow its transactions,
+    so the symbols of the brokerage transactions are resolved once the document has been read.
+    """
+    # Note: This should be autogenerated in future
+    fidMap = {
+        "1001": "Capital One",
+        "10898": "Chase",
+        "3000": "Wells Fargo",
+        "5959": "Bank of America",
+        "5550": MerrillEdge.institutionName
+    }
+
+    # Aggregates of the statement of an account, and the statement field of their transactions
+    _statementTransactions = {
+        "STMTRS": "bank_transactions",
+        "CCSTMTRS": "credit_card_transactions",
+        "INVSTMTRS": "bank_transactions"
+    }
+    _brokerageTransactions = { "BUYOPT", "SELLOPT", "BUYSTOCK", "SELLSTOCK" }
+    _dateFormats = { 8: "%Y%m%d", 12: "%Y%m%d%H%M", 14: "%Y%m%d%H%M%S" }
+
+    def __init__(self, doc: Document):
+        super().__init__(doc)
+
+    def statements(self) -> List[Statement]:
+        ret = []
+        org = None
+        fid = None
+        path = []
+        statement: Optional[dict] = None
+        record: Optional[dict] = None
+        securities = {}
+        # Brokerage transactions with the id of their security, whose symbol is resolved at the end
+        unresolved = []
+
+        for kind, name, value in self._doc.events():
+            if kind == "start":
+                path.append(name)
+                if name in self._statementTransactions:
+                    statement = dict(kind=name, account_number=None, start_date=None, end_date=None,
+                        hasTransactions=name != "INVSTMTRS", transactions=[], brokerage_transactions=[])
+                elif name == "INVTRANLIST" and statement is not None:
+                    statement["hasTransactions"] = True
+                elif name in ("STMTTRN", "INCOME", "SECINFO") or name in self._brokerageTransactions:
+                    record = {}
+            elif kind == "end":
+                path.pop()
+                if name in self._statementTransactions and statement is not None:
+                    if statement["hasTransactions"]:
+                        ret.append(statement)
+                    statement = None
+                elif record is None or statement is None and name != "SECINFO":
+                    continue
+                elif name == "STMTTRN":
+                    statement["transactions"].append(self.bankTransaction(record))
+                    record = None
+                elif name == "INCOME":
+                    statement["transactions"].append(self.incomeTransaction(record))
+                    record = None
+                elif name in self._brokerageTransactions:
+                    t = self.brokerageTransaction(record, name)
+                    statement["brokerage_transactions"].append(t)
+                    unresolved.append((t, record.get("UNIQUEID"), record.get("UNIQUEIDTYPE")))
+                    record = None
+                elif name == "SECINFO":
+                    securities[record.get("UNIQUEID")] = record.get("TICKER")
+                    record = None
+            elif record is not None:
+                record[name] = value
+            elif statement is not None:
+                parent = path[-1] if len(path) > 0 else None
+                if name == "ACCTID" and parent in ("BANKACCTFROM", "CCACCTFROM", "INVACCTFROM"):
+                    statement["account_number"] = value
+                elif name == "DTSTART" and parent in ("BANKTRANLIST", "INVTRANLIST"):
+                    statement["start_date"] = self.isoDate(value)
+                elif name == "DTEND" and parent in ("BANKTRANLIST", "INVTRANLIST"):
+                    statement["end_date"] = self.isoDate(value)
+            elif name == "ORG" and "FI" in path:
+                org = value
+            elif name == "FID" and "FI" in path:
+                fid = value
+
+        for t, secId, secIdType in unresolved:
+            if secId not in securities:
+                raise RuntimeError(f"Security {secId} not found in the security list")
+            symbol = securities[secId]
+            # Merrill Edge uses custom option symbols, so convert them to OCC codes
+            if secIdType == "CUSTOM" and "#" in symbol:
+                symbol = MerrillEdge.symbolToOccCode(symbol)
+            t.symbol = symbol
+
+        institutionName = self.fidMap.get(fid, org)
+        return [self._statement(s, institutionName) for s in ret]
+
+    def _statement(self, s: dict, institutionName: str) -> Statement:
+        fields = dict(account_number=s["account_number"],
+            institution_name=institutionName,
+            start_date=s["start_date"],
+            end_date=s["end_date"]
+        )
+        fields[self._statementTransactions[s["kind"]]] = s["transactions"]
+        if s["kind"] == "INVSTMTRS":
+            fields["brokerage_transactions"] = sorted(s["brokerage_transactions"], key=lambda t: t.trade_date)
+        return Statement(**fields)
+
+    @classmethod
+    def isoDate(cls, value: str) -> str:
+        """
+        Converts an OFX date, e.g. 20200103110000.000[-5:EST], to an ISO 8601 string in the time zone of the document
+        """
+        value = value.split("[", 1)[0].split(".", 1)[0].strip()
+        if len(value) not in cls._dateFormats:
+            raise RuntimeError(f"Invalid OFX date {value}")
+        return datetime.strptime(value, cls._dateFormats[len(value)]).isoformat()
+
+    @classmethod
+    def bankTransaction(cls, record: dict) -> BankTransaction:
+        description = record.get("NAME", "")
+        memo = record.get("MEMO")
+        # Long descriptions are split between the name and the memo
+        if memo is not None and memo != description:
+            description = description + memo
+        amount = record["TRNAMT"]
+        debit = "DEBIT" in record.get("TRNTYPE", "") or amount.startswith("-")
+        fields = dict(posted_date=cls.isoDate(record["DTPOSTED"]),
+            transaction_type="debit" if debit else "credit",
+            amount="$" + amount,
+            description=description
+        )
+        if "DTUSER" in record:
+            fields["transaction_date"] = cls.isoDate(record["DTUSER"])
+        if "FITID" in record:
+            fields["transaction_id"] = record["FITID"]
+        if "ACCTID" in record:
+            fields["account_to"] = record["ACCTID"]
+        return BankTransaction(**fields)
+
+    @classmethod
+    def incomeTransaction(cls, record: dict) -> BankTransaction:
+        """
+        Converts dividends and interests to a bank transaction
+        """
+        fields = dict(posted_date=cls.isoDate(record["DTTRADE"]),
+            transaction_type="credit",
+            amount="$" + record["TOTAL"],
+            description=record.get("MEMO", "")
+        )
+        if "FITID" in record:
+            fields["transaction_id"] = record["FITID"]
+        return BankTransaction(**fields)
+
+    @classmethod
+    def brokerageTransaction(cls, record: dict, name: str) -> BrokerageTransaction:
+        commission = Decimal(record.get("COMMISSION", "0")) + Decimal(record.get("FEES", "0"))
+        return BrokerageTransaction(trade_date=cls.isoDate(record["DTTRADE"]),
+            settlement_date=cls.isoDate(record["DTSETTLE"]),
+            quantity=float(record["UNITS"]),
+            description=record.get("MEMO", ""),
+            symbol=record.get("UNIQUEID"),
+            amount="$" + record["TOTAL"],
+            price="$" + record["UNITPRICE"],
+            commission=f"${commission}",
+            status="settled",
+            transaction_type="purchase" if name.startswith("BUY") else "sale"
+        )
+
+    @classmethod
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        return probe.extension in ("ofx", "qfx") and (probe.contains("OFXHEADER") or probe.contains("<OFX>"))
@@ -3,9 +3,11 @@ import os
 import re
 from typing import List
 
-from ...extractor import createDocument, Document
+from ...extractor import createDocument, Document, DocumentProbe
 from ...gen.finance.models import Statement
 
+from .statement_frame import StatementFrame
+
 class CsvStatementExtractor:
     """
     Extracts data from financial institution statements
@@ -24,21 +26,27 @@ class CsvStatementExtractor:
         cls._institutionName = institutionName
         cls._subclasses.append(cls)
 
-    def normalizedStatementFileName(self) -> str:
+    @property
+    def document(self) -> Document:
+        return self._doc
+
+    def normalizedStatementFileName(self, statements: List[Statement] = None) -> str:
         """
-        Returns the normalized file name for a statement using its signature
+        Returns the normalized file name for a statement using its signature. 
+        The statements are extracted if they are not given.
         """
-        statements = self.statements()
+        if statements is None:
+            statements = self.statements()
         s = statements[0]
         start_date_str = datetime.fromisoformat(s.start_date).strftime("%Y%m%d")
         end_date_str = datetime.fromisoformat(s.end_date).strftime("%Y%m%d")
         redacted_account_nums = []
-        for sig in sigArray:
+        for sig in statements:
             redacted_account_num = sig.account_number[-4:]
-            redacted_account_num = redacted_account_num.rjust(len(s.account_number) - len(redacted_account_num), 'X')
+            redacted_account_num = redacted_account_num.rjust(len(sig.account_number), 'X')
             redacted_account_nums.append(redacted_account_num)
         redacted_account_nums.sort()
-        return f"{s.institution_name}_{redacted_account_nums.join('_')}_{start_date_str}_{end_date_str}"
+        return f"{s.institution_name}_{'_'.join(redacted_account_nums)}_{start_date_str}_{end_date_str}"
 
     def statement(self) -> Statement:
         return self.statements()[0]
@@ -49,6 +57,13 @@ class CsvStatementExtractor:
         """
         raise NotImplementedError
 
+    def statementFrames(self) -> List[StatementFrame]:
+        """
+        Processes the imported data into a columnar StatementFrame for each account.
+        Extractors that read tables override this to build the frames without creating model objects.
+        """
+        return [StatementFrame.fromStatement(s) for s in self.statements()]
+
     @classmethod
     def institutionName(cls):
         return cls._institutionName
@@ -76,4 +91,12 @@ class CsvStatementExtractor:
         Returns True if this document can be processed by this CsvStatementExtractor,
         False otherwise
         """
-        raise NotImplementedError      
+        return cls.matchesProbe(document.probe())
+
+    @classmethod
+    def matchesProbe(cls, probe: DocumentProbe) -> bool:
+        """
+        Returns True if the probe of a document matches the signature of the 
+        documents processed by this CsvStatementExtractor, False otherwise
+        """
+        raise NotImplementedError
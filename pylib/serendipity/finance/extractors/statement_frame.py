@@ -0,0 +1,219 @@
+import math
+import pandas
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from ...gen.finance import models
+from ...gen.finance.models import (
+    BankTransaction,
+    BrokerageHolding,
+    BrokerageRealizedLot,
+    BrokerageTransaction,
+    PriorMtmPosition,
+    Statement
+)
+
+# (column name, attribute path in the model, kind) for each column of a collection
+ColumnSpec = Tuple[str, Tuple[str, ...], str]
+
+class StatementFrame:
+    """
+    Columnar counterpart of a Statement: the statement level fields, e.g. the account number,
+    plus a typed DataFrame per collection of the statement, e.g. its brokerage transactions.
+
+    Money columns hold the amounts as floats and date columns hold datetimes, so the collections
+    can be processed with vectorized operations. Fields of nested models are flattened into
+    columns named after their path, e.g. the value of a holding becomes value_start and value_end.
+    Model objects are only created when they are asked for, by models() or toStatement().
+    """
+    collections: Dict[str, type] = {
+        "brokerage_holdings": BrokerageHolding,
+        "brokerage_transactions": BrokerageTransaction,
+        "bank_transactions": BankTransaction,
+        "credit_card_transactions": BankTransaction,
+        "brokerage_realized_lots": BrokerageRealizedLot,
+        "prior_mtm_positions": PriorMtmPosition
+    }
+    _columnSpecs: Dict[type, List[ColumnSpec]] = {}
+
+    _metadata: Dict[str, Any]
+    _frames: Dict[str, pandas.DataFrame]
+
+    def __init__(self, metadata: Dict[str, Any], frames: Optional[Dict[str, pandas.DataFrame]] = None):
+        """
+        metadata holds the statement level fields, and frames the typed DataFrame of each collection
+        """
+        self._metadata = dict(metadata)
+        self._frames = dict(frames or {})
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        return self._metadata
+
+    @property
+    def accountNumber(self) -> str:
+        return self._metadata.get("account_number")
+
+    @property
+    def institutionName(self) -> str:
+        return self._metadata.get("institution_name")
+
+    @property
+    def startDate(self) -> str:
+        return self._metadata.get("start_date")
+
+    @property
+    def endDate(self) -> str:
+        return self._metadata.get("end_date")
+
+    def names(self) -> List[str]:
+        """
+        Returns the names of the collections held by the statement
+        """
+        return list(self._frames.keys())
+
+    def frame(self, name: str) -> pandas.DataFrame:
+        """
+        Returns the DataFrame of a collection, e.g. "brokerage_transactions".
+        Collections that the statement doesn't hold are returned as empty DataFrames with typed columns.
+        """
+        if name not in self.collections:
+            raise KeyError(f"Unknown statement collection {name}")
+        if name not in self._frames:
+            return self.emptyFrame(name)
+        return self._frames[name]
+
+    def models(self, name: str) -> Iterator[Any]:
+        """
+        Yields the model objects of a collection one row at a time
+        """
+        modelClass = self.collections[name]
+        specs = self.columnSpecs(modelClass)
+        frame = self.frame(name)
+        columns = [frame[column].tolist() for column, _, _ in specs]
+        for values in zip(*columns):
+            fields = {}
+            for (_, path, kind), value in zip(specs, values):
+                _setPath(fields, path, _modelValue(value, kind))
+            yield _createModel(modelClass, fields)
+
+    def toStatement(self) -> Statement:
+        """
+        Materializes the statement with the model objects of all its collections
+        """
+        fields = dict(self._metadata)
+        for name in self._frames:
+            fields[name] = list(self.models(name))
+        return Statement(**fields)
+
+    @classmethod
+    def fromStatement(cls, statement: Statement) -> "StatementFrame":
+        metadata = {}
+        frames = {}
+        for attr in Statement.openapi_types:
+            value = getattr(statement, attr)
+            if attr in cls.collections:
+                if value is not None:
+                    frames[attr] = cls.fromModels(attr, value)
+            elif value is not None:
+                metadata[attr] = value
+        return cls(metadata, frames)
+
+    @classmethod
+    def fromModels(cls, name: str, items: List[Any]) -> pandas.DataFrame:
+        """
+        Returns the typed DataFrame of a collection from its model objects
+        """
+        specs = cls.columnSpecs(cls.collections[name])
+        columns = {}
+        for column, path, _ in specs:
+            values = []
+            for item in items:
+                for attr in path:
+                    item = getattr(item, attr) if item is not None else None
+                values.append(item)
+            columns[column] = values
+        return cls.fromColumns(name, columns)
+
+    @classmethod
+    def fromColumns(cls, name: str, columns: Dict[str, Any]) -> pandas.DataFrame:
+        """
+        Returns the typed DataFrame of a collection from columns of values formatted as in
+        the model objects, e.g. "$1,234.50" for amounts and ISO 8601 strings for dates.
+        Extractors use this to create a collection straight from the columns of a document.
+        Missing columns are set to null.
+        """
+        specs = cls.columnSpecs(cls.collections[name])
+        length = max((len(v) for v in columns.values()), default=0)
+        data = {}
+        for column, _, kind in specs:
+            values = columns.get(column)
+            if values is None:
+                values = [None] * length
+            data[column] = _typedColumn(pandas.Series(values, dtype=object if len(values) == 0 else None).reset_index(drop=True), kind)
+        return pandas.DataFrame(data)
+
+    @classmethod
+    def emptyFrame(cls, name: str) -> pandas.DataFrame:
+        return cls.fromColumns(name, {})
+
+    @classmethod
+    def columnSpecs(cls, modelClass: type) -> List[ColumnSpec]:
+        """
+        Returns the columns of the DataFrame of a model, computed once per model
+        """
+        specs = cls._columnSpecs.get(modelClass)
+        if specs is None:
+            specs = []
+            for attr, typeName in modelClass.openapi_types.items():
+                nested = getattr(models, typeName, None) if typeName not in _kinds else None
+                if nested is not None and hasattr(nested, "openapi_types") and typeName != "Money":
+                    for nestedAttr, nestedType in nested.openapi_types.items():
+                        specs.append((f"{attr}_{nestedAttr}", (attr, nestedAttr), _kinds.get(nestedType, "str")))
+                else:
+                    specs.append((attr, (attr,), _kinds.get(typeName, "str")))
+            cls._columnSpecs[modelClass] = specs
+        return specs
+
+_kinds = {
+    "Money": "money",
+    "datetime": "date",
+    "date": "date",
+    "float": "number",
+    "int": "number",
+    "str": "str",
+    "bool": "str"
+}
+
+def _typedColumn(values: pandas.Series, kind: str) -> pandas.Series:
+    if kind == "money":
+        if values.dtype == object or pandas.api.types.is_string_dtype(values.dtype):
+            values = values.map(lambda v: v.value if hasattr(v, "value") else v)
+            values = values.astype("string").str.replace(r"[$,\s]", "", regex=True)
+        return pandas.to_numeric(values, errors="coerce").astype("float64")
+    if kind == "number":
+        return pandas.to_numeric(values, errors="coerce").astype("float64")
+    if kind == "date":
+        return pandas.to_datetime(values, format="ISO8601", errors="coerce").astype("datetime64[ns]")
+    return values.astype(object).where(values.notna(), None)
+
+def _modelValue(value: Any, kind: str) -> Any:
+    if value is None or value is pandas.NaT or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if kind == "money":
+        return f"${value!r}"
+    if kind == "date":
+        return value.isoformat()
+    return value
+
+def _setPath(fields: dict, path: Tuple[str, ...], value: Any):
+    if len(path) == 1:
+        fields[path[0]] = value
+    else:
+        fields.setdefault(path[0], {})[path[1]] = value
+
+def _createModel(modelClass: type, fields: dict) -> Any:
+    for attr, value in fields.items():
+        if isinstance(value, dict):
+            nested = any(v is not None for v in value.values())
+            fields[attr] = getattr(models, modelClass.openapi_types[attr])(**value) if nested else None
+    return modelClass(**fields)
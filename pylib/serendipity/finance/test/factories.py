@@ -0,0 +1,9 @@
+from ...gen.finance.models import BrokerageTransaction
+
+def trade(date: str, transactionType: str, quantity: float, amount: str, symbol: str = "AAAA") -> BrokerageTransaction:
+    """
+    Returns a settled transaction of 2020, e.g. trade("01-02", "purchase", 10, "$-100"), priced from its amount
+    """
+    price = abs(float(amount.strip("$")) / quantity) if quantity != 0 else 0
+    return BrokerageTransaction(trade_date=f"2020-{date}T00:00:00", transaction_type=transactionType, quantity=quantity,
+        amount=amount, price=f"${price}", status="settled", symbol=symbol)
@@ -0,0 +1,52 @@
+from datetime import datetime
+import gc
+import unittest
+import weakref
+
+from ...gen.finance import ApiClient
+from ...gen.finance.models import Statement
+
+class TestApiClient(unittest.TestCase):
+    def setUp(self):
+        value = { "start": { "currency_code": "USD", "value": 10 }, "end": { "currency_code": "USD", "value": 12.5 } }
+        self.data = {
+            "account_number": "1111",
+            "institution_name": "Test",
+            "start_date": "2020-01-01T00:00:00",
+            "end_date": "2020-12-31T00:00:00",
+            "brokerage_holdings": [ 
+                { "symbol": "AAAA", "quantity": 10, "purchase_date": "2020-03-02T00:00:00", "value": value },
+                { "symbol": "BBBB", "quantity": 5, "value": value }
+            ]
+        }
+
+    def test_deserialize_data(self):
+        client = ApiClient()
+        statement = client.deserialize_data(self.data, Statement)
+        self.assertIsInstance(statement, Statement)
+        self.assertEqual(statement.account_number, "1111")
+        self.assertEqual(statement.end_date, datetime(2020, 12, 31))
+        self.assertEqual([h.symbol for h in statement.brokerage_holdings], ["AAAA", "BBBB"])
+        self.assertEqual(statement.brokerage_holdings[0].quantity, 10.0)
+        self.assertIsNone(statement.brokerage_holdings[1].purchase_date)
+        self.assertEqual(statement.brokerage_holdings[1].value.end.value, 12.5)
+        self.assertIsNone(statement.bank_transactions)
+
+    def test_deserialize_many(self):
+        client = ApiClient()
+        statements = client.deserialize_many([self.data, self.data], "Statement")
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(statements[1].brokerage_holdings[1].symbol, "BBBB")
+        self.assertEqual(client.deserialize_many([[self.data]], "list[Statement]")[0][0].account_number, "1111")
+    def test_plans_do_not_hold_clients(self):
+        ApiClient._deserialization_plans.clear()
+        client = ApiClient()
+        client.deserialize_data(self.data, Statement)
+        ref = weakref.ref(client)
+        del client
+        gc.collect()
+        self.assertIsNone(ref())
+        self.assertEqual(ApiClient().deserialize_data(self.data, Statement).brokerage_holdings[0].quantity, 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
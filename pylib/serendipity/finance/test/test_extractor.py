@@ -1,7 +1,10 @@
 from ..extractors import createCsvStatementExtractor, CsvStatementExtractor
+from ..extractors.merrill_edge_extractor import MerrillEdgeCsvHoldingsExtractor
 import os
 import unittest
 
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
 class TestImporter(unittest.TestCase):
     def setUp(self):
         pass
@@ -11,5 +14,14 @@ class TestImporter(unittest.TestCase):
         with self.assertRaises(FileNotFoundError):
             i = createCsvStatementExtractor(path)
 
+    def test_detection_from_probe(self):
+        path = os.path.join(dataDir, 'merrill_edge_holdings_export_all_accounts.csv')
+        i = createCsvStatementExtractor(path)
+        self.assertIsInstance(i, MerrillEdgeCsvHoldingsExtractor)
+
+    def test_undetected_file(self):
+        path = os.path.join(dataDir, 'fidelity_open_positions.csv')
+        self.assertIsNone(createCsvStatementExtractor(path))
+
 if __name__ == '__main__':
     unittest.main()
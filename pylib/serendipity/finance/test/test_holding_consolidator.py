@@ -0,0 +1,78 @@
+import io
+import os
+import tempfile
+import unittest
+
+from ...gen.finance.models import AssetValue, BrokerageHolding, Statement
+from ..extractors import createCsvStatementExtractor
+from ..utils.holding_consolidator import HoldingConsolidator
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance")
+
+def holding(symbol: str, purchaseDate: str, value: str) -> BrokerageHolding:
+    return BrokerageHolding(symbol=symbol, purchase_date=purchaseDate, quantity=1.0, cost_basis="$1,000",
+        value=AssetValue(start=value, end=value))
+
+class TestHoldingConsolidator(unittest.TestCase):
+    def setUp(self):
+        self.consolidator = HoldingConsolidator()
+        self.consolidator.addStatements([
+            Statement(account_number="1", institution_name="A", start_date="2020-01-01T00:00:00", end_date="2020-12-31T00:00:00", brokerage_holdings=[
+                holding("BBBB", "2020-03-01T00:00:00", "$1"),
+                holding("AAAA", "2020-05-01T00:00:00", "$2")
+            ]),
+            Statement(account_number="2", institution_name="B", start_date="2020-01-01T00:00:00", end_date="2020-12-31T00:00:00"),
+            Statement(account_number="3", institution_name="B", start_date="2020-01-01T00:00:00", end_date="2020-12-31T00:00:00", brokerage_holdings=[
+                holding("AAAA", "2020-01-01T00:00:00", "$3"),
+                holding("CCCC", "2020-01-01T00:00:00", "$4,000.5")
+            ])
+        ])
+
+    def test_merge(self):
+        holdings = list(self.consolidator.holdings())
+        self.assertEqual([(h.symbol, h.account) for h in holdings], [("AAAA", "3"), ("AAAA", "1"), ("BBBB", "1"), ("CCCC", "3")])
+        self.assertEqual(holdings[0].purchaseDate, "2020/01/01")
+        self.assertEqual(holdings[3].value, "4000.5")
+
+    def test_csv(self):
+        f = io.StringIO()
+        self.consolidator.writeCsv(f)
+        lines = f.getvalue().split("\r\n")
+        self.assertEqual(lines[0], '"Symbol","Account","Institution","Cost Basis","Purchase Date","Quantity","Value"')
+        self.assertEqual(lines[1], '"AAAA","3","B","1000","2020/01/01","1.0","3"')
+        self.assertEqual(len(lines), 6)
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet(self):
+        import pyarrow.parquet
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "holdings.parquet")
+            self.consolidator.writeParquetFile(path, batchSize=3)
+            f = pyarrow.parquet.ParquetFile(path)
+            self.assertEqual(f.metadata.num_row_groups, 2)
+            table = f.read()
+            self.assertEqual(table.column("symbol").to_pylist(), ["AAAA", "AAAA", "BBBB", "CCCC"])
+            self.assertEqual(table.column("value").to_pylist(), [3.0, 2.0, 1.0, 4000.5])
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_parquet_extracted_statements(self):
+        import pyarrow.parquet
+        consolidator = HoldingConsolidator()
+        for name in ["merrill_edge_holdings_export_all_accounts.csv", "interactive_brokers_multi_account_flex_query_export.csv"]:
+            consolidator.addStatements(createCsvStatementExtractor(os.path.join(dataDir, name)).statements())
+        holdings = list(consolidator.holdings())
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "holdings.parquet")
+            consolidator.writeParquetFile(path)
+            table = pyarrow.parquet.read_table(path)
+        self.assertEqual(table.num_rows, len(holdings))
+        self.assertTrue(all(isinstance(h.quantity, (int, float)) for h in holdings))
+        self.assertEqual(table.column("quantity").to_pylist(), [h.quantity for h in holdings])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+from datetime import datetime
+import os
+import unittest
+
+from ...finance.extractors import createCsvStatementExtractor
+from ...finance.extractors.interactive_brokers_extractor import InteractiveBrokersCsvExtractor
+from ...gen.finance.models import BrokerageRealizedLot, BrokerageTransaction
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+testDataDir = os.path.join(os.path.dirname(__file__), "data");
+
+class TestInteractiveBrokers(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_multi_account_export(self):
+        path = os.path.join(dataDir, 'interactive_brokers_multi_account_flex_query_export.csv')
+        i = createCsvStatementExtractor(path)
+        self.assertIsInstance(i, InteractiveBrokersCsvExtractor)
+        statements = i.statements()
+        self.assertEqual([s.account_number for s in statements], ["U0000001", "U0000003", "U0000004", "U0000005"])
+
+        statement = statements[0]
+        self.assertEqual(statement.institution_name, "Interactive Brokers")
+        self.assertEqual(datetime.fromisoformat(statement.start_date), datetime(2020, 1, 2))
+        self.assertEqual(datetime.fromisoformat(statement.end_date), datetime(2020, 12, 18))
+        self.assertEqual(len(statement.brokerage_holdings), 1)
+        self.assertEqual(statement.brokerage_holdings[0].cost_basis, "$2920.6")
+        self.assertEqual(len(statement.bank_transactions), 3)
+        # The trades and the fees of the cash transactions
+        self.assertEqual(len(statement.brokerage_transactions), 8)
+
+        t:BrokerageTransaction = statement.brokerage_transactions[1]
+        self.assertEqual(t.symbol, "AAAA")
+        self.assertEqual(t.transaction_type, "sale")
+        self.assertEqual(t.quantity, -33)
+        self.assertEqual(t.amount, "$4288.901264")
+        self.assertEqual(t.realized_pnl, "$1466.071264")
+        self.assertEqual(datetime.fromisoformat(t.trade_date), datetime(2020, 12, 1, 9, 35, 47))
+        self.assertEqual(datetime.fromisoformat(t.settlement_date), datetime(2020, 12, 3))
+
+    def test_realized_lots(self):
+        path = os.path.join(testDataDir, 'interactive_brokers_closed_lots_flex_query_export.csv')
+        statement = createCsvStatementExtractor(path).statement()
+        self.assertEqual(statement.brokerage_holdings[0].symbol, "AAAA200117C00100000")
+        self.assertEqual(statement.brokerage_holdings[0].value.end, "$250")
+        self.assertEqual(len(statement.brokerage_transactions), 5)
+        self.assertEqual(statement.brokerage_transactions[-1].transaction_type, "dividend")
+        self.assertEqual(len(statement.bank_transactions), 2)
+        self.assertEqual(statement.prior_mtm_positions[0].pnl, "$2")
+
+        lots = statement.brokerage_realized_lots
+        self.assertEqual(len(lots), 2)
+        lot:BrokerageRealizedLot = lots[0]
+        self.assertEqual(lot.quantity, 10)
+        self.assertEqual(datetime.fromisoformat(lot.acquisition_date), datetime(2020, 1, 2, 10))
+        self.assertEqual(lot.acquisition_price, "$100")
+        self.assertEqual(lot.liquidation_amount, "$899.333333")
+        self.assertEqual(lot.liquidation_price, "$90")
+        # The wash sale loss is added to the cost basis of the realized lots in order
+        self.assertEqual(lot.acquisition_amount, "$1041.666667")
+        self.assertEqual(lots[1].acquisition_amount, "$558.333333")
+        self.assertEqual(lots[1].liquidation_amount, "$449.666667")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import tempfile
+import unittest
+
+from ..utils.lot_matcher import LotMatcher
+from .factories import trade
+
+purchases = [
+    trade("01-02", "purchase", 10, "$-100"),
+    trade("01-03", "purchase", 10, "$-300"),
+    trade("01-04", "purchase", 10, "$-200")
+]
+
+class TestLotMatcher(unittest.TestCase):
+    def _sell(self, matcher: LotMatcher, quantity: float = -15, amount: str = "$450"):
+        matcher.process(purchases)
+        return matcher.process([trade("02-01", "sale", quantity, amount)])
+
+    def test_fifo_partial(self):
+        matcher = LotMatcher()
+        lots = self._sell(matcher)
+        self.assertEqual([(l.acquisition_date[5:10], l.quantity, l.acquisition_amount, l.liquidation_amount) for l in lots],
+            [("01-02", 10.0, "$100", "$300"), ("01-03", 5.0, "$150", "$150")])
+        self.assertEqual([(l.lotId, str(l.quantity), str(l.cost)) for l in matcher.openLots()], [("2", "5", "150"), ("3", "10", "200")])
+
+    def test_lifo_and_highest_cost(self):
+        lots = self._sell(LotMatcher(LotMatcher.lifo))
+        self.assertEqual([(l.acquisition_date[5:10], l.quantity) for l in lots], [("01-04", 10.0), ("01-03", 5.0)])
+        lots = self._sell(LotMatcher(LotMatcher.highestCost))
+        self.assertEqual([(l.acquisition_date[5:10], l.quantity, l.acquisition_price) for l in lots],
+            [("01-03", 10.0, "$30"), ("01-04", 5.0, "$20")])
+
+    def test_specific_id(self):
+        matcher = LotMatcher(LotMatcher.specificId, selector=lambda t, lots: [("3", 4)])
+        lots = self._sell(matcher, -6, "$60")
+        self.assertEqual([(l.acquisition_date[5:10], l.quantity) for l in lots], [("01-04", 4.0), ("01-02", 2.0)])
+
+    def test_short_and_options(self):
+        matcher = LotMatcher()
+        lots = matcher.process([
+            trade("01-02", "sale", -2, "$500", "CALL"),
+            trade("01-03", "purchase", 1, "$-100", "CALL"),
+            trade("01-10", "option_expired", 0, "$0", "CALL"),
+            trade("01-10", "option_expired", 1, "$0", "PUT")
+        ])
+        self.assertEqual([(l.quantity, l.acquisition_amount, l.liquidation_amount) for l in lots],
+            [(-1.0, "$-250", "$-100"), (-1.0, "$-250", "$0")])
+        self.assertEqual(matcher.openLots(), [])
+
+        # The quantity sold beyond the position opens a short lot
+        matcher.process([trade("02-01", "purchase", 5, "$-50"), trade("02-02", "sale", -8, "$160")])
+        self.assertEqual([str(l.quantity) for l in matcher.openLots(symbol="AAAA")], ["-3"])
+
+    def test_resume_from_snapshot(self):
+        sales = [trade("02-01", "sale", -15, "$450"), trade("02-02", "sale", -10, "$100")]
+        full = LotMatcher(LotMatcher.highestCost)
+        expected = full.process(purchases + sales)
+
+        matcher = LotMatcher(LotMatcher.highestCost)
+        lots = matcher.process(purchases + sales[:1])
+        with tempfile.TemporaryDirectory() as d:
+            path = os.path.join(d, "lots.json")
+            matcher.saveSnapshot(path)
+            resumed = LotMatcher.loadSnapshot(path)
+        self.assertEqual(resumed.asOf, sales[0].trade_date)
+        lots = lots + resumed.process(sales[1:])
+        self.assertEqual([l.to_dict() for l in lots], [l.to_dict() for l in expected])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import shutil
+import tempfile
+import unittest
+import pandas as pd
+
+from ..utils.market_data import FixtureQuoteProvider, MarketData, QuoteCache
+
+class TestMarketData(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        days = pd.date_range(end=pd.Timestamp.today().normalize(), periods=30, freq="D")
+        self.provider = FixtureQuoteProvider({
+            "AAAA": pd.DataFrame({ "close": [float(i) for i in range(30)] }, index=days),
+            "BBBB": pd.DataFrame({ "close": [1.0] * 29 + [float("nan")] }, index=days)
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_quotes(self):
+        marketData = MarketData(self.provider, windowDays=5)
+        errors = {}
+        quotes = marketData.quotes(["AAAA", "BBBB", "AAAA", " BBBB ", "CCCC"], errors)
+        self.assertEqual(list(quotes), ["AAAA", "BBBB"])
+        self.assertEqual(quotes["AAAA"].price, 29.0)
+        self.assertEqual(quotes["BBBB"].date, (pd.Timestamp.today().normalize() - pd.DateOffset(1)).date().isoformat())
+        self.assertEqual(list(errors), ["CCCC"])
+        self.assertEqual(sorted(r[0] for r in self.provider.requests), ["AAAA", "BBBB", "CCCC"])
+        self.assertTrue(all(end - start == pd.Timedelta(days=5) for _, start, end in self.provider.requests))
+
+        # Cached quotes are not fetched again, but errors are
+        marketData.quotes(["AAAA", "BBBB", "CCCC"])
+        self.assertEqual(len(self.provider.requests), 4)
+
+    def test_disk_cache(self):
+        path = os.path.join(self._dir, "quotes.sqlite3")
+        cache = QuoteCache(path)
+        MarketData(self.provider, cache).quotes(["AAAA"])
+        cache.close()
+
+        cache = QuoteCache(path)
+        self.assertEqual(MarketData(self.provider, cache).quote("AAAA").price, 29.0)
+        self.assertEqual(len(self.provider.requests), 1)
+        cache.close()
+
+        # Expired quotes are fetched again
+        marketData = MarketData(self.provider, QuoteCache(), ttl=-1)
+        marketData.quotes(["AAAA"])
+        marketData.quotes(["AAAA"])
+        self.assertEqual(len(self.provider.requests), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,9 +1,11 @@
 from datetime import datetime
 import os
+import pandas
 import unittest
 
 from ...finance.extractors import createCsvStatementExtractor, CsvStatementExtractor
 from ...finance.extractors.merrill_edge_extractor import MerrillEdge
+from ...finance.extractors.occ_code_memo import OccCodeMemo
 from ...gen.finance.models import Statement, BrokerageHolding, BrokerageTransaction
 
 dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
@@ -27,7 +29,7 @@ class TestMerrillEdge(unittest.TestCase):
 
         h:BrokerageHolding = holdings[0]
         self.assertEqual(h.symbol, "T")
-        self.assertEqual(h.quantity, '300')
+        self.assertEqual(h.quantity, 300)
         self.assertEqual(h.cost_basis, "$8,435.97")
         self.assertEqual(h.value.start, "$8,496.00")
         self.assertEqual(h.value.end, "$8,496.00")
@@ -48,7 +50,7 @@ class TestMerrillEdge(unittest.TestCase):
 
         h:BrokerageHolding = holdings[0]
         self.assertEqual(h.symbol, "T")
-        self.assertEqual(h.quantity, '300')
+        self.assertEqual(h.quantity, 300)
         self.assertEqual(h.cost_basis, "$8,435.97")
         self.assertEqual(h.value.start, "$8,496.00")
         self.assertEqual(h.value.end, "$8,496.00")
@@ -64,7 +66,7 @@ class TestMerrillEdge(unittest.TestCase):
 
         h:BrokerageHolding = holdings[0]
         self.assertEqual(h.symbol, "T")
-        self.assertEqual(h.quantity, '165')
+        self.assertEqual(h.quantity, 165)
         self.assertEqual(h.cost_basis, "$5,011.05")
         self.assertEqual(h.value.start, "$4,672.80")
         self.assertEqual(h.value.end, "$4,672.80")
@@ -80,9 +82,38 @@ class TestMerrillEdge(unittest.TestCase):
         t:BrokerageTransaction = s.brokerage_transactions[0]
         self.assertEqual(datetime.fromisoformat(t.trade_date), datetime(2020, 12, 3))
 
+    def test_exported_quantities(self):
+        path = os.path.join(dataDir, 'merrill_edge_holdings_export_all_accounts.csv')
+        i = createCsvStatementExtractor(path)
+        h:BrokerageHolding = i.statements()[0].brokerage_holdings[0]
+        self.assertEqual((h.symbol, h.quantity), ("XXXX230120C00045000", 2))
+        frame = i.statementFrames()[0].frame("brokerage_holdings")
+        self.assertTrue(pandas.api.types.is_numeric_dtype(frame["quantity"]))
+        self.assertEqual(frame["quantity"].iat[0], 2)
+
+    def test_numbers(self):
+        numbers = MerrillEdge.numbers(pandas.Series(["1,000", " 2.5", "(100)", None]))
+        self.assertEqual(list(numbers[:3]), [1000, 2.5, -100])
+        self.assertTrue(pandas.isna(numbers.iat[3]))
+        with self.assertRaises(ValueError):
+            MerrillEdge.numbers(pandas.Series(["1.0.0"]))
+
     def test_symbol_to_occ_code(self):
        self.assertEqual(MerrillEdge.symbolToOccCode("FSLY#A2023D450000"), "FSLY230120C00045000")
        self.assertEqual(MerrillEdge.symbolToOccCode("TWLO#A2023C130000"), "TWLO230120C00130000")
 
+    def test_symbols_to_occ_codes(self):
+        symbols = pandas.Series(["FSLY#A2023D450000", "T", " TWLO#A2023C130000", "FSLY#A2023D450000", "AAPL#M1523C1250000"])
+        codes = MerrillEdge.occCodes(symbols)
+        self.assertEqual(list(codes), ["FSLY230120C00045000", "T", "TWLO230120C00130000", "FSLY230120C00045000", "AAPL230115P01250000"])
+        self.assertEqual(list(codes), [MerrillEdge.symbolToOccCode(s) for s in symbols])
+
+    def test_occ_code_memo_overflow(self):
+        memo = OccCodeMemo(lambda symbols: symbols.str.lower(), maxSize=2)
+        self.assertEqual(list(memo.occCodes(pandas.Series(["A", "B"]))), ["a", "b"])
+        # Overflowing the memo keeps the symbols of the batch that is converted
+        self.assertEqual(list(memo.occCodes(pandas.Series(["A", "C", "A"]))), ["a", "c", "a"])
+        self.assertEqual(len(memo), 2)
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,68 @@
+from datetime import datetime
+import os
+import unittest
+
+from ...finance.extractors import createCsvStatementExtractor
+from ...finance.extractors.ofx_extractor import OfxExtractor
+from ...gen.finance.models import BankTransaction, BrokerageTransaction
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
+class TestOfx(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_bank_transactions(self):
+        path = os.path.join(dataDir, 'wells_fargo_checking_transactions.qfx')
+        i = createCsvStatementExtractor(path)
+        self.assertIsInstance(i, OfxExtractor)
+        statement = i.statement()
+        self.assertEqual(statement.account_number, "000004444")
+        self.assertEqual(statement.institution_name, "Wells Fargo")
+        self.assertEqual(datetime.fromisoformat(statement.start_date), datetime(2012, 1, 1, 12))
+        self.assertEqual(datetime.fromisoformat(statement.end_date), datetime(2012, 12, 9, 12))
+
+        transactions = statement.bank_transactions
+        self.assertEqual(len(transactions), 2)
+        t:BankTransaction = transactions[0]
+        self.assertEqual(t.amount, "$-121.95")
+        self.assertEqual(t.description, "TEST NAME 1 TEST MEMO 1")
+        self.assertEqual(t.transaction_type, "debit")
+        self.assertEqual(t.transaction_id, "201201061")
+        self.assertEqual(datetime.fromisoformat(t.posted_date), datetime(2012, 1, 6, 12))
+
+    def test_credit_card_transactions(self):
+        path = os.path.join(dataDir, 'capital_one_credit_card_transactions.qfx')
+        statement = createCsvStatementExtractor(path).statement()
+        self.assertEqual(statement.account_number, "1111")
+        self.assertEqual(statement.institution_name, "Capital One")
+        transactions = statement.credit_card_transactions
+        self.assertEqual(len(transactions), 1)
+        self.assertEqual(transactions[0].amount, "$-107.74")
+        self.assertEqual(datetime.fromisoformat(transactions[0].transaction_date), datetime(2015, 12, 20))
+
+    def test_brokerage_transactions(self):
+        path = os.path.join(dataDir, 'merrill_edge_activity_export_all_accounts.qfx')
+        i = createCsvStatementExtractor(path)
+        statements = i.statements()
+        self.assertEqual([s.account_number for s in statements], ["00000003", "00000004"])
+        statement = statements[0]
+        self.assertEqual(statement.institution_name, "Merrill Edge")
+        self.assertEqual(len(statement.bank_transactions), 2)
+
+        transactions = statement.brokerage_transactions
+        self.assertEqual(len(transactions), 4)
+        t:BrokerageTransaction = transactions[0]
+        self.assertEqual(t.symbol, "XXXX200117P00450000")
+        self.assertEqual(t.transaction_type, "purchase")
+        self.assertEqual(t.quantity, 1)
+        self.assertEqual(t.price, "$17.74")
+        self.assertEqual(t.commission, "$0.65")
+        t = transactions[1]
+        self.assertEqual(t.transaction_type, "sale")
+        self.assertEqual(t.commission, "$0.70")
+        self.assertEqual(transactions[2].symbol, "XXXX")
+        self.assertEqual(i.normalizedStatementFileName(statements), "Merrill Edge_XXXX0003_XXXX0004_20200101_20200330")
+
+if __name__ == '__main__':
+    unittest.main()
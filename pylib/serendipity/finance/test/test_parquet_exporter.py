@@ -0,0 +1,69 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ...gen.finance.models import BankTransaction, Statement
+from ...finance.extractors import createCsvStatementExtractor
+from ...finance.utils.parquet_exporter import ParquetExporter
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
+@unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+class TestParquetExporter(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        path = os.path.join(dataDir, 'interactive_brokers_multi_account_flex_query_export.csv')
+        self.statements = createCsvStatementExtractor(path).statements()
+        self.exporter = ParquetExporter(self._dir)
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_export(self):
+        files = self.exporter.export(self.statements)
+        self.assertTrue(all(f.suffix == ".parquet" for f in files))
+        self.assertTrue(any("institution=Interactive%20Brokers" in str(f) for f in files))
+
+        transactions = self.exporter.read("brokerage_transactions")
+        self.assertEqual(len(transactions), sum(len(s.brokerage_transactions) for s in self.statements))
+        self.assertEqual(str(transactions["amount"].dtype), "float64")
+
+        account = self.statements[0]
+        pruned = self.exporter.read("brokerage_transactions", columns=["symbol", "amount"], account=account.account_number)
+        self.assertEqual(list(pruned.columns), ["symbol", "amount"])
+        self.assertEqual(len(pruned), len(account.brokerage_transactions))
+
+        # Exporting the same statements again replaces their files
+        self.assertEqual(sorted(self.exporter.export(self.statements)), sorted(files))
+        self.assertEqual(len(self.exporter.read("brokerage_transactions")), len(transactions))
+
+    def test_holdings_partitioned_by_statement_year(self):
+        self.exporter.export(self.statements)
+        holdings = self.exporter.read("brokerage_holdings", year=2020)
+        self.assertEqual(len(holdings), sum(len(s.brokerage_holdings) for s in self.statements))
+        self.assertEqual(len(self.exporter.read("brokerage_holdings", year=2019)), 0)
+        self.assertEqual(len(self.exporter.read("brokerage_realized_lots")), 0)
+
+    def test_null_columns_and_reexport(self):
+        def statement(account: str, memo: str, dates):
+            return Statement(start_date="2020-01-01T00:00:00", end_date="2021-12-31T00:00:00", institution_name="Bank",
+                account_number=account, bank_transactions=[BankTransaction(amount="$-10", description="Coffee", memo=memo,
+                    posted_date=f"{d}T00:00:00", transaction_type="debit") for d in dates])
+        # The memo column is null throughout the first statement and filled in the second
+        self.exporter.export([statement("1", None, ["2020-02-01"]), statement("2", "Cafe", ["2020-03-01"])])
+        transactions = self.exporter.read("bank_transactions").sort_values("account")
+        self.assertEqual(list(transactions["memo"].fillna("")), ["", "Cafe"])
+
+        # Re-exporting a statement whose transactions moved to another year drops the files of the previous year
+        self.exporter.export([statement("1", None, ["2021-02-01"])])
+        transactions = self.exporter.read("bank_transactions", account="1")
+        self.assertEqual(list(transactions["year"]), [2021])
+
+if __name__ == '__main__':
+    unittest.main()
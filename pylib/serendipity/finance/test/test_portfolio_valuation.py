@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from ...gen.finance.models import AssetValue, BrokerageHolding, Statement
+from ..utils.market_data import FixtureQuoteProvider, MarketData, QuoteCache
+from ..utils.portfolio_valuation import PortfolioValuation, ValuationCheckpoint
+from ..utils.price_history_store import PriceHistoryStore
+from .factories import trade
+
+def statement(account: str, transactions, holdings = None, end: str = "2020-01-31") -> Statement:
+    return Statement(start_date="2020-01-01T00:00:00", end_date=f"{end}T00:00:00", institution_name="Broker",
+        account_number=account, brokerage_transactions=transactions, brokerage_holdings=holdings or [])
+
+class TestPortfolioValuation(unittest.TestCase):
+    def setUp(self):
+        days = pd.date_range("2019-12-01", "2020-03-31", freq="B")
+        self.provider = FixtureQuoteProvider({
+            # Closes at 10 plus the number of business days since December 1st
+            "AAAA": pd.DataFrame({ "close": 10 + np.arange(len(days), dtype="float64") }, index=days),
+            "BBBB": pd.DataFrame({ "close": np.full(len(days), 50.0) }, index=days),
+            "AAAA200117C00010000": pd.DataFrame({ "close": np.full(len(days), 2.5) }, index=days)
+        })
+        self.valuation = PortfolioValuation(MarketData(self.provider, QuoteCache(), PriceHistoryStore()))
+        self.statements = [
+            statement("1", [
+                trade("01-06", "purchase", 10, "$-200"),
+                trade("01-08", "purchase", 10, "$-300"),
+                trade("01-08", "dividend", 0, "$5"),
+                trade("01-10", "sale", -5, "$150")
+            ]),
+            statement("2", [trade("01-15", "sale", -20, "$600", "BBBB")],
+                [BrokerageHolding(symbol="BBBB", quantity=100, cost_basis="$4000",
+                    value=AssetValue(start="$4000", end="$5000"))], end="2020-01-10")
+        ]
+
+    def _row(self, series: pd.DataFrame, date: str, account: str, symbol: str):
+        rows = series[(series["date"] == pd.Timestamp(date)) & (series["account"] == account) & (series["symbol"] == symbol)]
+        self.assertEqual(len(rows), 1)
+        return rows.iloc[0]
+
+    def test_series(self):
+        series = self.valuation.value(self.statements, "2020-01-01", "2020-01-20").series
+        self.assertEqual(series["date"].min(), pd.Timestamp("2020-01-06"))
+        self.assertEqual(len(series[series["account"] == "1"]), 15)
+
+        row = self._row(series, "2020-01-09", "1", "AAAA")
+        self.assertEqual((row["quantity"], row["cost_basis"]), (20.0, 500.0))
+        # 2020-01-09 is the 29th business day
+        self.assertEqual(row["price"], 38.0)
+        self.assertEqual(row["pnl"], 20 * 38.0 - 500)
+
+        # Prices of week ends are those of the previous Friday, and the sale reduces the net cost
+        row = self._row(series, "2020-01-12", "1", "AAAA")
+        self.assertEqual((row["quantity"], row["cost_basis"], row["price"]), (15.0, 350.0, 39.0))
+
+        # The holdings anchor the position at the end of their statement, and the short sale follows
+        self.assertEqual(len(series[series["account"] == "2"]), 11)
+        row = self._row(series, "2020-01-15", "2", "BBBB")
+        self.assertEqual((row["quantity"], row["cost_basis"], row["market_value"]), (80.0, 3400.0, 4000.0))
+
+    def test_closed_positions(self):
+        statements = [statement("1", [trade("01-06", "purchase", 10, "$-200"), trade("01-08", "sale", -10, "$300")])]
+        series = self.valuation.value(statements, "2020-01-01", "2020-01-10").series
+        self.assertEqual(list(series["date"].dt.day), [6, 7])
+        series = self.valuation.value(statements, "2020-01-01", "2020-01-10", includeClosed=True).series
+        self.assertEqual(list(series["pnl"]), [150.0, 160.0, 100.0, 100.0, 100.0])
+
+    def test_holdings_only(self):
+        statements = [statement("2", [], self.statements[1].brokerage_holdings, end="2020-01-10")]
+        series = self.valuation.value(statements, end="2020-01-15").series
+        self.assertEqual(list(series["date"].dt.day), [10, 11, 12, 13, 14, 15])
+        self.assertTrue((series["quantity"] == 100).all())
+
+    def test_option_multiplier(self):
+        statements = [statement("1", [trade("01-06", "sale", -2, "$400", "AAAA200117C00010000")])]
+        row = self._row(self.valuation.value(statements, "2020-01-06", "2020-01-06").series, "2020-01-06", "1", "AAAA200117C00010000")
+        # Each contract is for 100 shares, sold at 2 and valued at 2.5
+        self.assertEqual((row["market_value"], row["pnl"]), (-500.0, -100.0))
+
+    def test_resume_from_checkpoint(self):
+        full = self.valuation.value(self.statements, "2020-01-01", "2020-01-31")
+        first = self.valuation.value(self.statements, "2020-01-01", "2020-01-12")
+        with tempfile.TemporaryDirectory() as dir:
+            path = os.path.join(dir, "checkpoint.json")
+            first.checkpoint.save(path)
+            checkpoint = ValuationCheckpoint.load(path)
+        self.assertEqual(checkpoint.date, pd.Timestamp("2020-01-12"))
+        self.assertEqual(len(checkpoint.positions), 2)
+
+        rest = self.valuation.value(self.statements, end="2020-01-31", checkpoint=checkpoint)
+        self.assertEqual(rest.series["date"].min(), pd.Timestamp("2020-01-13"))
+        order = ["date", "account", "symbol"]
+        resumed = pd.concat([first.series, rest.series]).sort_values(order).reset_index(drop=True)
+        pd.testing.assert_frame_equal(resumed, full.series.sort_values(order).reset_index(drop=True))
+        pd.testing.assert_frame_equal(rest.checkpoint.positions.sort_values("account").reset_index(drop=True),
+            full.checkpoint.positions.sort_values("account").reset_index(drop=True))
+
+if __name__ == '__main__':
+    unittest.main()
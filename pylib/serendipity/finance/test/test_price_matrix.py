@@ -0,0 +1,68 @@
+import shutil
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from ..utils.market_data import FixtureQuoteProvider, MarketData, QuoteCache
+from ..utils.price_history_store import PriceHistoryStore
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+class TestPriceMatrix(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        days = pd.date_range("2020-01-01", "2020-03-31", freq="B")
+        self.provider = FixtureQuoteProvider({
+            "AAAA": pd.DataFrame({ "close": np.arange(len(days), dtype="float64") }, index=days),
+            # Only closes on Mondays
+            "BBBB": pd.DataFrame({ "close": np.arange(len(days), dtype="float64") * 10 }, index=days)[days.dayofweek == 0]
+        })
+
+    def tearDown(self):
+        shutil.rmtree(self._dir)
+
+    def test_matrix(self):
+        marketData = MarketData(self.provider, QuoteCache(), PriceHistoryStore(), windowDays=7)
+        errors = {}
+        matrix = marketData.priceMatrix(["AAAA", "BBBB", "AAAA", "CCCC"], "2020-02-01", "2020-03-01", errors=errors)
+        self.assertEqual(list(matrix.columns), ["AAAA", "BBBB"])
+        self.assertEqual(list(errors), ["CCCC"])
+        self.assertEqual(matrix.index[0], pd.Timestamp("2020-02-03"))
+        self.assertEqual(matrix.index[-1], pd.Timestamp("2020-02-28"))
+        # BBBB closed on Monday 2020-02-03 and is carried forward over the week
+        self.assertEqual(list(matrix.loc["2020-02-03":"2020-02-07", "BBBB"]), [230.0] * 5)
+
+        prices = MarketData.pricesAsOf(matrix, ["2020-01-15", "2020-02-09", "2020-12-31"])
+        self.assertTrue(prices.iloc[0].isna().all())
+        self.assertEqual(list(prices.iloc[1]), [27.0, 230.0])
+        self.assertEqual(list(prices.iloc[2]), list(matrix.iloc[-1]))
+
+        # Only the days that weren't fetched yet are fetched
+        count = len(self.provider.requests)
+        marketData.priceMatrix(["AAAA", "BBBB"], "2020-02-10", "2020-02-20")
+        self.assertEqual(len(self.provider.requests), count)
+        marketData.priceMatrix(["AAAA"], "2020-02-10", "2020-03-10")
+        self.assertEqual(self.provider.requests[-1][0:3], ("AAAA", pd.Timestamp("2020-03-01"), pd.Timestamp("2020-03-10")))
+
+    def test_last_valid_element(self):
+        self.assertEqual(MarketData.getLastValidElement(pd.Series([1.0, 2.0, np.nan])), 2.0)
+        self.assertIsNone(MarketData.getLastValidElement(pd.Series([np.nan])))
+
+    @unittest.skipIf(pyarrow is None, "pyarrow is not installed")
+    def test_store_on_disk(self):
+        store = PriceHistoryStore(self._dir)
+        MarketData(self.provider, QuoteCache(), store).priceMatrix(["AAAA"], "2020-02-01", "2020-03-01")
+        count = len(self.provider.requests)
+
+        store = PriceHistoryStore(self._dir)
+        self.assertEqual(store.fetchedRange("AAAA"), (pd.Timestamp("2020-01-22"), pd.Timestamp("2020-03-01")))
+        matrix = MarketData(self.provider, QuoteCache(), store).priceMatrix(["AAAA"], "2020-02-01", "2020-03-01")
+        self.assertEqual(len(self.provider.requests), count)
+        self.assertEqual(matrix["AAAA"].iloc[0], 23.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import pandas as pd
+
+from ..utils.market_data import FixtureQuoteProvider, MarketData, QuoteCache
+from ..utils.price_sheet import CellUpdate, MemorySheetBackend, PriceSheetUpdater
+
+class TestPriceSheet(unittest.TestCase):
+    def setUp(self):
+        days = pd.date_range(end=pd.Timestamp.today().normalize(), periods=5, freq="D")
+        self.provider = FixtureQuoteProvider({
+            "AAAA": pd.DataFrame({ "close": [10.0, 11.0, 12.0, 13.0, 14.0] }, index=days),
+            "BBBB": pd.DataFrame({ "close": [2.0] * 5 }, index=days)
+        })
+        self.marketData = MarketData(self.provider, QuoteCache())
+
+    def test_update(self):
+        backend = MemorySheetBackend([
+            ["Account", "Security", "Quantity", "Current Price"],
+            ["1", "AAAA", 10, 1.0],
+            ["1", "BBBB", 5, "$2.00"],
+            ["2", "AAAA", 3, ""],
+            ["2", "", 0, ""],
+            ["2", "CCCC", 1, 7.5]
+        ])
+        errors = {}
+        updates = PriceSheetUpdater(backend, self.marketData, batchSize=1).update(errors)
+        self.assertEqual(updates, [CellUpdate(2, 4, 14.0), CellUpdate(4, 4, 14.0)])
+        self.assertEqual(len(backend.requests), 2)
+        self.assertEqual([row[3] for row in backend.rows[1:]], [14.0, "$2.00", 14.0, "", 7.5])
+        self.assertEqual(list(errors), ["CCCC"])
+        self.assertEqual(sorted(r[0] for r in self.provider.requests), ["AAAA", "BBBB", "CCCC"])
+
+        # Nothing changed, so nothing is written
+        self.assertEqual(PriceSheetUpdater(backend, self.marketData).update(), [])
+        self.assertEqual(len(backend.requests), 2)
+
+    def test_missing_column(self):
+        backend = MemorySheetBackend([["Security", "Price"], ["AAAA", 1]])
+        with self.assertRaises(RuntimeError):
+            PriceSheetUpdater(backend, self.marketData).update()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+from datetime import datetime
+import os
+import unittest
+
+from ...finance.extractors import createCsvStatementExtractor, StatementFrame
+from ...gen.finance.models import AssetValue, BrokerageHolding, Statement
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
+class TestStatementFrame(unittest.TestCase):
+    def setUp(self):
+        pass
+
+    def test_round_trip(self):
+        statement = Statement(account_number="1111", 
+            institution_name="Test", 
+            start_date="2020-01-01T00:00:00", 
+            end_date="2020-12-31T00:00:00",
+            brokerage_holdings=[
+                BrokerageHolding(cost_basis="$1,000.50", purchase_date="2020-03-02T00:00:00", quantity=10, symbol="AAAA", 
+                    value=AssetValue(start="$900", end="$1,100.25")),
+                BrokerageHolding(quantity=5, symbol="BBBB", value=AssetValue(start="$10", end="$20"))
+            ])
+        frame = StatementFrame.fromStatement(statement)
+        self.assertEqual(frame.accountNumber, "1111")
+        self.assertEqual(frame.names(), ["brokerage_holdings"])
+
+        holdings = frame.frame("brokerage_holdings")
+        self.assertEqual(list(holdings.columns), ["cost_basis", "purchase_date", "quantity", "symbol", "value_start", "value_end"])
+        self.assertEqual(holdings["cost_basis"].iat[0], 1000.5)
+        self.assertEqual(holdings["value_end"].sum(), 1120.25)
+        self.assertEqual(holdings["purchase_date"].iat[0], datetime(2020, 3, 2))
+        self.assertTrue(holdings["cost_basis"].isna().iat[1])
+
+        h = frame.toStatement().brokerage_holdings[0]
+        self.assertEqual(h.cost_basis, "$1000.5")
+        self.assertEqual(h.purchase_date, "2020-03-02T00:00:00")
+        self.assertEqual(h.value.end, "$1100.25")
+        self.assertIsNone(list(frame.models("brokerage_holdings"))[1].cost_basis)
+
+    def test_empty_collection(self):
+        frame = StatementFrame({ "account_number": "1111" })
+        transactions = frame.frame("brokerage_transactions")
+        self.assertEqual(len(transactions), 0)
+        self.assertEqual(str(transactions["amount"].dtype), "float64")
+        self.assertEqual(str(transactions["trade_date"].dtype), "datetime64[ns]")
+
+    def test_extracted_frames(self):
+        path = os.path.join(dataDir, 'merrill_edge_holdings_export_all_accounts.csv')
+        i = createCsvStatementExtractor(path)
+        frames = i.statementFrames()
+        statements = i.statements()
+        self.assertEqual([f.accountNumber for f in frames], [s.account_number for s in statements])
+        for f, s in zip(frames, statements):
+            self.assertEqual(f.startDate, s.start_date)
+            expected = StatementFrame.fromStatement(s).frame("brokerage_holdings")
+            self.assertTrue(f.frame("brokerage_holdings").equals(expected))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from ...finance.extractors import createCsvStatementExtractor
+from ...finance.utils.statement_index import StatementIndex
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
+class TestStatementIndex(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self.index = StatementIndex(os.path.join(self._dir, "index.sqlite3"))
+        path = os.path.join(dataDir, 'interactive_brokers_multi_account_flex_query_export.csv')
+        self.statements = createCsvStatementExtractor(path).statements()
+        self.index.add(StatementIndex.entries(self.statements, "hash"))
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self._dir)
+
+    def test_symbol_queries(self):
+        transactions = self.index.transactions(symbol="BBBB", start="2020-12-01", end="2021-01-01")
+        self.assertEqual([t.account for t in transactions], 
+            ["U0000001", "U0000003", "U0000004", "U0000001", "U0000003", "U0000004", "U0000005", "U0000005"])
+        self.assertEqual([t.date[:10] for t in transactions[:3]], ["2020-12-03"] * 3)
+        self.assertEqual(transactions[0].amount, 4186.065321764)
+        self.assertEqual(len(self.index.transactions(symbol="BBBB", account="U0000005", end="2020-12-16")), 1)
+
+        bank = self.index.transactions(account="U0000001", kind="bank")
+        self.assertEqual(len(bank), 3)
+        self.assertTrue(all(t.symbol is None for t in bank))
+
+        holdings = self.index.holdings(account="U0000001")
+        self.assertEqual(len(holdings), len(self.statements[0].brokerage_holdings))
+
+    def test_reindex_replaces_statements(self):
+        count = len(self.index.transactions())
+        self.index.add(StatementIndex.entries(self.statements, "hash"))
+        self.assertEqual(len(self.index.transactions()), count)
+        self.assertEqual(len(self.index.statements()), 4)
+        self.index.remove("hash")
+        self.assertEqual(len(self.index.transactions()), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import pathlib
+import shutil
+import tempfile
+import unittest
+
+from ...extractor import Document, DocumentCache
+from ..utils.blob_store import BlobStore
+from ..utils.statement_organizer import StatementOrganizer
+from ...gen.serendipity_config.models import SerendipityConfig, Finance
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
+class TestStatementOrganizer(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.mkdtemp()
+        self._inputDir = os.path.join(self._dir, "input")
+        os.mkdir(self._inputDir)
+        for name in ["merrill_edge_holdings_export_all_accounts.csv", "fidelity_open_positions.csv"]:
+            shutil.copy(os.path.join(dataDir, name), self._inputDir)
+        config = SerendipityConfig(finance=Finance(document_path=os.path.join(self._dir, "output")))
+        self._defaultCache = Document.cache()
+        self._cache = DocumentCache(path=StatementOrganizer.cachePath(config))
+        Document.setCache(self._cache)
+        self._organizer = StatementOrganizer(config)
+
+    def tearDown(self):
+        Document.setCache(self._defaultCache)
+        self._organizer.manifest.close()
+        self._organizer.index.close()
+        shutil.rmtree(self._dir)
+
+    def test_find_files(self):
+        files = StatementOrganizer.findFiles([self._inputDir, os.path.join(self._inputDir, "*.csv")])
+        self.assertEqual([os.path.basename(f) for f in files], 
+            ["fidelity_open_positions.csv", "merrill_edge_holdings_export_all_accounts.csv"])
+
+    def test_organize_files_collects_errors(self):
+        files = StatementOrganizer.findFiles([self._inputDir])
+        calls = []
+        errors = self._organizer.organizeFiles(files, workers=2, progress=lambda *args: calls.append(args))
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(list(errors), [os.path.join(self._inputDir, "fidelity_open_positions.csv")])
+        organized = list((pathlib.Path(self._dir) / "output" / "finance" / "statements" / "2020").iterdir())
+        self.assertEqual(len(organized), 1)
+        # The organizer uses the document cache it is given rather than replacing it
+        self.assertIs(Document.cache(), self._cache)
+
+    def test_imported_files_are_skipped(self):
+        path = os.path.join(self._inputDir, "merrill_edge_holdings_export_all_accounts.csv")
+        self.assertTrue(self._organizer.importFile(path))
+        self.assertFalse(self._organizer.importFile(path))
+
+        # The same content under another name is recognized by its hash
+        copy = os.path.join(self._inputDir, "copy.csv")
+        shutil.copy(path, copy)
+        self.assertTrue(self._organizer.isImported(copy))
+        stat = os.stat(copy)
+        record = self._organizer.manifest.lookup(copy, stat.st_size, stat.st_mtime_ns)
+        self.assertEqual(record.extractor, "MerrillEdgeCsvHoldingsExtractor")
+
+        with open(copy, "a") as f:
+            f.write("\n")
+        self.assertFalse(self._organizer.isImported(copy))
+
+    def test_organize_files_skips_imported_content(self):
+        path = os.path.join(self._inputDir, "merrill_edge_holdings_export_all_accounts.csv")
+        self.assertTrue(self._organizer.importFile(path))
+        copies = [os.path.join(self._inputDir, name) for name in ["copy1.csv", "copy2.csv"]]
+        for copy in copies:
+            shutil.copy(path, copy)
+        # The copies are hashed and recognized by the workers, and recorded by the parent
+        skipped = set()
+        errors = self._organizer.organizeFiles([path] + copies, workers=2, skipped=skipped)
+        self.assertEqual(errors, {})
+        self.assertEqual(skipped, set([path] + copies))
+        self.assertTrue(all(self._organizer.isImported(copy) for copy in copies))
+
+    def test_imported_files_are_indexed(self):
+        files = StatementOrganizer.findFiles([self._inputDir])
+        self._organizer.organizeFiles(files, workers=2)
+        statements = self._organizer.index.statements()
+        self.assertTrue(len(statements) > 0)
+        self.assertTrue(all(s.institution == "Merrill Edge" for s in statements))
+        holdings = self._organizer.index.holdings(account=statements[0].account)
+        self.assertTrue(len(holdings) > 0)
+        self.assertTrue(all(h.endDate == statements[0].endDate for h in holdings))
+
+    def test_blob_store_deduplicates(self):
+        store = BlobStore(os.path.join(self._dir, "blobs"))
+        path = os.path.join(self._inputDir, "fidelity_open_positions.csv")
+        blob = store.put(path)
+        self.assertEqual(store.put(path), blob)
+        destinations = [os.path.join(self._dir, "linked", name) for name in ["a.csv", "b.csv"]]
+        for destination in destinations:
+            store.link(blob.name, destination)
+            store.link(blob.name, destination)
+        self.assertEqual(os.stat(blob).st_nlink, 3)
+        with open(destinations[1], "rb") as f, open(path, "rb") as original:
+            self.assertEqual(f.read(), original.read())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import io
+import os
+import unittest
+
+from ...finance.extractors import createCsvStatementExtractor
+from ...finance.utils.statement_stream import StatementReader, StatementWriter
+
+dataDir = os.path.join(os.path.dirname(__file__), "../../../../test_data/finance");
+
+class TestStatementStream(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(dataDir, 'interactive_brokers_multi_account_flex_query_export.csv')
+        self.statements = createCsvStatementExtractor(path).statements()
+
+    def _roundTrip(self, format: str):
+        f = io.StringIO()
+        with StatementWriter(f, format) as writer:
+            writer.writeAll(self.statements)
+        self.assertEqual(writer.count, len(self.statements))
+        f.seek(0)
+        return f
+
+    def test_ndjson(self):
+        f = self._roundTrip("ndjson")
+        lines = f.getvalue().splitlines()
+        self.assertEqual(len(lines), len(self.statements) + sum(
+            len(s.brokerage_holdings) + len(s.brokerage_transactions) + len(s.bank_transactions) for s in self.statements))
+        statements = list(StatementReader(f).statements())
+        self.assertEqual([s.to_dict() for s in statements], [s.to_dict() for s in self.statements])
+
+    def test_json(self):
+        f = self._roundTrip("json")
+        statements = list(StatementReader(f).statements())
+        self.assertEqual([s.to_dict() for s in statements], [s.to_dict() for s in self.statements])
+
+    def test_json_small_reads(self):
+        f = self._roundTrip("json")
+        reader = StatementReader(f)
+        # Elements span many reads, and reads end within strings and escapes
+        reader._readSize = 7
+        self.assertEqual([s.to_dict() for s in reader.statements()], [s.to_dict() for s in self.statements])
+
+    def test_batches(self):
+        f = self._roundTrip("ndjson")
+        batches = list(StatementReader(f).batches("brokerage_transactions", batchSize=4))
+        self.assertEqual([len(b) for b in batches], [4, 4, 4, 4, 2])
+        self.assertEqual(list(batches[0]["account_number"].unique()), ["U0000001"])
+        self.assertEqual(str(batches[0]["amount"].dtype), "float64")
+
+        f.seek(0)
+        frames = list(StatementReader(f).frames())
+        self.assertEqual([frame.accountNumber for frame in frames], ["U0000001", "U0000003", "U0000004", "U0000005"])
+        self.assertEqual(len(frames[0].frame("brokerage_transactions")), 8)
+
+if __name__ == '__main__':
+    unittest.main()
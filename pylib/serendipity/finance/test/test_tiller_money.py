@@ -0,0 +1,55 @@
+import csv
+import os
+import tempfile
+import unittest
+
+from ...gen.finance.models import BankTransaction, BrokerageTransaction, Statement
+from ..utils.tiller_money import TillerMoneyExporter
+
+def bankTransaction(day: int, amount: str) -> BankTransaction:
+    return BankTransaction(posted_date=f"2020-12-{day:02}T00:00:00", amount=amount, description="COFFEE",
+        memo="COFFEE SHOP", transaction_type="debit")
+
+def statement(transactions) -> Statement:
+    return Statement(account_number="123456789", institution_name="Bank", start_date="2020-12-01T00:00:00",
+        end_date="2020-12-31T00:00:00", bank_transactions=transactions)
+
+class TestTillerMoney(unittest.TestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._dir.name, "tiller.csv")
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def test_entries(self):
+        s = statement([bankTransaction(3, "$-1,001.50")])
+        s.brokerage_transactions = [BrokerageTransaction(trade_date="2020-12-06T10:00:00", amount="$100", price="$10",
+            quantity=10.0, status="settled", symbol="AAAA", transaction_type="purchase", description="Bought AAAA")]
+        entries = list(TillerMoneyExporter.entries([s]))
+        self.assertEqual(entries[0].date, "12/03/2020")
+        self.assertEqual(entries[0].amount, "-1001.50")
+        self.assertEqual(entries[0].accountNumber, "xxxx6789")
+        self.assertEqual(entries[0].month, "12/01/2020")
+        self.assertEqual(entries[0].week, "11/29/2020")
+        self.assertEqual(entries[0].fullDescription, "COFFEE SHOP")
+        self.assertEqual(entries[1].description, "purchase AAAA")
+        self.assertEqual(entries[1].week, "12/06/2020")
+
+    def test_repeated_exports_append_new_entries(self):
+        exporter = TillerMoneyExporter(self.path)
+        # Identical transactions are both exported
+        self.assertEqual(exporter.export([statement([bankTransaction(3, "$-5"), bankTransaction(3, "$-5")])]), 2)
+        self.assertEqual(exporter.export([statement([bankTransaction(3, "$-5"), bankTransaction(3, "$-5")])]), 0)
+
+        exporter = TillerMoneyExporter(self.path)
+        self.assertEqual(exporter.exportedCount, 2)
+        self.assertEqual(exporter.export([statement([bankTransaction(3, "$-5"), bankTransaction(3, "$-5"),
+            bankTransaction(3, "$-5"), bankTransaction(4, "$-5")])]), 2)
+        with open(self.path, newline="") as f:
+            rows = list(csv.reader(f))
+        self.assertEqual(rows[0], TillerMoneyExporter.columns)
+        self.assertEqual(len(rows), 5)
+
+if __name__ == '__main__':
+    unittest.main()
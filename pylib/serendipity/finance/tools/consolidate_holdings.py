@@ -0,0 +1,32 @@
+### Consolidates the holdings of statements across accounts into a CSV or Parquet file
+
+import os
+import sys
+
+module_root=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+sys.path.append(module_root)
+
+import argparse
+from serendipity.finance.extractors import createCsvStatementExtractor
+from serendipity.finance.utils.holding_consolidator import HoldingConsolidator
+from serendipity.finance.utils.statement_organizer import StatementOrganizer
+
+parser = argparse.ArgumentParser(description="Consolidate the holdings of statements")
+parser.add_argument("--input", "-i", type=str, nargs="+", action="extend",
+    help="The statements to consolidate. Directories are searched recursively and glob patterns are expanded", required=True)
+parser.add_argument("--output", "-o", help="The file to write, a .parquet file or a CSV file", required=True)
+
+parsedArgs = parser.parse_args()
+
+consolidator = HoldingConsolidator()
+for filepath in StatementOrganizer.findFiles(parsedArgs.input):
+    extractor = createCsvStatementExtractor(filepath)
+    if extractor is None:
+        print(f"No statement extractor found for {filepath}", file=sys.stderr)
+        continue
+    consolidator.addStatements(extractor.statements())
+
+if parsedArgs.output.endswith(".parquet"):
+    consolidator.writeParquetFile(parsedArgs.output)
+else:
+    consolidator.writeCsvFile(parsedArgs.output)
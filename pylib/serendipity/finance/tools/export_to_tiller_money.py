@@ -0,0 +1,31 @@
+### Exports the transactions of statements to a Tiller Money CSV file, appending only new transactions
+
+import os
+import sys
+
+module_root=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..")
+sys.path.append(module_root)
+
+import argparse
+from serendipity.finance.extractors import createCsvStatementExtractor
+from serendipity.finance.utils.statement_organizer import StatementOrganizer
+from serendipity.finance.utils.tiller_money import TillerMoneyExporter
+
+parser = argparse.ArgumentParser(description="Export statements to Tiller Money")
+parser.add_argument("--input", "-i", type=str, nargs="+", action="extend",
+    help="The statements to export. Directories are searched recursively and glob patterns are expanded", required=True)
+parser.add_argument("--output", "-o", help="The CSV file to export to", required=True)
+
+parsedArgs = parser.parse_args()
+
+def statements():
+    for filepath in StatementOrganizer.findFiles(parsedArgs.input):
+        extractor = createCsvStatementExtractor(filepath)
+        if extractor is None:
+            print(f"No statement extractor found for {filepath}", file=sys.stderr)
+            continue
+        yield from extractor.statements()
+
+exporter = TillerMoneyExporter(parsedArgs.output)
+count = exporter.export(statements())
+print(f"Exported {count} new transactions")
@@ -1 +1,3 @@
-from .market_data import MarketData
\ No newline at end of file
+from .market_data import FixtureQuoteProvider, MarketData, Quote, QuoteCache, QuoteProvider, YahooQuoteProvider
+from .price_history_store import PriceHistoryStore
+from .portfolio_valuation import PortfolioValuation, Valuation, ValuationCheckpoint
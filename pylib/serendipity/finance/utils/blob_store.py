@@ -0,0 +1,93 @@
+import errno
+import os
+import pathlib
+import shutil
+import stat
+import sys
+import tempfile
+
+from ...extractor import Document
+
+class BlobStore:
+    """
+    Content addressed store of files. Each distinct content is stored once, under its hash, 
+    and exposed at any number of paths through hard links, or reflinks (copy on write clones) 
+    where hard links are not possible. All writes are atomic.
+    """
+    # ioctl request to clone a file on Linux filesystems that support reflinks, e.g. btrfs and xfs
+    _FICLONE: int = 0x40049409
+
+    _path: pathlib.Path
+
+    def __init__(self, path: str):
+        self._path = pathlib.Path(path)
+        self._path.mkdir(parents=True, exist_ok=True)
+
+    def blobPath(self, contentHash: str) -> pathlib.Path:
+        return self._path / contentHash[:2] / contentHash
+
+    def put(self, filepath: str, contentHash: str = None) -> pathlib.Path:
+        """
+        Adds the content of a file to the store if it isn't already stored, and returns the path of its blob
+        """
+        if contentHash is None:
+            contentHash = Document.fileContentHash(filepath)
+        blobPath = self.blobPath(contentHash)
+        if blobPath.exists():
+            return blobPath
+        blobPath.parent.mkdir(parents=True, exist_ok=True)
+        self._atomicCopy(filepath, blobPath)
+        # Blobs are shared by every path linked to them, so they must not be modified in place
+        os.chmod(blobPath, stat.S_IRUSR | stat.S_IRGRP | stat.S_IROTH)
+        return blobPath
+
+    def link(self, contentHash: str, destination: str):
+        """
+        Exposes a stored blob at destination, replacing any existing file atomically
+        """
+        blobPath = self.blobPath(contentHash)
+        destination = pathlib.Path(destination)
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        if destination.exists() and os.path.samefile(blobPath, destination):
+            return
+
+        tmpPath = self._tempPath(destination)
+        try:
+            os.link(blobPath, tmpPath)
+        except OSError as e:
+            if e.errno not in (errno.EXDEV, errno.EPERM, errno.EMLINK, errno.ENOTSUP):
+                raise
+            # Hard links are not possible, e.g. across filesystems, so fall back to a clone or copy
+            self._atomicCopy(str(blobPath), destination)
+            return
+        os.replace(tmpPath, destination)
+
+    def _tempPath(self, destination: pathlib.Path) -> str:
+        fd, tmpPath = tempfile.mkstemp(dir=destination.parent, prefix=".", suffix=".tmp")
+        os.close(fd)
+        os.remove(tmpPath)
+        return tmpPath
+
+    def _atomicCopy(self, source: str, destination: pathlib.Path):
+        fd, tmpPath = tempfile.mkstemp(dir=destination.parent, prefix=".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                if not self._reflink(source, dst):
+                    with open(source, "rb") as src:
+                        shutil.copyfileobj(src, dst)
+            os.replace(tmpPath, destination)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+
+    def _reflink(self, source: str, dst) -> bool:
+        if not sys.platform.startswith("linux"):
+            return False
+        import fcntl
+        with open(source, "rb") as src:
+            try:
+                fcntl.ioctl(dst.fileno(), self._FICLONE, src.fileno())
+                return True
+            except OSError:
+                return False
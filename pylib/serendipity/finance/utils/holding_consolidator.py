@@ -0,0 +1,129 @@
+import csv
+import heapq
+from datetime import datetime
+from typing import Iterable, Iterator, List, NamedTuple, Optional, TextIO, Tuple
+
+from ...gen.finance.models import BrokerageHolding, Statement
+
+class ConsolidatedHolding(NamedTuple):
+    symbol: str
+    account: str
+    institution: str
+    costBasis: str
+    purchaseDate: str
+    quantity: float
+    value: str
+
+# (symbol, purchase date) sort key, the holding and its statement
+_Entry = Tuple[Tuple[str, str], BrokerageHolding, Statement]
+
+class HoldingConsolidator:
+    """
+    Consolidates the holdings of statements across accounts and institutions, ordered by symbol
+    and purchase date. The holdings of each statement are sorted once when the statement is added,
+    and the sorted runs of all the statements are merged lazily as the rows are written, so
+    consolidating many statements takes n log k comparisons rather than resorting everything
+    for each statement.
+    """
+    csvColumns: List[str] = ["Symbol", "Account", "Institution", "Cost Basis", "Purchase Date", "Quantity", "Value"]
+
+    _runs: List[List[_Entry]]
+
+    def __init__(self):
+        self._runs = []
+
+    def addStatement(self, statement: Statement):
+        if statement.brokerage_holdings is None or len(statement.brokerage_holdings) == 0:
+            return
+        run = [((h.symbol, h.purchase_date or ""), h, statement) for h in statement.brokerage_holdings]
+        run.sort(key=_entryKey)
+        self._runs.append(run)
+
+    def addStatements(self, statements: Iterable[Statement]):
+        for statement in statements:
+            self.addStatement(statement)
+
+    def holdings(self) -> Iterator[ConsolidatedHolding]:
+        """
+        Yields the consolidated holdings in order. Purchase dates are formatted as yyyy/mm/dd, and
+        holdings without a purchase date, which come first, are given the current date.
+        """
+        today = datetime.now().strftime("%Y/%m/%d")
+        for _, h, statement in heapq.merge(*self._runs, key=_entryKey):
+            yield ConsolidatedHolding(
+                symbol=h.symbol,
+                account=statement.account_number,
+                institution=statement.institution_name,
+                costBasis=_amount(h.cost_basis),
+                purchaseDate=_date(h.purchase_date) if h.purchase_date else today,
+                quantity=h.quantity,
+                value=_amount(h.value.end) if h.value is not None else ""
+            )
+
+    def writeCsv(self, f: TextIO):
+        """
+        Writes the consolidated holdings to an open text file, one row at a time
+        """
+        # Some CSV importers require records to be delimited by CRLF
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL, lineterminator="\r\n")
+        writer.writerow(self.csvColumns)
+        for h in self.holdings():
+            writer.writerow(h)
+
+    def writeCsvFile(self, path: str):
+        with open(path, "w", newline="") as f:
+            self.writeCsv(f)
+
+    def writeParquetFile(self, path: str, batchSize: int = 10000):
+        """
+        Writes the consolidated holdings to a Parquet file in row groups of batchSize holdings.
+        Requires pyarrow.
+        """
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Writing Parquet files requires pyarrow, install it with: pip install pyarrow")
+        schema = pyarrow.schema([
+            ("symbol", pyarrow.string()),
+            ("account", pyarrow.string()),
+            ("institution", pyarrow.string()),
+            ("cost_basis", pyarrow.float64()),
+            ("purchase_date", pyarrow.string()),
+            ("quantity", pyarrow.float64()),
+            ("value", pyarrow.float64())
+        ])
+        with pyarrow.parquet.ParquetWriter(path, schema, compression="zstd") as writer:
+            batch = []
+            for h in self.holdings():
+                batch.append(h)
+                if len(batch) >= batchSize:
+                    writer.write_batch(_recordBatch(pyarrow, schema, batch))
+                    batch = []
+            if len(batch) > 0:
+                writer.write_batch(_recordBatch(pyarrow, schema, batch))
+
+def _entryKey(entry: _Entry) -> Tuple[str, str]:
+    return entry[0]
+
+def _amount(value: Optional[str]) -> str:
+    if value is None:
+        return ""
+    return value.replace("$", "").replace(",", "")
+
+def _date(value: str) -> str:
+    return value[0:10].replace("-", "/")
+
+def _number(value: str) -> Optional[float]:
+    return float(value) if value is not None and len(value) > 0 else None
+
+def _recordBatch(pyarrow, schema, batch: List[ConsolidatedHolding]):
+    return pyarrow.RecordBatch.from_arrays([
+        pyarrow.array([h.symbol for h in batch], pyarrow.string()),
+        pyarrow.array([h.account for h in batch], pyarrow.string()),
+        pyarrow.array([h.institution for h in batch], pyarrow.string()),
+        pyarrow.array([_number(h.costBasis) for h in batch], pyarrow.float64()),
+        pyarrow.array([h.purchaseDate for h in batch], pyarrow.string()),
+        pyarrow.array([h.quantity for h in batch], pyarrow.float64()),
+        pyarrow.array([_number(h.value) for h in batch], pyarrow.float64())
+    ], schema=schema)
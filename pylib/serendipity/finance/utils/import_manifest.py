@@ -0,0 +1,71 @@
+import os
+import pathlib
+import sqlite3
+from typing import NamedTuple, Optional
+
+class ImportRecord(NamedTuple):
+    """
+    A file imported into the statements directory
+    """
+    path: str
+    size: int
+    mtime: int
+    contentHash: str
+    extractor: str
+    signature: str
+    destination: str
+
+class ImportManifest:
+    """
+    Persistent record of the imported files, stored in SQLite. Files are keyed by 
+    path, size and modification time so unchanged files are recognized without reading
+    them, and by content hash so the same statement downloaded again is recognized too.
+    """
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        with self._connection:
+            self._connection.execute("""
+                CREATE TABLE IF NOT EXISTS imports (
+                    path TEXT PRIMARY KEY,
+                    size INTEGER NOT NULL,
+                    mtime INTEGER NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    extractor TEXT NOT NULL,
+                    signature TEXT NOT NULL,
+                    destination TEXT NOT NULL
+                )""")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS imports_content_hash ON imports (content_hash)")
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def lookup(self, path: str, size: int, mtime: int) -> Optional[ImportRecord]:
+        """
+        Returns the record for a file if it was imported and hasn't changed since
+        """
+        row = self._connection.execute(
+            "SELECT * FROM imports WHERE path = ? AND size = ? AND mtime = ?", 
+            (os.path.abspath(path), size, mtime)).fetchone()
+        return ImportRecord(*row) if row is not None else None
+
+    def lookupContent(self, contentHash: str) -> Optional[ImportRecord]:
+        """
+        Returns a record of a file with the given content hash
+        """
+        row = self._connection.execute("SELECT * FROM imports WHERE content_hash = ? LIMIT 1", (contentHash,)).fetchone()
+        return ImportRecord(*row) if row is not None else None
+
+    def record(self, record: ImportRecord):
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO imports VALUES (?, ?, ?, ?, ?, ?, ?)", 
+                record._replace(path=os.path.abspath(record.path)))
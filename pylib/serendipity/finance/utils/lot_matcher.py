@@ -0,0 +1,291 @@
+import collections
+from decimal import Decimal
+import heapq
+import itertools
+import json
+from typing import Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from ...gen.finance.models import BrokerageRealizedLot, BrokerageTransaction, Statement
+
+class OpenLot:
+    """
+    A lot of a position that is still open. The quantity is negative for short positions, and the
+    cost is the cash paid to open the lot, so it is negative for short positions too.
+    """
+    __slots__ = ("lotId", "account", "symbol", "date", "quantity", "cost", "description")
+
+    def __init__(self, lotId: str, account: str, symbol: str, date: str, quantity: Decimal, cost: Decimal, description: str = ""):
+        self.lotId = lotId
+        self.account = account
+        self.symbol = symbol
+        self.date = date
+        self.quantity = quantity
+        self.cost = cost
+        self.description = description
+
+    @property
+    def unitCost(self) -> Decimal:
+        return abs(self.cost / self.quantity) if self.quantity != 0 else Decimal(0)
+
+    def toJson(self) -> dict:
+        return dict(lotId=self.lotId, account=self.account, symbol=self.symbol, date=self.date,
+            quantity=str(self.quantity), cost=str(self.cost), description=self.description)
+
+    @classmethod
+    def fromJson(cls, data: dict) -> "OpenLot":
+        return cls(data["lotId"], data["account"], data["symbol"], data["date"],
+            Decimal(data["quantity"]), Decimal(data["cost"]), data.get("description", ""))
+
+# Returns the (lot id, quantity) of the lots to close for a transaction, given the open lots of its position
+LotSelector = Callable[[BrokerageTransaction, List[OpenLot]], List[Tuple[str, Decimal]]]
+
+class _Position:
+    """
+    The open lots of a symbol in an account, in the order the matching method closes them
+    """
+    def __init__(self, method: str):
+        self.method = method
+        self.quantity = Decimal(0)
+        # Lots by FIFO order for fifo, lifo and specific-id, heap of (-unit cost, sequence, lot) for highest-cost
+        self.lots: Deque[OpenLot] = collections.deque()
+        self.heap: List[Tuple[Decimal, int, OpenLot]] = []
+
+    def add(self, lot: OpenLot, sequence: int):
+        self.quantity = self.quantity + lot.quantity
+        if self.method == LotMatcher.highestCost:
+            heapq.heappush(self.heap, (-lot.unitCost, sequence, lot))
+        else:
+            self.lots.append(lot)
+
+    def next(self) -> Optional[OpenLot]:
+        """
+        Returns the next lot to close, dropping the lots that were closed
+        """
+        if self.method == LotMatcher.highestCost:
+            while len(self.heap) > 0 and self.heap[0][2].quantity == 0:
+                heapq.heappop(self.heap)
+            return self.heap[0][2] if len(self.heap) > 0 else None
+        while len(self.lots) > 0:
+            lot = self.lots[-1] if self.method == LotMatcher.lifo else self.lots[0]
+            if lot.quantity != 0:
+                return lot
+            if self.method == LotMatcher.lifo:
+                self.lots.pop()
+            else:
+                self.lots.popleft()
+        return None
+
+    def openLots(self) -> List[OpenLot]:
+        if self.method == LotMatcher.highestCost:
+            lots = [entry[2] for entry in sorted(self.heap, key=lambda entry: entry[1])]
+        else:
+            lots = list(self.lots)
+        return [lot for lot in lots if lot.quantity != 0]
+
+class LotMatcher:
+    """
+    Matches the sales of positions to the lots they close, and emits the realized lots.
+
+    Transactions are processed in trade date order. Purchases open long lots, or close short lots,
+    and sales open short lots or close long lots, with the quantity left once all the lots of a
+    position are closed opening a lot on the other side. Lots are closed in the order of the method:
+    first in first out, last in first out, highest unit cost first, or the lots picked by a
+    selector for specific identification. A transaction that closes part of a lot leaves the rest
+    of the lot open, with its cost reduced in proportion. Assigned, exercised and expired options
+    close their lots, and never open new ones.
+
+    Positions are kept per account and symbol, so processing takes constant time per transaction
+    and per lot closed. The open lots can be saved to a snapshot and matching resumed from it,
+    so only the transactions that follow the snapshot have to be processed.
+    """
+    fifo = "fifo"
+    lifo = "lifo"
+    highestCost = "highest-cost"
+    specificId = "specific-id"
+    methods = (fifo, lifo, highestCost, specificId)
+
+    # Transaction types that open or close lots depending on the sign of their quantity
+    tradeTypes = { "purchase", "sale", "sale_option_exercised" }
+    # Transaction types that only close lots
+    closingTypes = { "option_assigned", "option_expired", "option_exercised" }
+
+    _method: str
+    _selector: Optional[LotSelector]
+    _positions: Dict[Tuple[str, str], _Position]
+    _sequence: Iterator[int]
+    _nextId: int
+    _asOf: Optional[str]
+
+    def __init__(self, method: str = fifo, selector: LotSelector = None):
+        """
+        selector picks the lots closed by each transaction for the specific-id method.
+        Quantities it doesn't pick are closed first in first out.
+        """
+        if method not in self.methods:
+            raise ValueError(f"Unknown lot matching method {method}")
+        if method == self.specificId and selector is None:
+            raise ValueError("The specific-id method requires a lot selector")
+        self._method = method
+        self._selector = selector
+        self._positions = {}
+        self._nextId = 1
+        self._sequence = itertools.count()
+        self._asOf = None
+
+    @property
+    def method(self) -> str:
+        return self._method
+
+    @property
+    def asOf(self) -> Optional[str]:
+        """
+        The trade date of the last transaction processed
+        """
+        return self._asOf
+
+    def openLots(self, account: str = None, symbol: str = None) -> List[OpenLot]:
+        ret = []
+        for (a, s), position in sorted(self._positions.items()):
+            if (account is None or a == account) and (symbol is None or s == symbol):
+                ret.extend(position.openLots())
+        return ret
+
+    def processStatements(self, statements: Iterable[Statement]) -> List[BrokerageRealizedLot]:
+        """
+        Processes the brokerage transactions of statements, in trade date order within each account
+        """
+        ret = []
+        for statement in statements:
+            transactions = sorted(statement.brokerage_transactions or [], key=lambda t: t.trade_date)
+            ret.extend(self.process(transactions, statement.account_number or ""))
+        return ret
+
+    def process(self, transactions: Iterable[BrokerageTransaction], account: str = "") -> List[BrokerageRealizedLot]:
+        """
+        Processes the transactions of an account, which must be in trade date order, and returns the realized lots
+        """
+        ret = []
+        for t in transactions:
+            transactionType = t.transaction_type
+            if transactionType not in self.tradeTypes and transactionType not in self.closingTypes:
+                continue
+            quantity = _decimal(t.quantity)
+            amount = _decimal(t.amount)
+            key = (account, t.symbol)
+            position = self._positions.get(key)
+            if position is None:
+                position = self._positions[key] = _Position(self._method)
+
+            if transactionType in self.closingTypes:
+                # Closes the given quantity, or the whole position if none is given, whatever its side
+                closing = min(abs(quantity), abs(position.quantity)) if quantity != 0 else abs(position.quantity)
+                self._close(position, t, closing, abs(quantity) if quantity != 0 else closing, amount, ret)
+            elif quantity != 0:
+                closing = Decimal(0)
+                if position.quantity != 0 and (position.quantity > 0) != (quantity > 0):
+                    closing = min(abs(quantity), abs(position.quantity))
+                    self._close(position, t, closing, abs(quantity), amount, ret)
+                remaining = abs(quantity) - closing
+                if remaining > 0:
+                    sign = 1 if quantity > 0 else -1
+                    lot = OpenLot(str(self._nextId), account, t.symbol, t.trade_date,
+                        sign * remaining, -amount * remaining / abs(quantity), t.description or "")
+                    self._nextId = self._nextId + 1
+                    position.add(lot, next(self._sequence))
+            self._asOf = t.trade_date
+        return ret
+
+    def _close(self, position: _Position, t: BrokerageTransaction, closing: Decimal, total: Decimal, amount: Decimal, ret: List[BrokerageRealizedLot]):
+        """
+        Closes quantity of the lots of a position for a transaction of total quantity and amount
+        """
+        if closing == 0:
+            return
+        picked: List[Tuple[OpenLot, Decimal]] = []
+        if self._method == self.specificId:
+            lots = { lot.lotId: lot for lot in position.openLots() }
+            for lotId, quantity in self._selector(t, list(lots.values())):
+                lot = lots.get(lotId)
+                if lot is None:
+                    raise RuntimeError(f"Lot {lotId} of {t.symbol} is not open")
+                quantity = min(_decimal(quantity), abs(lot.quantity), closing - sum(q for _, q in picked))
+                if quantity > 0:
+                    picked.append((lot, quantity))
+        remaining = closing - sum(q for _, q in picked)
+        for lot, quantity in picked:
+            self._realize(position, lot, t, quantity, total, amount, ret)
+        while remaining > 0:
+            lot = position.next()
+            if lot is None:
+                break
+            quantity = min(remaining, abs(lot.quantity))
+            self._realize(position, lot, t, quantity, total, amount, ret)
+            remaining = remaining - quantity
+
+    def _realize(self, position: _Position, lot: OpenLot, t: BrokerageTransaction, quantity: Decimal, total: Decimal, amount: Decimal, ret: List[BrokerageRealizedLot]):
+        sign = 1 if lot.quantity > 0 else -1
+        cost = lot.cost * quantity / abs(lot.quantity)
+        proceeds = amount * quantity / total if total != 0 else Decimal(0)
+        lot.cost = lot.cost - cost
+        lot.quantity = lot.quantity - sign * quantity
+        position.quantity = position.quantity - sign * quantity
+        ret.append(BrokerageRealizedLot(
+            acquisition_amount=_money(cost),
+            acquisition_date=lot.date,
+            acquisition_price=_money(cost / quantity * sign),
+            description=t.description or lot.description or "",
+            liquidation_amount=_money(proceeds),
+            liquidation_date=t.trade_date,
+            liquidation_price=t.price if t.price is not None else "$0",
+            quantity=float(sign * quantity),
+            symbol=t.symbol
+        ))
+
+    def snapshot(self) -> dict:
+        """
+        Returns the open lots and the state needed to resume matching, as JSON
+        """
+        return dict(method=self._method, asOf=self._asOf, nextLotId=self._nextId,
+            lots=[lot.toJson() for lot in self.openLots()])
+
+    def saveSnapshot(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.snapshot(), f)
+
+    @classmethod
+    def fromSnapshot(cls, snapshot: dict, selector: LotSelector = None) -> "LotMatcher":
+        matcher = cls(snapshot["method"], selector)
+        matcher._nextId = snapshot["nextLotId"]
+        matcher._asOf = snapshot.get("asOf")
+        for data in snapshot["lots"]:
+            lot = OpenLot.fromJson(data)
+            key = (lot.account, lot.symbol)
+            position = matcher._positions.get(key)
+            if position is None:
+                position = matcher._positions[key] = _Position(matcher._method)
+            position.add(lot, next(matcher._sequence))
+        return matcher
+
+    @classmethod
+    def loadSnapshot(cls, path: str, selector: LotSelector = None) -> "LotMatcher":
+        with open(path, "r") as f:
+            return cls.fromSnapshot(json.load(f), selector)
+
+def _decimal(value) -> Decimal:
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, str):
+        value = value.replace("$", "").replace(",", "").strip()
+        return Decimal(value) if len(value) > 0 else Decimal(0)
+    return Decimal(str(value))
+
+def _money(value: Decimal) -> str:
+    """
+    Formats an amount computed from the amounts of transactions, rounded to a millionth
+    """
+    s = format(value.quantize(Decimal("0.000001")), "f")
+    if "." in s:
+        s = s.rstrip("0").rstrip(".")
+    if s == "-0":
+        s = "0"
+    return f"${s}"
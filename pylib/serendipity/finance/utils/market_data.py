@@ -1,18 +1,308 @@
-import math
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pathlib
+import sqlite3
+import threading
+import time
 import pandas as pd
-import yahoo_fin.stock_info as stock_info
-import yahoo_fin.options as options
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from .price_history_store import PriceHistoryStore
+
+class Quote(NamedTuple):
+    symbol: str
+    price: float
+    # The day of the close the price was taken from, as an ISO 8601 string
+    date: str
+
+class QuoteProvider:
+    """
+    Source of daily price history. Subclasses return the daily closes of a symbol between two dates.
+    """
+    def history(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        """
+        Returns a DataFrame indexed by day with at least a close column, for the days from start
+        up to end, excluded
+        """
+        raise NotImplementedError()
+
+class YahooQuoteProvider(QuoteProvider):
+    def history(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        import yahoo_fin.stock_info as stock_info
+        return stock_info.get_data(symbol, start_date=start, end_date=end)
+
+class FixtureQuoteProvider(QuoteProvider):
+    """
+    Serves price history from DataFrames, or from CSV files named after the symbols, e.g. AAPL.csv,
+    with date and close columns. Used in place of a remote provider in tests.
+    """
+    _frames: Dict[str, pd.DataFrame]
+    _path: Optional[pathlib.Path]
+    _requests: List[Tuple[str, pd.Timestamp, pd.Timestamp]]
+    _lock: threading.Lock
+
+    def __init__(self, frames: Dict[str, pd.DataFrame] = None, path: str = None):
+        self._frames = dict(frames or {})
+        self._path = pathlib.Path(path) if path is not None else None
+        self._requests = []
+        self._lock = threading.Lock()
+
+    @property
+    def requests(self) -> List[Tuple[str, pd.Timestamp, pd.Timestamp]]:
+        """
+        The (symbol, start, end) of each call to history
+        """
+        return self._requests
+
+    def history(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        with self._lock:
+            self._requests.append((symbol, start, end))
+        df = self._frames.get(symbol)
+        if df is None and self._path is not None and (self._path / f"{symbol}.csv").exists():
+            df = pd.read_csv(self._path / f"{symbol}.csv", index_col="date", parse_dates=True)
+        if df is None:
+            raise KeyError(f"No price history for {symbol}")
+        return df[(df.index >= start) & (df.index < end)]
+
+class QuoteCache:
+    """
+    Quotes kept in memory and, if a path is given, in SQLite so they survive the process.
+    Each quote expires after the time to live it was stored with.
+    """
+    _memory: Dict[str, Tuple[Quote, float]]
+    _connection: Optional[sqlite3.Connection]
+
+    def __init__(self, path: str = None):
+        self._memory = {}
+        self._connection = None
+        if path is not None:
+            pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._connection = sqlite3.connect(path, timeout=30)
+            with self._connection:
+                self._connection.execute("""
+                    CREATE TABLE IF NOT EXISTS quotes (
+                        symbol TEXT PRIMARY KEY,
+                        price REAL NOT NULL,
+                        date TEXT NOT NULL,
+                        expires REAL NOT NULL
+                    )""")
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+
+    def get(self, symbols: Iterable[str]) -> Dict[str, Quote]:
+        """
+        Returns the quotes of the symbols that are cached and not expired
+        """
+        now = time.time()
+        ret = {}
+        missing = []
+        for symbol in symbols:
+            entry = self._memory.get(symbol)
+            if entry is not None and entry[1] > now:
+                ret[symbol] = entry[0]
+            else:
+                missing.append(symbol)
+        if self._connection is not None and len(missing) > 0:
+            for i in range(0, len(missing), 500):
+                batch = missing[i:i + 500]
+                rows = self._connection.execute(
+                    f"SELECT symbol, price, date, expires FROM quotes WHERE expires > ? AND symbol IN ({','.join('?' * len(batch))})",
+                    [now] + batch)
+                for symbol, price, date, expires in rows:
+                    quote = Quote(symbol, price, date)
+                    self._memory[symbol] = (quote, expires)
+                    ret[symbol] = quote
+        return ret
+
+    def put(self, quotes: Iterable[Quote], ttl: float):
+        expires = time.time() + ttl
+        quotes = list(quotes)
+        for quote in quotes:
+            self._memory[quote.symbol] = (quote, expires)
+        if self._connection is not None:
+            with self._connection:
+                self._connection.executemany("INSERT OR REPLACE INTO quotes VALUES (?, ?, ?, ?)",
+                    ((q.symbol, q.price, q.date, expires) for q in quotes))
 
 class MarketData:
+    """
+    Retrieves the last close of symbols from a quote provider. The symbols are deduplicated,
+    served from the cache when possible, and the others are fetched concurrently over a window
+    of a few days, which holds the last close even across weekends and holidays.
+
+    Price matrices of many symbols over a range of days are built from a history store,
+    which only fetches the days it doesn't hold yet.
+    """
+    _default: "MarketData" = None
+
+    _provider: QuoteProvider
+    _cache: QuoteCache
+    _historyStore: PriceHistoryStore
+    _ttl: float
+    _maxWorkers: int
+    _windowDays: int
 
-    @staticmethod 
+    def __init__(
+        self,
+        provider: QuoteProvider = None,
+        cache: QuoteCache = None,
+        historyStore: PriceHistoryStore = None,
+        ttl: float = 15 * 60,
+        maxWorkers: int = 8,
+        windowDays: int = 10
+    ):
+        """
+        ttl is the number of seconds quotes are cached for
+        """
+        self._provider = provider if provider is not None else YahooQuoteProvider()
+        self._cache = cache if cache is not None else QuoteCache()
+        self._historyStore = historyStore if historyStore is not None else PriceHistoryStore()
+        self._ttl = ttl
+        self._maxWorkers = maxWorkers
+        self._windowDays = windowDays
+
+    @classmethod
+    def default(cls) -> "MarketData":
+        """
+        Returns the shared instance, which fetches from Yahoo and caches quotes and price history in ~/.serendipity
+        """
+        if cls._default is None:
+            path = pathlib.Path.home() / ".serendipity"
+            cls._default = MarketData(
+                cache=QuoteCache(str(path / "quotes.sqlite3")),
+                historyStore=PriceHistoryStore(str(path / "price_history")))
+        return cls._default
+
+    @property
+    def provider(self) -> QuoteProvider:
+        return self._provider
+
+    @property
+    def cache(self) -> QuoteCache:
+        return self._cache
+
+    @property
+    def historyStore(self) -> PriceHistoryStore:
+        return self._historyStore
+
+    @staticmethod
     def getLastValidElement(r:pd.Series):
-        for val in reversed(r):
-            if not math.isnan(val):
-                return val
-        return None
-        
+        values = np.asarray(r, dtype="float64")
+        valid = np.flatnonzero(~np.isnan(values))
+        return values[valid[-1]] if len(valid) > 0 else None
+
+    @staticmethod
+    def pricesAsOf(matrix: pd.DataFrame, dates: Iterable) -> pd.DataFrame:
+        """
+        Returns the last valid price of each symbol of a price matrix as of each date,
+        i.e. at the latest day of the matrix on or before the date. Prices before the first
+        day of the matrix are NaN.
+        """
+        dates = pd.DatetimeIndex(dates)
+        values = matrix.ffill().to_numpy(dtype="float64")
+        positions = matrix.index.searchsorted(dates, side="right") - 1
+        ret = values[positions.clip(0)] if len(values) > 0 else np.full((len(dates), len(matrix.columns)), np.nan)
+        ret[positions < 0] = np.nan
+        return pd.DataFrame(ret, index=dates, columns=matrix.columns)
+
+    def priceMatrix(
+        self,
+        symbols: Iterable[str],
+        start,
+        end,
+        fill: bool = True,
+        errors: Dict[str, Exception] = None
+    ) -> pd.DataFrame:
+        """
+        Returns the daily closes of the symbols from start up to end, excluded, as a DataFrame
+        with a row per day on which any of the symbols closed and a column per symbol.
+        If fill is True, the days a symbol didn't close take its previous close, including
+        the close preceding start. Symbols whose history can't be fetched are left out,
+        and their errors are added to errors if given.
+        """
+        unique = list(dict.fromkeys(s.strip() for s in symbols if s is not None and len(s.strip()) > 0))
+        start = pd.Timestamp(start).normalize()
+        end = pd.Timestamp(end).normalize()
+        # Start early enough to find the close preceding start
+        fetchStart = start - pd.DateOffset(self._windowDays)
+        self._fetchHistories(unique, fetchStart, end, errors)
+
+        columns = {}
+        for symbol in unique:
+            if errors is not None and symbol in errors:
+                continue
+            columns[symbol] = self._historyStore.closes(symbol, fetchStart, end)
+        matrix = pd.DataFrame(columns, columns=list(columns)).sort_index()
+        matrix.index = pd.DatetimeIndex(matrix.index, dtype="datetime64[ns]")
+        if fill:
+            matrix = matrix.ffill()
+        return matrix[matrix.index >= start]
+
+    def _fetchHistories(self, symbols: List[str], start: pd.Timestamp, end: pd.Timestamp, errors: Optional[Dict[str, Exception]]):
+        """
+        Fetches the ranges of days of the symbols that are not in the history store
+        """
+        # The close of today may still change, so today is never recorded as fetched
+        today = pd.Timestamp.today().normalize()
+        tasks = [(symbol, s, e) for symbol in symbols for s, e in self._historyStore.missingRanges(symbol, start, end)]
+        if len(tasks) == 0:
+            return
+        with ThreadPoolExecutor(max_workers=min(self._maxWorkers, len(tasks))) as executor:
+            futures = [(task, executor.submit(self._provider.history, *task)) for task in tasks]
+            for (symbol, s, e), future in futures:
+                try:
+                    df = future.result()
+                except Exception as error:
+                    if errors is not None:
+                        errors[symbol] = error
+                    continue
+                closes = df["close"] if df is not None and len(df) > 0 else pd.Series([], dtype="float64")
+                self._historyStore.add(symbol, closes, (s, max(s, min(e, today))))
+
+    def quotes(self, symbols: Iterable[str], errors: Dict[str, Exception] = None) -> Dict[str, Quote]:
+        """
+        Returns the quotes of the symbols by symbol. Symbols that can't be quoted are left out
+        of the result, and their errors are added to errors if given.
+        """
+        unique = list(dict.fromkeys(s.strip() for s in symbols if s is not None and len(s.strip()) > 0))
+        ret = self._cache.get(unique)
+        missing = [s for s in unique if s not in ret]
+        if len(missing) == 0:
+            return ret
+
+        end = pd.Timestamp.today().normalize() + pd.DateOffset(1)
+        start = end - pd.DateOffset(self._windowDays)
+        fetched = []
+        with ThreadPoolExecutor(max_workers=min(self._maxWorkers, len(missing))) as executor:
+            futures = { symbol: executor.submit(self._fetch, symbol, start, end) for symbol in missing }
+            for symbol, future in futures.items():
+                try:
+                    quote = future.result()
+                except Exception as e:
+                    if errors is not None:
+                        errors[symbol] = e
+                    continue
+                fetched.append(quote)
+                ret[symbol] = quote
+        self._cache.put(fetched, self._ttl)
+        return { s: ret[s] for s in unique if s in ret }
+
+    def quote(self, symbol: str) -> Quote:
+        errors = {}
+        quotes = self.quotes([symbol], errors)
+        if symbol.strip() in errors:
+            raise errors[symbol.strip()]
+        return quotes[symbol.strip()]
+
+    def _fetch(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> Quote:
+        df = self._provider.history(symbol, start, end)
+        closes = df["close"].dropna() if df is not None and len(df) > 0 else []
+        if len(closes) == 0:
+            raise RuntimeError(f"No close found for {symbol} since {start.date().isoformat()}")
+        return Quote(symbol, float(closes.iloc[-1]), pd.Timestamp(closes.index[-1]).date().isoformat())
+
     @classmethod
     def currentPrice(cls, symbol:str):
-        df:pd.DataFrame = stock_info.get_data(symbol, end_date = pd.Timestamp.today() + pd.DateOffset(10))
-        return cls.getLastValidElement(df.close)
+        return cls.default().quote(symbol).price
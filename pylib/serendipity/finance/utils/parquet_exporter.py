@@ -0,0 +1,162 @@
+import hashlib
+import os
+import pathlib
+import tempfile
+import urllib.parse
+import pandas
+from typing import Dict, Iterable, List, Optional, Union
+
+from ...gen.finance.models import Statement
+from ..extractors import StatementFrame
+
+class ParquetExporter:
+    """
+    Exports the collections of statements to Parquet datasets, one per collection, e.g.
+    <path>/brokerage_transactions. Each dataset is partitioned by institution, account and year
+    in hive layout, e.g. institution=Merrill%20Edge/account=1111/year=2020, so readers can
+    prune the files they read by partition as well as by column.
+
+    Each collection of a statement is written to its own file per year, named after the statement,
+    so exporting new statements adds files to the datasets and exporting a statement again replaces
+    the files of its previous export, including those of years it no longer has elements in.
+    Files are written atomically, with the schema of their collection.
+
+    pyarrow is only needed when exporting or reading.
+    """
+    # The date column that gives the year of the elements of each exported collection.
+    # Holdings have no date of their own, so they are partitioned by the end date of their statement.
+    datasets: Dict[str, Optional[str]] = {
+        "brokerage_holdings": None,
+        "brokerage_transactions": "trade_date",
+        "bank_transactions": "posted_date",
+        "credit_card_transactions": "posted_date",
+        "brokerage_realized_lots": "liquidation_date"
+    }
+    partitionColumns: List[str] = ["institution", "account", "year"]
+
+    _path: pathlib.Path
+    _compression: str
+
+    def __init__(self, path: str, compression: str = "zstd"):
+        self._path = pathlib.Path(path)
+        self._compression = compression
+
+    @property
+    def path(self) -> pathlib.Path:
+        return self._path
+
+    def export(self, statements: Iterable[Union[Statement, StatementFrame]]) -> List[pathlib.Path]:
+        """
+        Exports statements, or StatementFrames, and returns the paths of the files written
+        """
+        ret = []
+        for statement in statements:
+            ret.extend(self.exportStatement(statement))
+        return ret
+
+    def exportStatement(self, statement: Union[Statement, StatementFrame]) -> List[pathlib.Path]:
+        pq = _parquet()
+        frame = statement if isinstance(statement, StatementFrame) else StatementFrame.fromStatement(statement)
+        endDate = pandas.to_datetime(frame.endDate, format="ISO8601") if frame.endDate is not None else pandas.NaT
+        fileName = f"{self._fileName(frame)}.parquet"
+        ret = []
+        for name, dateColumn in self.datasets.items():
+            written = []
+            data = frame.frame(name).copy() if name in frame.names() else None
+            if data is not None and len(data) > 0:
+                data["statement_end_date"] = pandas.Series(endDate, index=data.index).astype("datetime64[ns]")
+                dates = data[dateColumn] if dateColumn is not None else data["statement_end_date"]
+                # Elements without a date are kept with the year of their statement
+                years = dates.fillna(endDate).dt.year
+                schema = self.schema(name)
+                for year, rows in data.groupby(years.fillna(0).astype(int), sort=True):
+                    partition = self.partitionPath(name, frame.institutionName, frame.accountNumber, year)
+                    filepath = partition / fileName
+                    table = _arrow().Table.from_pandas(rows[schema.names], schema=schema, preserve_index=False)
+                    self._write(pq, table, filepath)
+                    written.append(filepath)
+            # Files of a previous export in partitions that this export no longer produces would duplicate its rows
+            for filepath in (self._path / name).glob(f"*/*/*/{fileName}"):
+                if filepath not in written:
+                    filepath.unlink()
+            ret.extend(written)
+        return ret
+
+    @classmethod
+    def schema(cls, name: str):
+        """
+        Returns the Arrow schema of the files of a dataset. Every file is written with the schema
+        of its collection, rather than one inferred from its values, so that a column that is
+        null throughout a statement still has the type of the column in the other files.
+        """
+        pa = _arrow()
+        types = { "money": pa.float64(), "number": pa.float64(), "date": pa.timestamp("ns"), "str": pa.string() }
+        fields = [(column, types[kind]) for column, _, kind in StatementFrame.columnSpecs(StatementFrame.collections[name])]
+        return pa.schema(fields + [("statement_end_date", pa.timestamp("ns"))])
+
+    def partitionPath(self, name: str, institution: str, account: str, year: int) -> pathlib.Path:
+        return (self._path / name
+            / f"institution={_partitionValue(institution)}"
+            / f"account={_partitionValue(account)}"
+            / f"year={year}")
+
+    def read(self, name: str, columns: List[str] = None, **partitions) -> pandas.DataFrame:
+        """
+        Reads a dataset, e.g. read("brokerage_transactions", columns=["symbol", "amount"], year=2020).
+        Only the files of the requested partitions and the requested columns are read.
+        """
+        if name not in self.datasets:
+            raise KeyError(f"Unknown dataset {name}")
+        datasetPath = self._path / name
+        if not datasetPath.exists():
+            return pandas.DataFrame(columns=columns) if columns is not None else pandas.DataFrame()
+        ds = _dataset()
+        pa = _arrow()
+        # Partition values are typed explicitly, so that account numbers made of digits stay strings
+        partitioning = ds.partitioning(pa.schema([("institution", pa.string()), ("account", pa.string()), ("year", pa.int32())]), flavor="hive")
+        dataset = ds.dataset(str(datasetPath), format="parquet", partitioning=partitioning)
+        condition = None
+        for column, value in partitions.items():
+            if column not in self.partitionColumns:
+                raise KeyError(f"Unknown partition column {column}")
+            c = ds.field(column) == value
+            condition = c if condition is None else condition & c
+        return dataset.to_table(columns=columns, filter=condition).to_pandas()
+
+    def _fileName(self, frame: StatementFrame) -> str:
+        signature = "\0".join(str(v) for v in (frame.institutionName, frame.accountNumber, frame.startDate, frame.endDate))
+        return hashlib.sha1(signature.encode("utf-8")).hexdigest()
+
+    def _write(self, pq, table, filepath: pathlib.Path):
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(dir=filepath.parent, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmpPath, compression=self._compression)
+            os.replace(tmpPath, filepath)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+
+def _partitionValue(value: Optional[str]) -> str:
+    if value is None or len(value) == 0:
+        return "__HIVE_DEFAULT_PARTITION__"
+    return urllib.parse.quote(value, safe="")
+
+def _arrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise RuntimeError("Parquet export requires pyarrow, install it with: pip install pyarrow")
+    return pyarrow
+
+def _parquet():
+    _arrow()
+    import pyarrow.parquet
+    return pyarrow.parquet
+
+def _dataset():
+    _arrow()
+    import pyarrow.dataset
+    return pyarrow.dataset
@@ -0,0 +1,230 @@
+import json
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, NamedTuple, Union
+
+from ...gen.finance.models import Statement
+from ..extractors import StatementFrame
+from .lot_matcher import LotMatcher
+from .market_data import MarketData
+
+class ValuationCheckpoint:
+    """
+    The quantity and cost basis of each position of a portfolio at the end of a day, from which
+    the valuation of the following days can be computed without the transactions that precede it
+    """
+    _date: pd.Timestamp
+    _positions: pd.DataFrame
+
+    def __init__(self, date, positions: pd.DataFrame):
+        """
+        positions has account, symbol, quantity and cost_basis columns
+        """
+        self._date = pd.Timestamp(date).normalize()
+        self._positions = positions.reset_index(drop=True)
+
+    @property
+    def date(self) -> pd.Timestamp:
+        return self._date
+
+    @property
+    def positions(self) -> pd.DataFrame:
+        return self._positions
+
+    def toJson(self) -> dict:
+        return dict(date=self._date.date().isoformat(), positions=self._positions.to_dict(orient="list"))
+
+    @classmethod
+    def fromJson(cls, data: dict) -> "ValuationCheckpoint":
+        positions = pd.DataFrame(data["positions"], columns=PortfolioValuation._positionColumns)
+        return cls(data["date"], positions.astype({ "quantity": "float64", "cost_basis": "float64" }))
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.toJson(), f)
+
+    @classmethod
+    def load(cls, path: str) -> "ValuationCheckpoint":
+        with open(path, "r") as f:
+            return cls.fromJson(json.load(f))
+
+class Valuation(NamedTuple):
+    # A row per day and position with date, account, symbol, quantity, cost_basis, price, market_value and pnl columns
+    series: pd.DataFrame
+    # The positions at the end of the last day, to resume from
+    checkpoint: ValuationCheckpoint
+
+class PortfolioValuation:
+    """
+    Computes the daily quantity, cost basis, market value and profit and loss of each position,
+    i.e. each symbol of each account, of a portfolio from the transactions and holdings of its statements.
+
+    The holdings of a statement give the quantity and cost basis of its positions at its end date.
+    The positions are carried from the earliest holdings of each position, or from the beginning
+    if it has none, by the transactions that follow. The cost basis is the net cash invested in the
+    position, i.e. purchases less sales, so the profit and loss includes the realized gains.
+
+    The quantities and cost bases are computed for all the days and positions at once, as cumulative
+    sums of the changes of each position placed on a matrix of days by positions, and the prices
+    are looked up as of each day from a price matrix of all the symbols. Starting from a checkpoint,
+    only the days that follow it are computed.
+
+    Positions in options, whose symbols are OCC codes, e.g. AAPL230120C00045000, are valued at
+    optionMultiplier times their price, since their prices are per share and their amounts per contract.
+    """
+    optionMultiplier: int = 100
+    _occCodeRegex: str = r"^[A-Z0-9.]{1,6}\s*[0-9]{6}[CP][0-9]{8}$"
+
+    _columns: List[str] = ["account", "symbol", "date", "quantity", "cost_basis"]
+    _positionColumns: List[str] = ["account", "symbol", "quantity", "cost_basis"]
+    _seriesColumns: List[str] = ["date", "account", "symbol", "quantity", "cost_basis", "price", "market_value", "pnl"]
+    # Transaction types that change the quantity of a position
+    _positionTypes = LotMatcher.tradeTypes | LotMatcher.closingTypes
+
+    _marketData: MarketData
+
+    def __init__(self, marketData: MarketData = None):
+        self._marketData = marketData if marketData is not None else MarketData.default()
+
+    def value(
+        self,
+        statements: Iterable[Union[Statement, StatementFrame]],
+        start = None,
+        end = None,
+        checkpoint: ValuationCheckpoint = None,
+        includeClosed: bool = False,
+        errors: Dict[str, Exception] = None
+    ) -> Valuation:
+        """
+        Values the portfolio for each day from start to end, included. start defaults to the
+        day following the checkpoint, or to the first transaction or holdings, and end to today.
+        Positions that are closed on a day are left out of it unless includeClosed is True.
+        Symbols whose prices can't be fetched are valued as NaN, and their errors are added to errors if given.
+        """
+        transactions, anchors = self._events(statements)
+        if checkpoint is not None:
+            positions = checkpoint.positions.assign(date=checkpoint.date)[self._columns]
+            # The checkpoint replaces the holdings of its positions
+            covered = pd.MultiIndex.from_frame(positions[["account", "symbol"]])
+            anchors = anchors[~pd.MultiIndex.from_frame(anchors[["account", "symbol"]]).isin(covered)]
+            anchors = pd.concat([positions, anchors], ignore_index=True)
+            if start is None:
+                start = checkpoint.date + pd.DateOffset(1)
+        end = pd.Timestamp(end if end is not None else pd.Timestamp.today()).normalize()
+        if start is None:
+            # Either may be NaT when there are no transactions or holdings
+            start = pd.Series([transactions["date"].min(), anchors["date"].min()], dtype="datetime64[ns]").min()
+            if pd.isna(start):
+                start = end
+        start = pd.Timestamp(start).normalize()
+        days = pd.date_range(start, end, freq="D")
+        if len(days) == 0:
+            return Valuation(pd.DataFrame(columns=self._seriesColumns), checkpoint or ValuationCheckpoint(end, pd.DataFrame(columns=self._positionColumns)))
+
+        # Index the positions, and drop the transactions that precede the anchor of their position
+        keys = pd.concat([anchors[["account", "symbol"]], transactions[["account", "symbol"]]], ignore_index=True)
+        pairCodes, pairs = pd.MultiIndex.from_frame(keys).factorize()
+        anchorCodes = pairCodes[:len(anchors)]
+        transactionCodes = pairCodes[len(anchors):]
+        anchorDates = np.full(len(pairs), np.datetime64("NaT"), dtype="datetime64[ns]")
+        anchorDates[anchorCodes] = anchors["date"].to_numpy(dtype="datetime64[ns]")
+        transactionDates = transactions["date"].to_numpy(dtype="datetime64[ns]")
+        pairAnchors = anchorDates[transactionCodes]
+        keep = np.isnat(pairAnchors) | (transactionDates > pairAnchors)
+
+        codes = np.concatenate([anchorCodes, transactionCodes[keep]])
+        dates = np.concatenate([anchors["date"].to_numpy(dtype="datetime64[ns]"), transactionDates[keep]])
+        quantities = np.concatenate([anchors["quantity"].to_numpy(dtype="float64"), transactions["quantity"].to_numpy(dtype="float64")[keep]])
+        costs = np.concatenate([anchors["cost_basis"].to_numpy(dtype="float64"), transactions["cost_basis"].to_numpy(dtype="float64")[keep]])
+
+        # Changes that precede start make up the positions on the first day
+        dayIndices = days.searchsorted(dates, side="left")
+        inRange = dayIndices < len(days)
+        quantity = np.zeros((len(days), len(pairs)))
+        cost = np.zeros((len(days), len(pairs)))
+        started = np.zeros((len(days), len(pairs)))
+        np.add.at(quantity, (dayIndices[inRange], codes[inRange]), np.nan_to_num(quantities[inRange]))
+        np.add.at(cost, (dayIndices[inRange], codes[inRange]), np.nan_to_num(costs[inRange]))
+        np.add.at(started, (dayIndices[inRange], codes[inRange]), 1)
+        quantity = np.cumsum(quantity, axis=0)
+        cost = np.cumsum(cost, axis=0)
+        started = np.cumsum(started, axis=0) > 0
+        # Sums of floats leave residues where positions are closed
+        quantity[np.abs(quantity) < 1e-9] = 0
+
+        symbols = pairs.get_level_values(1)
+        uniqueSymbols = list(dict.fromkeys(symbols))
+        price = np.full((len(days), len(pairs)), np.nan)
+        if len(uniqueSymbols) > 0:
+            # Start a week early so that days before the first close of the range, e.g. a week end, have a price
+            matrix = self._marketData.priceMatrix(uniqueSymbols, start - pd.DateOffset(7), end + pd.DateOffset(1), errors=errors)
+            prices = MarketData.pricesAsOf(matrix, days).reindex(columns=uniqueSymbols)
+            price = prices.to_numpy(dtype="float64")[:, pd.Index(uniqueSymbols).get_indexer(symbols)]
+        multipliers = np.where(symbols.str.match(self._occCodeRegex), self.optionMultiplier, 1)
+        marketValue = quantity * price * multipliers
+        marketValue[quantity == 0] = 0
+
+        rows = started & ((quantity != 0) if not includeClosed else True)
+        dayIndex, pairIndex = np.nonzero(rows)
+        series = pd.DataFrame({
+            "date": days[dayIndex],
+            "account": pairs.get_level_values(0)[pairIndex],
+            "symbol": symbols[pairIndex],
+            "quantity": quantity[rows],
+            "cost_basis": cost[rows],
+            "price": price[rows],
+            "market_value": marketValue[rows]
+        }, columns=self._seriesColumns)
+        series["pnl"] = series["market_value"] - series["cost_basis"]
+
+        last = started[-1] & ((quantity[-1] != 0) | (cost[-1] != 0))
+        positions = pd.DataFrame({
+            "account": pairs.get_level_values(0)[last],
+            "symbol": symbols[last],
+            "quantity": quantity[-1][last],
+            "cost_basis": cost[-1][last]
+        }, columns=self._positionColumns)
+        return Valuation(series, ValuationCheckpoint(end, positions))
+
+    def _events(self, statements: Iterable[Union[Statement, StatementFrame]]):
+        """
+        Returns the changes of positions made by the transactions, and the holdings, with their day
+        """
+        transactions = []
+        anchors = []
+        for statement in statements:
+            frame = statement if isinstance(statement, StatementFrame) else StatementFrame.fromStatement(statement)
+            account = frame.accountNumber or ""
+            t = frame.frame("brokerage_transactions")
+            t = t[t["transaction_type"].isin(self._positionTypes) & t["symbol"].notna() & (t["symbol"] != "")]
+            transactions.append(pd.DataFrame({
+                "account": account,
+                "symbol": t["symbol"].astype(str),
+                "date": t["trade_date"].dt.normalize(),
+                "quantity": t["quantity"].fillna(0),
+                "cost_basis": -t["amount"].fillna(0)
+            }, columns=self._columns))
+
+            h = frame.frame("brokerage_holdings")
+            if len(h) > 0 and frame.endDate is not None:
+                h = h[h["symbol"].notna() & (h["symbol"] != "")]
+                h = h.groupby("symbol", as_index=False, sort=False)[["quantity", "cost_basis"]].sum(min_count=1)
+                anchors.append(pd.DataFrame({
+                    "account": account,
+                    "symbol": h["symbol"].astype(str),
+                    "date": pd.Timestamp(frame.endDate).normalize(),
+                    "quantity": h["quantity"],
+                    "cost_basis": h["cost_basis"]
+                }, columns=self._columns))
+
+        transactions = _concat(transactions, self._columns).sort_values("date", kind="stable")
+        anchors = _concat(anchors, self._columns)
+        # The earliest holdings of each position anchor it
+        anchors = anchors.sort_values("date", kind="stable").drop_duplicates(["account", "symbol"], keep="first")
+        return transactions.reset_index(drop=True), anchors.reset_index(drop=True)
+
+def _concat(frames: List[pd.DataFrame], columns: List[str]) -> pd.DataFrame:
+    if len(frames) == 0:
+        frames = [pd.DataFrame(columns=columns)]
+    ret = pd.concat(frames, ignore_index=True)
+    return ret.astype({ "account": object, "symbol": object, "date": "datetime64[ns]", "quantity": "float64", "cost_basis": "float64" })
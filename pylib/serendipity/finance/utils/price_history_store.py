@@ -0,0 +1,123 @@
+import json
+import os
+import pathlib
+import tempfile
+import threading
+import pandas as pd
+from typing import Dict, List, Optional, Tuple
+
+# [start, end) range of days
+DateRange = Tuple[pd.Timestamp, pd.Timestamp]
+
+class PriceHistoryStore:
+    """
+    Local store of the daily closes of symbols, with the range of days that was fetched for each
+    symbol, so that only the days outside of that range are fetched again. Days without a close
+    within the fetched range, e.g. week ends, are known to have no price.
+
+    Histories are kept in memory and, if a path is given, in a Parquet file per symbol holding
+    a date and a close column, with the fetched range in the metadata of the file.
+    Writing to disk requires pyarrow.
+    """
+    _rangeKey: bytes = b"serendipity.fetched_range"
+
+    _path: Optional[pathlib.Path]
+    _histories: Dict[str, Tuple[pd.Series, Optional[DateRange]]]
+    _lock: threading.Lock
+
+    def __init__(self, path: str = None):
+        self._path = pathlib.Path(path) if path is not None else None
+        self._histories = {}
+        self._lock = threading.Lock()
+
+    def closes(self, symbol: str, start: pd.Timestamp = None, end: pd.Timestamp = None) -> pd.Series:
+        """
+        Returns the stored closes of a symbol by day, from start up to end, excluded
+        """
+        closes = self._load(symbol)[0]
+        if start is not None:
+            closes = closes[closes.index >= start]
+        if end is not None:
+            closes = closes[closes.index < end]
+        return closes
+
+    def fetchedRange(self, symbol: str) -> Optional[DateRange]:
+        return self._load(symbol)[1]
+
+    def missingRanges(self, symbol: str, start: pd.Timestamp, end: pd.Timestamp) -> List[DateRange]:
+        """
+        Returns the ranges of days between start and end that were not fetched for a symbol
+        """
+        fetched = self.fetchedRange(symbol)
+        if fetched is None or fetched[0] >= end or fetched[1] <= start:
+            # Fetch the gap too so the fetched range stays contiguous
+            if fetched is not None:
+                return [(min(start, fetched[1]), max(end, fetched[0]))]
+            return [(start, end)]
+        ret = []
+        if start < fetched[0]:
+            ret.append((start, fetched[0]))
+        if end > fetched[1]:
+            ret.append((fetched[1], end))
+        return ret
+
+    def add(self, symbol: str, closes: pd.Series, fetched: DateRange):
+        """
+        Adds the closes fetched for a range of days, which must touch the range already fetched
+        """
+        with self._lock:
+            current, currentRange = self._load(symbol)
+            closes = closes.dropna().astype("float64")
+            closes.index = pd.DatetimeIndex(closes.index).normalize().astype("datetime64[ns]")
+            merged = pd.concat([current[(current.index < fetched[0]) | (current.index >= fetched[1])], closes])
+            merged = merged[~merged.index.duplicated(keep="last")].sort_index()
+            if currentRange is not None:
+                fetched = (min(fetched[0], currentRange[0]), max(fetched[1], currentRange[1]))
+            self._histories[symbol] = (merged, fetched)
+            if self._path is not None:
+                self._write(symbol, merged, fetched)
+
+    def _load(self, symbol: str) -> Tuple[pd.Series, Optional[DateRange]]:
+        history = self._histories.get(symbol)
+        if history is None:
+            history = self._read(symbol)
+            self._histories[symbol] = history
+        return history
+
+    def _filepath(self, symbol: str) -> pathlib.Path:
+        return self._path / f"{symbol.replace('/', '_')}.parquet"
+
+    def _read(self, symbol: str) -> Tuple[pd.Series, Optional[DateRange]]:
+        empty = pd.Series([], index=pd.DatetimeIndex([], dtype="datetime64[ns]"), dtype="float64", name=symbol)
+        if self._path is None or not self._filepath(symbol).exists():
+            return empty, None
+        pq = _parquet()
+        table = pq.read_table(str(self._filepath(symbol)))
+        fetched = json.loads(table.schema.metadata[self._rangeKey])
+        df = table.to_pandas()
+        closes = pd.Series(df["close"].to_numpy(), index=pd.DatetimeIndex(df["date"]).astype("datetime64[ns]"), name=symbol)
+        return closes, (pd.Timestamp(fetched[0]), pd.Timestamp(fetched[1]))
+
+    def _write(self, symbol: str, closes: pd.Series, fetched: DateRange):
+        pq = _parquet()
+        import pyarrow
+        table = pyarrow.table({ "date": closes.index.to_numpy(), "close": closes.to_numpy() })
+        table = table.replace_schema_metadata({ self._rangeKey: json.dumps([fetched[0].isoformat(), fetched[1].isoformat()]) })
+        filepath = self._filepath(symbol)
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmpPath = tempfile.mkstemp(dir=filepath.parent, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmpPath, compression="zstd")
+            os.replace(tmpPath, filepath)
+        except BaseException:
+            if os.path.exists(tmpPath):
+                os.remove(tmpPath)
+            raise
+
+def _parquet():
+    try:
+        import pyarrow.parquet
+    except ImportError:
+        raise RuntimeError("Storing price history requires pyarrow, install it with: pip install pyarrow")
+    return pyarrow.parquet
@@ -0,0 +1,150 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from .market_data import MarketData
+
+class CellUpdate(NamedTuple):
+    # 1 based, like in spreadsheets
+    row: int
+    col: int
+    value: Any
+
+class SheetBackend:
+    """
+    The operations on a sheet needed to update its prices, so that only the cells involved are
+    read and written. Rows and columns are 1 based.
+    """
+    def header(self) -> List[Any]:
+        """
+        Returns the values of the first row
+        """
+        raise NotImplementedError()
+
+    def column(self, col: int) -> List[Any]:
+        """
+        Returns the values of a column below the header, i.e. from the second row
+        """
+        raise NotImplementedError()
+
+    def updateCells(self, updates: List[CellUpdate]):
+        """
+        Writes cells in a single request
+        """
+        raise NotImplementedError()
+
+class GoogleSheetBackend(SheetBackend):
+    """
+    A Google spreadsheet worksheet accessed through gspread. Prices are read unformatted so they
+    compare to the fetched prices as numbers.
+    """
+    def __init__(self, worksheet):
+        self._worksheet = worksheet
+
+    def header(self) -> List[Any]:
+        return self._worksheet.row_values(1)
+
+    def column(self, col: int) -> List[Any]:
+        return self._worksheet.col_values(col, value_render_option="UNFORMATTED_VALUE")[1:]
+
+    def updateCells(self, updates: List[CellUpdate]):
+        import gspread
+        self._worksheet.update_cells([gspread.Cell(u.row, u.col, u.value) for u in updates])
+
+class MemorySheetBackend(SheetBackend):
+    """
+    A sheet held in memory as a list of rows, which records the requests made to it.
+    Stands in for a Google spreadsheet in tests.
+    """
+    _rows: List[List[Any]]
+    _requests: List[List[CellUpdate]]
+
+    def __init__(self, rows: List[List[Any]]):
+        self._rows = [list(row) for row in rows]
+        self._requests = []
+
+    @property
+    def rows(self) -> List[List[Any]]:
+        return self._rows
+
+    @property
+    def requests(self) -> List[List[CellUpdate]]:
+        """
+        The cells written by each call to updateCells
+        """
+        return self._requests
+
+    def header(self) -> List[Any]:
+        return list(self._rows[0]) if len(self._rows) > 0 else []
+
+    def column(self, col: int) -> List[Any]:
+        return [row[col - 1] if col - 1 < len(row) else "" for row in self._rows[1:]]
+
+    def updateCells(self, updates: List[CellUpdate]):
+        self._requests.append(list(updates))
+        for row, col, value in updates:
+            while len(self._rows) < row:
+                self._rows.append([])
+            cells = self._rows[row - 1]
+            while len(cells) < col:
+                cells.append("")
+            cells[col - 1] = value
+
+class PriceSheetUpdater:
+    """
+    Updates the current price column of a sheet with the prices of the symbols of its security column.
+    Only the header and these two columns are read, each symbol is quoted once however many rows
+    hold it, and only the prices that changed are written, in batches of cells.
+    """
+    securityColumn: str = "security"
+    priceColumn: str = "current price"
+
+    _backend: SheetBackend
+    _marketData: MarketData
+    _batchSize: int
+
+    def __init__(self, backend: SheetBackend, marketData: MarketData = None, batchSize: int = 1000):
+        self._backend = backend
+        self._marketData = marketData if marketData is not None else MarketData.default()
+        self._batchSize = batchSize
+
+    def update(self, errors: Dict[str, Exception] = None) -> List[CellUpdate]:
+        """
+        Updates the prices, and returns the cells written. The errors of the symbols that couldn't be
+        quoted are added to errors if given, and their prices are left as they are.
+        """
+        header = [str(v).strip().lower() for v in self._backend.header()]
+        securityCol = self._columnIndex(header, self.securityColumn)
+        priceCol = self._columnIndex(header, self.priceColumn)
+
+        symbols = [str(v).strip() if v is not None else "" for v in self._backend.column(securityCol)]
+        prices = self._backend.column(priceCol)
+        quotes = self._marketData.quotes([s for s in symbols if len(s) > 0], errors)
+
+        updates = []
+        for i, symbol in enumerate(symbols):
+            quote = quotes.get(symbol)
+            if quote is None:
+                continue
+            current = prices[i] if i < len(prices) else None
+            if not _samePrice(current, quote.price):
+                updates.append(CellUpdate(i + 2, priceCol, quote.price))
+
+        for i in range(0, len(updates), self._batchSize):
+            self._backend.updateCells(updates[i:i + self._batchSize])
+        return updates
+
+    def _columnIndex(self, header: List[str], name: str) -> int:
+        if name not in header:
+            raise RuntimeError(f"{name.capitalize()} column not found")
+        return header.index(name) + 1
+
+def _samePrice(value: Any, price: float) -> bool:
+    number = _number(value)
+    return number is not None and abs(number - price) < 1e-9
+
+def _number(value: Any) -> Optional[float]:
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).replace("$", "").replace(",", "").strip())
+    except ValueError:
+        return None
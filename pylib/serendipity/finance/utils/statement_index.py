@@ -0,0 +1,254 @@
+import math
+import pathlib
+import sqlite3
+import pandas
+from typing import Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from ...gen.finance.models import Statement
+from ..extractors import StatementFrame
+
+class IndexedStatement(NamedTuple):
+    """
+    The header of a statement in the index
+    """
+    contentHash: str
+    institution: str
+    account: str
+    startDate: str
+    endDate: str
+    destination: str
+
+class IndexedHolding(NamedTuple):
+    institution: str
+    account: str
+    endDate: str
+    symbol: str
+    quantity: float
+    costBasis: Optional[float]
+    value: Optional[float]
+    purchaseDate: Optional[str]
+
+class IndexedTransaction(NamedTuple):
+    """
+    A brokerage, bank or credit card transaction in the index, as told by its kind.
+    date is the trade date of brokerage transactions and the posted date of the others.
+    """
+    institution: str
+    account: str
+    kind: str
+    date: str
+    symbol: Optional[str]
+    transactionType: str
+    quantity: Optional[float]
+    price: Optional[float]
+    amount: Optional[float]
+    description: Optional[str]
+
+class IndexEntry(NamedTuple):
+    """
+    The rows of a statement, ready to be added to the index. They are plain tuples, so worker
+    processes can compute them and send them to the process that owns the index.
+    """
+    statement: IndexedStatement
+    holdings: List[IndexedHolding]
+    transactions: List[IndexedTransaction]
+
+class StatementIndex:
+    """
+    Index of the headers, holdings and transactions of the organized statements, stored in SQLite,
+    so transactions and holdings can be queried by account, symbol and date without extracting the
+    statements again. The statements of a file are keyed by its content hash and replaced when the
+    file is indexed again.
+
+    Dates are stored as ISO 8601 strings, so date ranges compare as strings, and amounts as floats.
+    """
+    # (statement collection, kind, date column) of the indexed transactions
+    _transactionCollections: List[Tuple[str, str, str]] = [
+        ("brokerage_transactions", "brokerage", "trade_date"),
+        ("bank_transactions", "bank", "posted_date"),
+        ("credit_card_transactions", "credit_card", "posted_date")
+    ]
+
+    _connection: sqlite3.Connection
+
+    def __init__(self, path: str):
+        pathlib.Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30)
+        with self._connection:
+            self._connection.executescript("""
+                CREATE TABLE IF NOT EXISTS statements (
+                    id INTEGER PRIMARY KEY,
+                    content_hash TEXT NOT NULL,
+                    institution TEXT,
+                    account TEXT,
+                    start_date TEXT,
+                    end_date TEXT,
+                    destination TEXT
+                );
+                CREATE INDEX IF NOT EXISTS statements_content_hash ON statements (content_hash);
+                CREATE INDEX IF NOT EXISTS statements_account ON statements (account, end_date);
+                CREATE TABLE IF NOT EXISTS holdings (
+                    statement_id INTEGER NOT NULL REFERENCES statements (id) ON DELETE CASCADE,
+                    institution TEXT,
+                    account TEXT,
+                    end_date TEXT,
+                    symbol TEXT,
+                    quantity REAL,
+                    cost_basis REAL,
+                    value REAL,
+                    purchase_date TEXT
+                );
+                CREATE INDEX IF NOT EXISTS holdings_statement ON holdings (statement_id);
+                CREATE INDEX IF NOT EXISTS holdings_symbol ON holdings (symbol, end_date);
+                CREATE INDEX IF NOT EXISTS holdings_account ON holdings (account, end_date);
+                CREATE TABLE IF NOT EXISTS transactions (
+                    statement_id INTEGER NOT NULL REFERENCES statements (id) ON DELETE CASCADE,
+                    institution TEXT,
+                    account TEXT,
+                    kind TEXT NOT NULL,
+                    date TEXT,
+                    symbol TEXT,
+                    transaction_type TEXT,
+                    quantity REAL,
+                    price REAL,
+                    amount REAL,
+                    description TEXT
+                );
+                CREATE INDEX IF NOT EXISTS transactions_statement ON transactions (statement_id);
+                CREATE INDEX IF NOT EXISTS transactions_symbol ON transactions (symbol, date);
+                CREATE INDEX IF NOT EXISTS transactions_account ON transactions (account, date);
+                CREATE INDEX IF NOT EXISTS transactions_date ON transactions (date);
+                """)
+
+    def close(self):
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @classmethod
+    def entries(cls, statements: Iterable[Union[Statement, StatementFrame]], contentHash: str, destination: str = None) -> List[IndexEntry]:
+        """
+        Returns the rows to index for the statements extracted from a file
+        """
+        ret = []
+        for statement in statements:
+            frame = statement if isinstance(statement, StatementFrame) else StatementFrame.fromStatement(statement)
+            institution = frame.institutionName
+            account = frame.accountNumber
+            endDate = frame.endDate
+            entry = IndexEntry(IndexedStatement(contentHash, institution, account, frame.startDate, endDate, destination), [], [])
+            ret.append(entry)
+
+            holdings = frame.frame("brokerage_holdings")
+            for symbol, quantity, costBasis, value, purchaseDate in zip(
+                holdings["symbol"], holdings["quantity"], holdings["cost_basis"], holdings["value_end"], _isoDates(holdings["purchase_date"])
+            ):
+                entry.holdings.append(IndexedHolding(institution, account, endDate, symbol,
+                    _number(quantity), _number(costBasis), _number(value), purchaseDate))
+
+            for name, kind, dateColumn in cls._transactionCollections:
+                if name not in frame.names():
+                    continue
+                t = frame.frame(name)
+                missing = pandas.Series([None] * len(t), index=t.index, dtype=object)
+                columns = [_isoDates(t[dateColumn])]
+                for column in ("symbol", "transaction_type", "quantity", "price", "amount", "description"):
+                    columns.append(t[column] if column in t.columns else missing)
+                for date, symbol, transactionType, quantity, price, amount, description in zip(*columns):
+                    entry.transactions.append(IndexedTransaction(institution, account, kind, date, symbol, transactionType,
+                        _number(quantity), _number(price), _number(amount), description))
+        return ret
+
+    def add(self, entries: List[IndexEntry]):
+        """
+        Adds the statements of a file, replacing the statements previously indexed for the same content
+        """
+        with self._connection:
+            for contentHash in set(e.statement.contentHash for e in entries):
+                self._remove(contentHash)
+            for e in entries:
+                statementId = self._connection.execute(
+                    "INSERT INTO statements (content_hash, institution, account, start_date, end_date, destination) VALUES (?, ?, ?, ?, ?, ?)",
+                    e.statement).lastrowid
+                self._connection.executemany("INSERT INTO holdings VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((statementId,) + h for h in e.holdings))
+                self._connection.executemany("INSERT INTO transactions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    ((statementId,) + t for t in e.transactions))
+
+    def remove(self, contentHash: str):
+        with self._connection:
+            self._remove(contentHash)
+
+    def statements(self, account: str = None, institution: str = None) -> List[IndexedStatement]:
+        where, params = _conditions(account=account, institution=institution)
+        rows = self._connection.execute(
+            f"SELECT content_hash, institution, account, start_date, end_date, destination FROM statements{where} ORDER BY end_date, account", params)
+        return [IndexedStatement(*row) for row in rows]
+
+    def transactions(
+        self,
+        symbol: str = None,
+        account: str = None,
+        start: str = None,
+        end: str = None,
+        kind: str = None
+    ) -> List[IndexedTransaction]:
+        """
+        Returns the transactions matching all the given criteria, ordered by date.
+        start is inclusive and end is exclusive, e.g. start="2020-01-01", end="2021-01-01" for 2020.
+        """
+        where, params = _conditions(symbol=symbol, account=account, kind=kind, start=start, end=end, dateColumn="date")
+        rows = self._connection.execute(f"""
+            SELECT institution, account, kind, date, symbol, transaction_type, quantity, price, amount, description
+            FROM transactions{where} ORDER BY date, account""", params)
+        return [IndexedTransaction(*row) for row in rows]
+
+    def holdings(
+        self,
+        symbol: str = None,
+        account: str = None,
+        start: str = None,
+        end: str = None
+    ) -> List[IndexedHolding]:
+        """
+        Returns the holdings matching all the given criteria, by the end date of their statement
+        """
+        where, params = _conditions(symbol=symbol, account=account, start=start, end=end, dateColumn="end_date")
+        rows = self._connection.execute(f"""
+            SELECT institution, account, end_date, symbol, quantity, cost_basis, value, purchase_date
+            FROM holdings{where} ORDER BY end_date, account, symbol""", params)
+        return [IndexedHolding(*row) for row in rows]
+
+    def _remove(self, contentHash: str):
+        ids = [(row[0],) for row in self._connection.execute("SELECT id FROM statements WHERE content_hash = ?", (contentHash,))]
+        self._connection.executemany("DELETE FROM holdings WHERE statement_id = ?", ids)
+        self._connection.executemany("DELETE FROM transactions WHERE statement_id = ?", ids)
+        self._connection.executemany("DELETE FROM statements WHERE id = ?", ids)
+
+def _conditions(dateColumn: str = None, start: str = None, end: str = None, **values) -> Tuple[str, list]:
+    conditions = []
+    params = []
+    for column, value in values.items():
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+    if start is not None:
+        conditions.append(f"{dateColumn} >= ?")
+        params.append(start)
+    if end is not None:
+        conditions.append(f"{dateColumn} < ?")
+        params.append(end)
+    where = " WHERE " + " AND ".join(conditions) if len(conditions) > 0 else ""
+    return where, params
+
+def _isoDates(values: pandas.Series) -> List[Optional[str]]:
+    return [None if pandas.isna(v) else v.isoformat() for v in values]
+
+def _number(value) -> Optional[float]:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    return float(value)
@@ -1,25 +1,258 @@
+from concurrent.futures import as_completed, ProcessPoolExecutor
 from datetime import datetime
+import glob
 import os
 import pathlib
-import shutil
+from typing import Callable, Dict, List, Optional, Set, Tuple
 
 from serendipity.gen.serendipity_config.models import SerendipityConfig, Finance
 
+from ...extractor import Document, DocumentCache
 from ..extractors import createCsvStatementExtractor
+from .blob_store import BlobStore
+from .import_manifest import ImportManifest, ImportRecord
+from .statement_index import IndexEntry, StatementIndex
 
 class StatementOrganizer:
     _path: str
+    _config: SerendipityConfig
+    _manifest: Optional[ImportManifest]
+    _index: Optional[StatementIndex]
+    _blobStore: BlobStore
 
-    def __init__(self, config: SerendipityConfig):
+    def __init__(self, config: SerendipityConfig, useManifest: bool = True, useIndex: bool = True):
+        """
+        If useManifest is True, imported files are recorded in a manifest in the
+        document path and files that were already imported are skipped.
+
+        If useIndex is True, the statements of the imported files are added to the
+        statement index in the document path, which can be queried without extracting them again.
+
+        The content of the organized files is kept once in a content addressed store, 
+        and linked into the statements directory. The text and tables parsed from the 
+        documents are cached by the document cache, which the import tool points at
+        cachePath(config) so that importing them again skips parsing. Worker processes
+        use a cache at the same path as the cache of the parent process.
+        """
+        self._config = config
         self._path = config.finance.document_path
+        self._blobStore = BlobStore(str(pathlib.Path(self._path) / "finance" / "blobs"))
+        self._manifest = None
+        if useManifest:
+            self._manifest = ImportManifest(str(pathlib.Path(self._path) / "finance" / "import_manifest.sqlite3"))
+        self._index = None
+        if useIndex:
+            self._index = StatementIndex(self.indexPath(config))
+
+    @staticmethod
+    def indexPath(config: SerendipityConfig) -> str:
+        return str(pathlib.Path(config.finance.document_path) / "finance" / "statement_index.sqlite3")
+
+    @staticmethod
+    def cachePath(config: SerendipityConfig) -> str:
+        return str(pathlib.Path(config.finance.document_path) / "finance" / "cache")
+
+    @property
+    def manifest(self) -> Optional[ImportManifest]:
+        return self._manifest
+
+    @property
+    def index(self) -> Optional[StatementIndex]:
+        return self._index
+
+    def isImported(self, filepath: str) -> bool:
+        """
+        Returns True if the file, or another file with the same content, was already imported
+        """
+        if self._isUnchanged(filepath):
+            return True
+        if self._manifest is None:
+            return False
+        # The file is new or was touched, so check whether its content was already imported
+        record = self._importedContent(filepath, Document.fileContentHash(filepath))
+        if record is None:
+            return False
+        self._manifest.record(record)
+        return True
+
+    def _isUnchanged(self, filepath: str) -> bool:
+        """
+        Returns True if the file was imported and hasn't changed since, without reading it
+        """
+        if self._manifest is None:
+            return False
+        stat = os.stat(filepath)
+        record = self._manifest.lookup(filepath, stat.st_size, stat.st_mtime_ns)
+        return record is not None and os.path.exists(record.destination)
+
+    def _importedContent(self, filepath: str, contentHash: str) -> Optional[ImportRecord]:
+        """
+        Returns the record of the file, or None if its content wasn't imported. The record is
+        that of the first file imported with the same content, updated with the path of this file.
+        """
+        record = self._manifest.lookupContent(contentHash)
+        if record is None or not os.path.exists(record.destination):
+            return None
+        stat = os.stat(filepath)
+        return record._replace(path=filepath, size=stat.st_size, mtime=stat.st_mtime_ns)
+
+    def importFile(self, filepath: str) -> bool:
+        """
+        Organizes a file unless it was already imported. Returns True if the file was organized.
+        """
+        if self._isUnchanged(filepath):
+            return False
+        record, entries = self._organize(filepath, skipImported=True)
+        self._record(record, entries)
+        return entries is not None
+
+    def organize(self, filepath: str) -> ImportRecord:
+        record, entries = self._organize(filepath)
+        if self._index is not None:
+            self._index.add(entries)
+        return record
 
-    def organize(self, filepath: str):
+    def _organize(self, filepath: str, skipImported: bool = False) -> Tuple[ImportRecord, Optional[List[IndexEntry]]]:
+        """
+        Organizes a file, and returns its import record with the entries to index for its statements.
+        If skipImported is True and the content of the file was already imported, the file
+        is not organized again, and its record is returned without entries.
+        """
+        stat = os.stat(filepath)
         extractor = createCsvStatementExtractor(filepath)
-        sig = extractor.statement()
-        newName = extractor.normalizedStatementFileName()
+        if extractor is None:
+            raise RuntimeError(f"No statement extractor found for {filepath}")
+        # The document keeps its hash, so the content is only read once to hash it
+        contentHash = extractor.document.contentHash()
+        if skipImported and self._manifest is not None:
+            record = self._importedContent(filepath, contentHash)
+            if record is not None:
+                return record, None
+        statements = extractor.statements()
+        sig = statements[0]
+        newName = extractor.normalizedStatementFileName(statements)
         year = datetime.fromisoformat(sig.end_date).strftime("%Y")
         filename, fileExtension = os.path.splitext(filepath)
         dirPath = pathlib.Path(self._path) / "finance" / "statements" / year
         newFilepath = dirPath / (newName + fileExtension)
-        pathlib.Path(dirPath).mkdir(parents=True, exist_ok=True)
-        shutil.copyfile(filepath, newFilepath)
+        self._blobStore.put(filepath, contentHash)
+        self._blobStore.link(contentHash, newFilepath)
+        record = ImportRecord(
+            path=filepath, 
+            size=stat.st_size, 
+            mtime=stat.st_mtime_ns, 
+            contentHash=contentHash, 
+            extractor=type(extractor).__name__, 
+            signature=newName, 
+            destination=str(newFilepath)
+        )
+        return record, StatementIndex.entries(statements, contentHash, str(newFilepath))
+
+    def organizeFiles(
+        self, 
+        filepaths: List[str], 
+        workers: int = None, 
+        progress: Callable[[int, int, str, Exception], None] = None,
+        force: bool = False,
+        skipped: Set[str] = None
+    ) -> Dict[str, Exception]:
+        """
+        Organizes many files, detecting and extracting them over a pool of worker processes.
+        Files that were already imported are skipped unless force is True, and added to skipped
+        if it is given. Unchanged files are recognized by the parent process from their size and
+        modification time, while the content of other files is hashed and looked up by the workers.
+        A file that fails is reported and skipped instead of aborting the batch.
+
+        progress is called after each file with the number of files processed, the total 
+        number of files, the file, and the error for the file or None.
+        Returns the errors keyed by file.
+        """
+        errors: Dict[str, Exception] = {}
+        total = len(filepaths)
+
+        def done(count: int, filepath: str, error: Exception, imported: bool = True):
+            if error is not None:
+                errors[filepath] = error
+            elif not imported and skipped is not None:
+                skipped.add(filepath)
+            if progress is not None:
+                progress(count, total, filepath, error)
+
+        count = 0
+        pending = []
+        for filepath in filepaths:
+            try:
+                if not force and self._isUnchanged(filepath):
+                    count = count + 1
+                    done(count, filepath, None, imported=False)
+                else:
+                    pending.append(filepath)
+            except Exception as e:
+                count = count + 1
+                done(count, filepath, e)
+
+        if workers == 1 or len(pending) <= 1:
+            for filepath in pending:
+                count = count + 1
+                try:
+                    record, entries = self._organize(filepath, skipImported=not force)
+                    self._record(record, entries)
+                    done(count, filepath, None, imported=entries is not None)
+                except Exception as e:
+                    done(count, filepath, e)
+            return errors
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=_initWorker, initargs=(self._config, Document.cache().path)) as executor:
+            futures = { executor.submit(_organizeInWorker, filepath, not force): filepath for filepath in pending }
+            for future in as_completed(futures):
+                count = count + 1
+                error = future.exception()
+                imported = True
+                if error is None:
+                    record, entries = future.result()
+                    self._record(record, entries)
+                    imported = entries is not None
+                done(count, futures[future], error, imported=imported)
+        return errors
+
+    def _record(self, record: ImportRecord, entries: Optional[List[IndexEntry]]):
+        """
+        Records an imported file, with the entries of its statements, or None if its content was imported before
+        """
+        if self._index is not None and entries is not None:
+            self._index.add(entries)
+        if self._manifest is not None:
+            self._manifest.record(record)
+
+    @staticmethod
+    def findFiles(paths: List[str]) -> List[str]:
+        """
+        Returns the files for a list of files, directories and glob patterns. 
+        Directories are searched recursively for documents with a supported extension.
+        """
+        extensions = set("." + ext for ext in Document._extensionMap)
+        found = {}
+        for path in paths:
+            matches = glob.glob(path, recursive=True) if glob.has_magic(path) else [path]
+            for match in sorted(matches):
+                if os.path.isdir(match):
+                    for root, dirs, files in os.walk(match):
+                        dirs.sort()
+                        for f in sorted(files):
+                            if os.path.splitext(f)[1].lower() in extensions:
+                                found[os.path.join(root, f)] = True
+                else:
+                    found[match] = True
+        return list(found)
+
+_workerOrganizer: StatementOrganizer = None
+
+def _initWorker(config: SerendipityConfig, cachePath: Optional[pathlib.Path]):
+    global _workerOrganizer
+    if cachePath is not None:
+        Document.setCache(DocumentCache(path=str(cachePath)))
+    # Workers only read the manifest to skip imported content, the manifest and the index are updated by the parent process
+    _workerOrganizer = StatementOrganizer(config, useManifest=True, useIndex=False)
+
+def _organizeInWorker(filepath: str, skipImported: bool) -> Tuple[ImportRecord, Optional[List[IndexEntry]]]:
+    return _workerOrganizer._organize(filepath, skipImported=skipImported)
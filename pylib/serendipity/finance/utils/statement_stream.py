@@ -0,0 +1,344 @@
+from datetime import date, datetime
+import json
+import pandas
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, TextIO, Tuple, Union
+
+from ...gen.finance import ApiClient, models
+from ...gen.finance.models import Statement
+from ..extractors import StatementFrame
+
+class _Attribute(NamedTuple):
+    name: str
+    key: str
+    # Model class of the value, or of the elements of a list value, None for plain values
+    modelClass: Optional[type]
+    isList: bool
+
+class AttributeMap:
+    """
+    The attributes of a model class with their JSON keys and the model classes of nested values,
+    computed once per model class instead of walking openapi_types for every object
+    """
+    _maps: Dict[type, "AttributeMap"] = {}
+
+    modelClass: type
+    attributes: List[_Attribute]
+
+    def __init__(self, modelClass: type):
+        self.modelClass = modelClass
+        self.attributes = []
+        for name, typeName in modelClass.openapi_types.items():
+            isList = typeName.startswith("list[")
+            if isList:
+                typeName = typeName[len("list["):-1]
+            nested = getattr(models, typeName, None)
+            self.attributes.append(_Attribute(name, modelClass.attribute_map[name], nested, isList))
+
+    @classmethod
+    def get(cls, modelClass: type) -> "AttributeMap":
+        attributeMap = cls._maps.get(modelClass)
+        if attributeMap is None:
+            attributeMap = cls._maps[modelClass] = AttributeMap(modelClass)
+        return attributeMap
+
+    def toJson(self, obj: Any) -> Dict[str, Any]:
+        """
+        Returns the JSON object of a model object, without its null attributes
+        """
+        ret = {}
+        for name, key, modelClass, isList in self.attributes:
+            value = getattr(obj, name)
+            if value is None:
+                continue
+            if modelClass is not None and isList:
+                value = [_jsonValue(v) for v in value]
+            else:
+                # Money fields are modeled as objects but hold strings like "$1,234.50"
+                value = _jsonValue(value)
+            ret[key] = value
+        return ret
+
+class StatementWriter:
+    """
+    Writes statements to a text file or a pipe as they are given, without building
+    the JSON of all the statements in memory first.
+
+    With the "ndjson" format, each statement is written as a line holding its statement level
+    fields, followed by a line for each element of its collections, e.g. {"brokerage_transactions": {...}}.
+    Empty collections are written with the statement level fields.
+    With the "json" format, the statements are written as a JSON array, one element at a time.
+    """
+    formats = ("ndjson", "json")
+
+    _f: TextIO
+    _format: str
+    _count: int
+    _closed: bool
+
+    def __init__(self, f: TextIO, format: str = "ndjson"):
+        if format not in self.formats:
+            raise ValueError(f"Unknown statement format {format}")
+        self._f = f
+        self._format = format
+        self._count = 0
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def count(self) -> int:
+        """
+        The number of statements written
+        """
+        return self._count
+
+    def write(self, statement: Union[Statement, StatementFrame]):
+        if self._closed:
+            raise RuntimeError("Statement writer is closed")
+        metadata, collections = self._parts(statement)
+        if self._format == "ndjson":
+            self._f.write(_dumps({ "statement": metadata }))
+            self._f.write("\n")
+            for name, items in collections:
+                for item in items:
+                    self._f.write(_dumps({ name: item }))
+                    self._f.write("\n")
+        else:
+            self._f.write("[\n" if self._count == 0 else ",\n")
+            fields = _dumps(metadata)[1:-1]
+            self._f.write("{" + fields)
+            separator = "," if len(fields) > 0 else ""
+            for name, items in collections:
+                self._f.write(f"{separator}{json.dumps(name)}:[")
+                separator = ","
+                for i, item in enumerate(items):
+                    if i > 0:
+                        self._f.write(",")
+                    self._f.write(_dumps(item))
+                self._f.write("]")
+            self._f.write("}")
+        self._count = self._count + 1
+
+    def writeAll(self, statements: Iterator[Union[Statement, StatementFrame]]):
+        for statement in statements:
+            self.write(statement)
+
+    def close(self):
+        """
+        Terminates the JSON array. The file itself is not closed.
+        """
+        if self._closed:
+            return
+        if self._format == "json":
+            self._f.write("[]\n" if self._count == 0 else "\n]\n")
+        self._closed = True
+
+    def _parts(self, statement: Union[Statement, StatementFrame]) -> Tuple[Dict[str, Any], List[Tuple[str, Iterator[Dict[str, Any]]]]]:
+        """
+        Returns the statement level fields and a lazy iterator over the JSON objects of each collection
+        """
+        statementMap = AttributeMap.get(Statement)
+        metadata = {}
+        collections = []
+        if isinstance(statement, StatementFrame):
+            for name, value in statement.metadata.items():
+                metadata[name] = _jsonValue(value)
+            for name in statement.names():
+                if len(statement.frame(name)) == 0:
+                    metadata[name] = []
+                    continue
+                itemMap = AttributeMap.get(StatementFrame.collections[name])
+                collections.append((name, map(itemMap.toJson, statement.models(name))))
+            return metadata, collections
+
+        for name, key, modelClass, isList in statementMap.attributes:
+            value = getattr(statement, name)
+            if value is None:
+                continue
+            if isList and modelClass is not None and len(value) == 0:
+                # Empty collections are kept with the statement level fields, since no line holds their elements
+                metadata[key] = []
+            elif isList and modelClass is not None:
+                collections.append((key, map(AttributeMap.get(modelClass).toJson, value)))
+            else:
+                metadata[key] = _jsonValue(value)
+        return metadata, collections
+
+class StatementReader:
+    """
+    Reads the statements written by a StatementWriter, one statement at a time,
+    either as model objects or as column batches
+    """
+    _f: TextIO
+    _readSize: int = 64 * 1024
+
+    def __init__(self, f: TextIO):
+        self._f = f
+
+    def records(self) -> Iterator[Tuple[Dict[str, Any], Dict[str, List[Dict[str, Any]]]]]:
+        """
+        Yields the statement level fields and the JSON objects of each collection of each statement
+        """
+        prefix = self._peek()
+        if prefix.strip() == "[":
+            for data in self._arrayElements():
+                collections = {}
+                for name in StatementFrame.collections:
+                    if name in data:
+                        collections[name] = data.pop(name)
+                yield data, collections
+            return
+
+        metadata = None
+        collections = {}
+        for line in _Prefixed(prefix, self._f):
+            if len(line.strip()) == 0:
+                continue
+            data = json.loads(line)
+            if "statement" in data:
+                if metadata is not None:
+                    yield metadata, collections
+                metadata = data["statement"]
+                collections = { name: metadata.pop(name) for name in StatementFrame.collections if name in metadata }
+            else:
+                for name, item in data.items():
+                    collections.setdefault(name, []).append(item)
+        if metadata is not None:
+            yield metadata, collections
+
+    def statements(self) -> Iterator[Statement]:
+        """
+        Yields the statements as model objects, with their values as they are in JSON,
+        e.g. dates stay ISO 8601 strings like in the statements created by the extractors
+        """
+        client = ApiClient(keep_formatted_values=True)
+        for metadata, collections in self.records():
+            metadata.update(collections)
+            yield client.deserialize_data(metadata, Statement)
+
+    def frames(self) -> Iterator[StatementFrame]:
+        """
+        Yields a StatementFrame for each statement, without creating model objects
+        """
+        for metadata, collections in self.records():
+            frames = {}
+            for name, items in collections.items():
+                frames[name] = StatementFrame.fromColumns(name, _columns(name, items))
+            yield StatementFrame(metadata, frames)
+
+    def batches(self, name: str, batchSize: int = 10000) -> Iterator[pandas.DataFrame]:
+        """
+        Yields the elements of a collection of all the statements as typed DataFrames of at most
+        batchSize rows, with the account number of the statement of each element
+        """
+        items = []
+        accountNumbers = []
+        for metadata, collections in self.records():
+            for item in collections.get(name, []):
+                items.append(item)
+                accountNumbers.append(metadata.get("account_number"))
+                if len(items) >= batchSize:
+                    yield _batch(name, items, accountNumbers)
+                    items = []
+                    accountNumbers = []
+        if len(items) > 0:
+            yield _batch(name, items, accountNumbers)
+
+    def _peek(self) -> str:
+        """
+        Reads the file up to its first non whitespace character, which tells its format
+        """
+        prefix = ""
+        while True:
+            c = self._f.read(1)
+            prefix = prefix + c
+            if len(c) == 0 or not c.isspace():
+                return prefix
+
+    def _arrayElements(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the elements of the JSON array that follows the opening bracket.
+        An element that is not read entirely yet is decoded again only once the text read
+        of it has doubled, and the blocks read in between are joined only then, so large
+        elements are decoded and copied a bounded number of times.
+        """
+        decoder = json.JSONDecoder()
+        buf = ""
+        pos = 0
+        blocks = []
+        blocksLength = 0
+        retryLength = 0
+        eof = False
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n,":
+                pos = pos + 1
+            if pos < len(buf) and buf[pos] == "]":
+                return
+            if pos < len(buf) and len(buf) - pos >= retryLength:
+                try:
+                    data, pos = decoder.raw_decode(buf, pos)
+                except ValueError:
+                    if eof:
+                        raise ValueError("Truncated statement array")
+                    retryLength = 2 * (len(buf) - pos)
+                else:
+                    retryLength = 0
+                    yield data
+                    continue
+            block = self._f.read(self._readSize)
+            if len(block) == 0:
+                if eof:
+                    raise ValueError("Truncated statement array")
+                eof = True
+                retryLength = 0
+            blocks.append(block)
+            blocksLength = blocksLength + len(block)
+            if eof or len(buf) - pos + blocksLength >= retryLength:
+                buf = buf[pos:] + "".join(blocks)
+                pos = 0
+                blocks = []
+                blocksLength = 0
+
+class _Prefixed:
+    """
+    Lines of a text file whose first characters were already read
+    """
+    def __init__(self, prefix: str, f: TextIO):
+        self._prefix = prefix
+        self._f = f
+
+    def __iter__(self):
+        first = self._prefix + self._f.readline()
+        if len(first) > 0:
+            yield first
+        yield from self._f
+
+def _dumps(obj: Dict[str, Any]) -> str:
+    return json.dumps(obj, separators=(",", ":"), default=_jsonValue)
+
+def _jsonValue(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if hasattr(value, "openapi_types"):
+        return AttributeMap.get(type(value)).toJson(value)
+    return value
+
+def _columns(name: str, items: List[Dict[str, Any]]) -> Dict[str, List[Any]]:
+    columns = {}
+    for column, path, _ in StatementFrame.columnSpecs(StatementFrame.collections[name]):
+        values = []
+        for item in items:
+            for key in path:
+                item = item.get(key) if isinstance(item, dict) else None
+            values.append(item)
+        columns[column] = values
+    return columns
+
+def _batch(name: str, items: List[Dict[str, Any]], accountNumbers: List[str]) -> pandas.DataFrame:
+    frame = StatementFrame.fromColumns(name, _columns(name, items))
+    frame.insert(0, "account_number", accountNumbers)
+    return frame
@@ -0,0 +1,134 @@
+import collections
+import csv
+from datetime import date, timedelta
+import functools
+import hashlib
+import os
+from typing import Counter, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from ...gen.finance.models import BankTransaction, BrokerageTransaction, Statement
+
+class TillerMoneyEntry(NamedTuple):
+    """
+    A row of a Tiller Money transactions sheet, in the order of its columns
+    """
+    date: str
+    description: str
+    category: str
+    amount: str
+    accountDescription: str
+    statement: str
+    accountNumber: str
+    institutionName: str
+    month: str
+    week: str
+    checkNumber: str
+    fullDescription: str
+
+class TillerMoneyExporter:
+    """
+    Exports the bank, credit card and brokerage transactions of statements to a Tiller Money CSV file.
+
+    Entries are converted and written one at a time as the statements are read. Entries that are
+    already in the file, e.g. from a previous export of overlapping statements, are skipped, so
+    exporting again only appends the new entries. The file is indexed by a hash of each of its rows,
+    counted so that identical transactions, e.g. two purchases of the same amount on the same day,
+    are still exported as many times as they occur.
+    """
+    columns: List[str] = ["Date", "Description", "Category", "Amount", "Account", "Statement", "Account #",
+        "Institution", "Month", "Week", "Check Number", "Full Description"]
+    dateFormat: str = "%m/%d/%Y"
+
+    _path: str
+    _index: Counter[int]
+
+    def __init__(self, path: str):
+        self._path = path
+        self._index = collections.Counter()
+        if os.path.exists(path):
+            with open(path, "r", newline="") as f:
+                rows = csv.reader(f)
+                next(rows, None)
+                for row in rows:
+                    if len(row) > 0:
+                        self._index[_entryId(row)] += 1
+
+    @property
+    def exportedCount(self) -> int:
+        """
+        The number of entries in the file
+        """
+        return sum(self._index.values())
+
+    def export(self, statements: Iterable[Statement]) -> int:
+        """
+        Appends the entries of the statements that are not in the file yet, and returns their number
+        """
+        count = 0
+        # The number of occurrences of each entry in this export, the ones beyond those in the file are written
+        exported = collections.Counter()
+        newFile = not os.path.exists(self._path) or os.path.getsize(self._path) == 0
+        with open(self._path, "a", newline="") as f:
+            writer = csv.writer(f)
+            if newFile:
+                writer.writerow(self.columns)
+            for entry in self.entries(statements):
+                entryId = _entryId(entry)
+                exported[entryId] += 1
+                if self._index[entryId] >= exported[entryId]:
+                    continue
+                writer.writerow(entry)
+                count = count + 1
+        for entryId, n in exported.items():
+            self._index[entryId] = max(self._index[entryId], n)
+        return count
+
+    @classmethod
+    def entries(cls, statements: Iterable[Statement]) -> Iterator[TillerMoneyEntry]:
+        for statement in statements:
+            for transactions in (statement.credit_card_transactions, statement.bank_transactions):
+                for t in transactions or []:
+                    yield cls.bankTransactionEntry(statement, t)
+            for t in statement.brokerage_transactions or []:
+                yield cls.brokerageTransactionEntry(statement, t)
+
+    @classmethod
+    def bankTransactionEntry(cls, statement: Statement, t: BankTransaction) -> TillerMoneyEntry:
+        return cls._entry(statement, t.posted_date, t.description, t.memo, t.amount)
+
+    @classmethod
+    def brokerageTransactionEntry(cls, statement: Statement, t: BrokerageTransaction) -> TillerMoneyEntry:
+        return cls._entry(statement, t.trade_date, f"{t.transaction_type} {t.symbol}", t.description, t.amount)
+
+    @classmethod
+    def _entry(cls, statement: Statement, isoDate: str, description: str, fullDescription: Optional[str], amount: str) -> TillerMoneyEntry:
+        day, month, week = _dates(isoDate[0:10])
+        return TillerMoneyEntry(
+            date=day,
+            description=description or "",
+            category="",
+            amount=amount.replace("$", "").replace(",", "") if amount is not None else "",
+            accountDescription="",
+            statement="",
+            accountNumber=(statement.account_number or "")[-4:].rjust(8, "x"),
+            institutionName=statement.institution_name or "",
+            month=month,
+            week=week,
+            checkNumber="",
+            fullDescription=fullDescription or ""
+        )
+
+@functools.lru_cache(maxsize=4096)
+def _dates(isoDate: str) -> Tuple[str, str, str]:
+    """
+    Returns the formatted day, month and week of a day. Histories repeat the same days, so they are memoized.
+    """
+    d = date.fromisoformat(isoDate)
+    # Weeks start on Sundays
+    week = d - timedelta(days=(d.weekday() + 1) % 7)
+    fmt = TillerMoneyExporter.dateFormat
+    return d.strftime(fmt), d.replace(day=1).strftime(fmt), week.strftime(fmt)
+
+def _entryId(row: Iterable[str]) -> int:
+    digest = hashlib.blake2b("\0".join(row).encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
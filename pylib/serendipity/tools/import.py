@@ -1,22 +1,45 @@
 import os
 import sys
+from typing import Set
 
 module_root=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
 sys.path.append(module_root)
 
+from serendipity.extractor import Document, DocumentCache
 from serendipity.utils import App
-from serendipity.finance.tools.statement_organizer import StatementOrganizer
+from serendipity.finance.utils.statement_organizer import StatementOrganizer
 
 class Import(App):
+    _skipped: Set[str]
+
     def __init__(self):
         super().__init__("Imports data into serendipity")
+        self._skipped = set()
         self._parser.add_argument("--type", "-t", type=str, help="The type of data to process. Can currently only be finance", default="finance")
-        self._parser.add_argument("--file", "-f", type=str, help="The file to process", required=True)
+        self._parser.add_argument("--file", "-f", type=str, nargs="+", action="extend", 
+            help="The files to process. Directories are searched recursively and glob patterns are expanded", required=True)
+        self._parser.add_argument("--force", action="store_true", help="Import files even if they were already imported")
+        self._parser.add_argument("--jobs", "-j", type=int, help="The number of worker processes. Defaults to the number of CPUs", default=None)
+
+    def progress(self, count: int, total: int, filepath: str, error: Exception):
+        if error is not None:
+            status = f"error: {error}"
+        else:
+            status = "skipped, already imported" if filepath in self._skipped else "ok"
+        print(f"[{count}/{total}] {filepath}: {status}", flush=True)
 
     def start(self, args: []):
         super().start(args)
+        # Keep the text and tables parsed from the documents, so importing them again skips parsing
+        Document.setCache(DocumentCache(path=StatementOrganizer.cachePath(self._config)))
         o = StatementOrganizer(self._config)
-        o.organize(self._parsedArgs.file)
+        files = StatementOrganizer.findFiles(self._parsedArgs.file)
+        errors = o.organizeFiles(files, workers=self._parsedArgs.jobs, progress=self.progress, force=self._parsedArgs.force, skipped=self._skipped)
+        print(f"Imported {len(files) - len(errors) - len(self._skipped)} of {len(files)} files, skipped {len(self._skipped)} already imported")
+        if len(errors) > 0:
+            for filepath, error in errors.items():
+                print(f"Failed to import {filepath}: {error}", file=sys.stderr)
+            sys.exit(1)
 
 if __name__  == "__main__":
     i = Import()
@@ -0,0 +1,43 @@
+import csv
+import os
+import sys
+
+module_root=os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..")
+sys.path.append(module_root)
+
+from serendipity.utils import App
+from serendipity.finance.utils.statement_index import StatementIndex
+from serendipity.finance.utils.statement_organizer import StatementOrganizer
+
+class Query(App):
+    def __init__(self):
+        super().__init__("Queries the index of the imported statements")
+        subparsers = self._parser.add_subparsers(dest="collection", required=True, help="What to query")
+        for name, desc in [("transactions", "Brokerage, bank and credit card transactions"), ("holdings", "Holdings by statement end date")]:
+            p = subparsers.add_parser(name, help=desc)
+            p.add_argument("--symbol", "-s", type=str, help="Only return this symbol", default=None)
+            p.add_argument("--account", "-a", type=str, help="Only return this account", default=None)
+            p.add_argument("--start", type=str, help="The first date to return, e.g. 2020-01-01", default=None)
+            p.add_argument("--end", type=str, help="The date to stop at, excluded, e.g. 2021-01-01", default=None)
+            if name == "transactions":
+                p.add_argument("--kind", "-k", type=str, choices=["brokerage", "bank", "credit_card"], help="Only return this kind of transaction", default=None)
+        subparsers.add_parser("statements", help="Headers of the indexed statements")
+
+    def start(self, args: []):
+        super().start(args)
+        args = self._parsedArgs
+        with StatementIndex(StatementOrganizer.indexPath(self._config)) as index:
+            if args.collection == "transactions":
+                rows = index.transactions(symbol=args.symbol, account=args.account, start=args.start, end=args.end, kind=args.kind)
+            elif args.collection == "holdings":
+                rows = index.holdings(symbol=args.symbol, account=args.account, start=args.start, end=args.end)
+            else:
+                rows = index.statements()
+        writer = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n")
+        if len(rows) > 0:
+            writer.writerow(rows[0]._fields)
+        writer.writerows(rows)
+
+if __name__  == "__main__":
+    q = Query()
+    q.start(sys.argv[1:])